@@ -0,0 +1,113 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+
+class _Writer:
+    """
+    所有 ArtifactStore 共用的后台写入线程，推理线程只负责入队
+    """
+
+    def __init__(self, max_pending=256):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, task):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='artifact-writer', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            # 磁盘跟不上时丢弃调试产物，不能阻塞推理
+            print('调试产物写入队列已满，丢弃本次写入')
+
+    def flush(self):
+        self._queue.join()
+
+    def _loop(self):
+        while True:
+            task = self._queue.get()
+            try:
+                task()
+            except Exception as e:
+                print(f'调试产物写入失败: {str(e)}')
+            finally:
+                self._queue.task_done()
+
+
+_writer = _Writer()
+
+
+class ArtifactStore:
+    """
+    单个文件的调试产物目录（预处理图像、检测结果、PDF 图片区域等），在后台线程中异步写入。
+    每次写入后按数量、总大小和保留时间清理最旧的产物。
+    """
+
+    def __init__(self, root_dir, max_files=200, max_bytes=200 * 1024 * 1024, max_age_seconds=None):
+        self.root_dir = root_dir
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def save_image(self, name, image):
+        """
+        :param name: 文件名，例如 page_1_figure_10_20.png
+        :param image: PIL 图像、numpy 数组，或返回二者之一的无参函数（在写入线程中才执行）
+        """
+        def task():
+            data = image() if callable(image) else image
+            if isinstance(data, np.ndarray):
+                data = Image.fromarray(data)
+            data.save(self._prepare(name))
+            self._enforce_retention()
+        _writer.submit(task)
+
+    def save_json(self, name, data):
+        def task():
+            with open(self._prepare(name), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            self._enforce_retention()
+        _writer.submit(task)
+
+    def flush(self):
+        """
+        等待所有排队中的写入完成
+        """
+        _writer.flush()
+
+    def _prepare(self, name):
+        os.makedirs(self.root_dir, exist_ok=True)
+        return os.path.join(self.root_dir, name)
+
+    def _enforce_retention(self):
+        entries = []
+        for entry in os.scandir(self.root_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        # 按修改时间从旧到新排序，优先删除最旧的产物
+        entries.sort()
+        now = time.time()
+        total_bytes = sum(size for _, size, _ in entries)
+        remaining = len(entries)
+        for mtime, size, path in entries:
+            expired = self.max_age_seconds is not None and now - mtime > self.max_age_seconds
+            too_many = self.max_files is not None and remaining > self.max_files
+            too_large = self.max_bytes is not None and total_bytes > self.max_bytes
+            if not (expired or too_many or too_large):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            remaining -= 1
+            total_bytes -= size
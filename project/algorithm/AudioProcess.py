@@ -5,12 +5,86 @@ import noisereduce as nr
 from pydub import AudioSegment
 import numpy as np
 from scipy.signal import resample
+import time
+import os
+import soundfile as sf
+import soxr
+import scipy.fft
+
+# Whisper 推理配置的默认值，可在 settings.WHISPER_PROFILE 中逐项覆盖
+DEFAULT_WHISPER_PROFILE = {
+    # 'auto' 有 GPU 时使用 GPU，否则使用 CPU
+    "DEVICE": "auto",
+    # CPU 上对 Linear 层做动态 INT8 量化：None / 'dynamic'
+    "QUANTIZATION": None,
+    # torch 算子内 / 算子间线程数，None 表示使用 torch 默认值
+    # 注意这是进程级设置：会同时改变同一进程中 YOLO、ResNet、PDF 等所有 torch 模型的线程数
+    "INTRA_OP_THREADS": None,
+    "INTER_OP_THREADS": None,
+    # 解码策略：NUM_BEAMS=1 为贪心解码
+    "NUM_BEAMS": 1,
+    "MAX_NEW_TOKENS": None,
+    "LANGUAGE": "zh",
+    "TASK": "transcribe",
+}
+
 
 class AudioProcessor:
-    def __init__(self):
+    def __init__(self, profile=None):
+        """
+        :param profile: 推理配置，键见 DEFAULT_WHISPER_PROFILE，缺省的键使用默认值
+        """
+        self.profile = dict(DEFAULT_WHISPER_PROFILE, **(profile or {}))
+        self._configure_threads()
         self.processor = WhisperProcessor.from_pretrained(r"F:\a\apaper\project\project\algorithm\model\whisper-small")
         self.trans_model = WhisperForConditionalGeneration.from_pretrained(r"F:\a\apaper\project\project\algorithm\model\whisper-small")
 
+        # 设备、量化和解码提示只在加载时设置一次，不再在每次转录时重复
+        device = self.profile["DEVICE"]
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = torch.device(device)
+        self.trans_model.eval()
+        if self.profile["QUANTIZATION"] == "dynamic":
+            if self.device.type == "cpu":
+                self.trans_model = torch.quantization.quantize_dynamic(
+                    self.trans_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            else:
+                print("动态 INT8 量化只支持 CPU，已忽略")
+        elif self.profile["QUANTIZATION"]:
+            raise ValueError(f"不支持的量化方式: {self.profile['QUANTIZATION']}")
+        self.trans_model.to(self.device)
+
+        self.generate_kwargs = {
+            "forced_decoder_ids": self.processor.get_decoder_prompt_ids(
+                language=self.profile["LANGUAGE"], task=self.profile["TASK"]
+            ),
+            "num_beams": self.profile["NUM_BEAMS"],
+            "do_sample": False,
+        }
+        if self.profile["MAX_NEW_TOKENS"]:
+            self.generate_kwargs["max_new_tokens"] = self.profile["MAX_NEW_TOKENS"]
+
+    def _configure_threads(self):
+        # torch 的线程数是进程级设置，不只作用于 Whisper；在 Django / 批处理进程中加载时，
+        # 之后同一进程内所有 torch 模型的推理都使用该线程数
+        if self.profile["INTRA_OP_THREADS"]:
+            if torch.get_num_threads() != self.profile["INTRA_OP_THREADS"]:
+                print(f"torch 算子内线程数由 {torch.get_num_threads()} 改为 {self.profile['INTRA_OP_THREADS']}，对整个进程生效")
+            torch.set_num_threads(self.profile["INTRA_OP_THREADS"])
+        if self.profile["INTER_OP_THREADS"]:
+            try:
+                torch.set_num_interop_threads(self.profile["INTER_OP_THREADS"])
+            except RuntimeError:
+                # 进程内已经执行过并行计算后无法再修改算子间线程数
+                print("算子间线程数已被初始化，无法修改")
+
+    def _generate(self, input_features):
+        with torch.inference_mode():
+            predicted_ids = self.trans_model.generate(input_features.to(self.device), **self.generate_kwargs)
+        return self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
+
     # 降噪处理
     def denoise_audio(self, audio, sr):
         # 提取前 1 秒音频作为噪声样本
@@ -54,52 +128,233 @@ class AudioProcessor:
             return resampled_audio
         return audio
 
+    # 直接解码为 16kHz 单声道 float32
+    def load_audio_16k(self, audio_path, target_sr=16000, cache_dir=None, block_seconds=30):
+        """
+        分块解码并用 soxr 多相滤波流式重采样，不再先按 22050Hz 解码再对整段信号做 FFT 重采样
+        :param audio_path: 音频路径
+        :param target_sr: 目标采样率
+        :param cache_dir: PCM 缓存目录，传入时解码结果写入 pcm_16k.f32，之后直接内存映射读取
+        :param block_seconds: 每次解码的时长
+        :return: float32 一维数组（使用缓存时为只读的内存映射数组）
+        """
+        cache_path = os.path.join(cache_dir, f"pcm_{target_sr // 1000}k.f32") if cache_dir else None
+        if cache_path and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(audio_path):
+            return np.memmap(cache_path, dtype=np.float32, mode="r")
+
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                for chunk in self._decode_blocks(audio_path, target_sr, block_seconds):
+                    f.write(chunk.tobytes())
+            os.replace(tmp_path, cache_path)
+            if os.path.getsize(cache_path) == 0:
+                return np.zeros(0, dtype=np.float32)
+            return np.memmap(cache_path, dtype=np.float32, mode="r")
+        chunks = list(self._decode_blocks(audio_path, target_sr, block_seconds))
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+    def _decode_blocks(self, audio_path, target_sr, block_seconds):
+        try:
+            info = sf.info(audio_path)
+        except RuntimeError:
+            info = None
+        if info is None:
+            # libsndfile 无法解码的格式（如旧版本 libsndfile 下的 mp3）退回 librosa，重采样同样使用 soxr
+            audio, _ = librosa.load(audio_path, sr=target_sr, mono=True, res_type="soxr_hq")
+            yield audio.astype(np.float32, copy=False)
+            return
+
+        resampler = None
+        if info.samplerate != target_sr:
+            resampler = soxr.ResampleStream(info.samplerate, target_sr, 1, dtype="float32", quality="HQ")
+        blocksize = int(info.samplerate * block_seconds)
+        for block in sf.blocks(audio_path, blocksize=blocksize, dtype="float32", always_2d=True):
+            # 多声道取平均转为单声道
+            mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono, last=False)
+            if len(mono):
+                yield np.ascontiguousarray(mono, dtype=np.float32)
+        if resampler is not None:
+            tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            if len(tail):
+                yield tail.astype(np.float32, copy=False)
+
     # 音频预处理
-    def preprocess_audio(self, audio_path):
-        # 加载音频
-        audio, sr = librosa.load(audio_path)
+    def preprocess_audio(self, audio_path, cache_dir=None):
+        # 加载音频，直接解码为 16kHz
+        audio = self.load_audio_16k(audio_path, cache_dir=cache_dir)
+        sr = 16000
         # 降噪
         # audio = self.denoise_audio(audio, sr)
         # 去除静音
         # audio = self.remove_silence(audio, sr)
         # 音频增强
         # audio = self.enhance_audio(audio, sr)
-        # 重采样
-        audio = self.resample_audio(audio, sr)
 
         return audio
 
     # 语音识别
     def transcribe_speech(self, audio_input):
         inputs = self.processor(audio_input, sampling_rate=16000, return_tensors="pt").input_features
-        # 将模型和输入数据移动到 GPU（如果可用）
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.trans_model.to(device)
-        inputs = inputs.to(device)
-
-        # 生成转录结果
-        with torch.no_grad():
-            forced_decoder_ids = self.processor.get_decoder_prompt_ids(language="zh", task="transcribe")
-            predicted_ids = self.trans_model.generate(inputs, forced_decoder_ids=forced_decoder_ids)
-
-        # 解码输出
-        transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
+        # 生成转录结果并解码输出
+        transcription = self._generate(inputs)
         print("语音识别结果: ", transcription[0])
         return transcription[0]
 
+    # 长音频转录：Whisper 单次只能处理 30 秒，将音频切成多个片段后批量识别再拼接
+    def transcribe_long(self, audio_input, sr=16000, mode="vad", window_seconds=30, overlap_seconds=2, batch_size=8):
+        """
+        :param audio_input: 16kHz 单声道音频
+        :param mode: "window" 按固定窗口重叠切分；"vad" 按能量检测的语音段切分，过长的语音段再按窗口切分，
+                     相邻的短语音段合并到不超过 window_seconds，片段数随音频时长而不是停顿次数增长
+        :param window_seconds: 每个片段的最大时长，不能超过 Whisper 的 30 秒输入
+        :param overlap_seconds: window 模式下相邻片段的重叠时长，避免在词中间切断
+        :param batch_size: 每次送入 generate 的片段数
+        :return: {"text": 全文, "segments": [{"start", "end", "text"}], "rtf": 实时率}
+        """
+        start_time = time.perf_counter()
+        if mode == "vad":
+            segments = []
+            for seg_start, seg_end in self.speech_segments(audio_input, sr):
+                # 语音段之间没有重叠，过长时才按窗口切分
+                for start, end in self.split_windows(audio_input[seg_start:seg_end], sr, window_seconds, 0):
+                    segments.append((seg_start + start, seg_start + end))
+            # 每个片段都会补零到 30 秒再送入 Whisper，短片段合并后才能减少推理次数
+            segments = self.merge_segments(segments, int(window_seconds * sr))
+        else:
+            segments = self.split_windows(audio_input, sr, window_seconds, overlap_seconds)
+
+        texts = []
+        for i in range(0, len(segments), batch_size):
+            chunks = [audio_input[start:end] for start, end in segments[i:i + batch_size]]
+            texts.extend(self.transcribe_batch(chunks, sr))
+
+        results = []
+        previous = ""
+        for (start, end), text in zip(segments, texts):
+            text = text.strip()
+            if mode != "vad":
+                # 去掉与上一段重叠部分重复识别出的文字
+                text = text[self._overlap_length(previous, text):]
+            results.append({"start": round(start / sr, 2), "end": round(end / sr, 2), "text": text})
+            if text:
+                previous = text
+        # 片段之间用空格分隔，避免相邻片段的词粘连
+        full_text = " ".join(result["text"] for result in results if result["text"])
+
+        duration = len(audio_input) / sr
+        rtf = (time.perf_counter() - start_time) / duration if duration > 0 else 0.0
+        print(f"长音频转录完成：时长 {duration:.1f} 秒，{len(segments)} 个片段，实时率 RTF={rtf:.3f}")
+        return {"text": full_text, "segments": results, "rtf": rtf}
+
+    # 批量识别多个不超过 30 秒的片段
+    def transcribe_batch(self, chunks, sr=16000):
+        if not chunks:
+            return []
+        inputs = self.processor(chunks, sampling_rate=sr, return_tensors="pt").input_features
+        return self._generate(inputs)
+
+    # 按固定窗口切分，返回 [(起始采样点, 结束采样点), ...]
+    def split_windows(self, audio, sr, window_seconds=30, overlap_seconds=2):
+        window = int(window_seconds * sr)
+        step = window - int(overlap_seconds * sr)
+        if len(audio) <= window:
+            return [(0, len(audio))] if len(audio) > 0 else []
+        windows = []
+        for start in range(0, len(audio), step):
+            end = min(start + window, len(audio))
+            windows.append((start, end))
+            if end == len(audio):
+                break
+        return windows
+
+    # 按顺序贪心合并相邻片段，合并后的片段（含中间的静音）不超过 max_samples
+    def merge_segments(self, segments, max_samples):
+        merged = []
+        for start, end in segments:
+            if merged and end - merged[-1][0] <= max_samples:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    # 基于 remove_silence 的能量阈值检测语音段，间隔短于 min_silence 秒的相邻语音段会被合并
+    def speech_segments(self, audio, sr, threshold=0.01, min_silence=0.5, hop_length=512):
+        energy = librosa.feature.rms(y=audio, hop_length=hop_length)[0]
+        voiced = np.where(energy > threshold)[0]
+        if len(voiced) == 0:
+            return []
+        max_gap = int(min_silence * sr / hop_length)
+        segments = []
+        seg_start = voiced[0]
+        prev = voiced[0]
+        for frame in voiced[1:]:
+            if frame - prev > max_gap:
+                segments.append((seg_start * hop_length, min((prev + 1) * hop_length, len(audio))))
+                seg_start = frame
+            prev = frame
+        segments.append((seg_start * hop_length, min((prev + 1) * hop_length, len(audio))))
+        return segments
+
+    # 上一段结尾与当前段开头重复的字符数
+    def _overlap_length(self, previous, current, max_chars=30):
+        for length in range(min(len(previous), len(current), max_chars), 0, -1):
+            if previous.endswith(current[:length]):
+                return length
+        return 0
+
     # 提取声学特征
     def analyze_acoustic_features(self, audio, sr):
-        # 提取 MFCC 特征
-        mfccs = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=13)
-        # 提取频谱中心频率
-        spectral_centroids = librosa.feature.spectral_centroid(y=audio, sr=sr)
-        # 提取频谱带宽
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=audio, sr=sr)
-        # 提取频谱平坦度
-        spectral_flatness = librosa.feature.spectral_flatness(y=audio)
+        # 只计算一次 STFT，MFCC、频谱中心频率、频谱带宽、频谱平坦度都从同一个幅度谱得到
+        return self.analyze_acoustic_features_batch([audio], sr)[0]
+
+    # 批量提取声学特征
+    def analyze_acoustic_features_batch(self, signals, sr, n_mfcc=13, n_fft=2048, hop_length=512, n_mels=128):
+        """
+        多段音频补零到相同长度后一次性计算 STFT，再按各自的帧数截取，
+        结果与 librosa.feature.mfcc / spectral_centroid / spectral_bandwidth / spectral_flatness 的默认参数一致
+        （STFT 居中补零，超出原长度的补零不影响原有帧）
+        :param signals: 音频数组列表
+        :param sr: 采样率
+        :return: [(mfccs, spectral_centroids, spectral_bandwidth, spectral_flatness), ...]
+        """
+        if not signals:
+            return []
+        lengths = [len(signal) for signal in signals]
+        batch = np.zeros((len(signals), max(lengths)), dtype=np.float32)
+        for i, signal in enumerate(signals):
+            batch[i, :len(signal)] = signal
+
+        # 幅度谱，形状 (批大小, 频点数, 帧数)
+        magnitude = np.abs(librosa.stft(batch, n_fft=n_fft, hop_length=hop_length))
+        power = magnitude ** 2
+        freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)[:, None]
+        mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+
+        results = []
+        for i, length in enumerate(lengths):
+            n_frames = 1 + length // hop_length
+            S = magnitude[i, :, :n_frames]
+            P = power[i, :, :n_frames]
+
+            # MFCC：梅尔功率谱 -> dB -> DCT
+            mel_db = librosa.power_to_db(mel_basis @ P)
+            mfccs = scipy.fft.dct(mel_db, axis=0, type=2, norm="ortho")[:n_mfcc]
+
+            # 频谱中心频率与带宽：按帧归一化的幅度谱作为权重
+            weights = S / np.maximum(S.sum(axis=0, keepdims=True), np.finfo(S.dtype).tiny)
+            centroid = np.sum(freqs * weights, axis=0, keepdims=True)
+            bandwidth = np.sqrt(np.sum(weights * (freqs - centroid) ** 2, axis=0, keepdims=True))
 
-        return mfccs, spectral_centroids, spectral_bandwidth, spectral_flatness
+            # 频谱平坦度：功率谱的几何平均 / 算术平均
+            P_thresh = np.maximum(P, 1e-10)
+            flatness = np.exp(np.mean(np.log(P_thresh), axis=0, keepdims=True)) / np.mean(P_thresh, axis=0, keepdims=True)
 
+            results.append((mfccs, centroid, bandwidth, flatness))
+        return results
 
 if __name__ == "__main__":
     
@@ -0,0 +1,458 @@
+import argparse
+import time
+
+
+def benchmark_layout_detection(pdf_path, batch_sizes=(1, 4, 8), max_pages=32):
+    """
+    对比逐页检测与批量检测的吞吐量（页/秒）
+    :param pdf_path: 测试用 PDF 文件路径
+    :param batch_sizes: 需要测试的批大小
+    :param max_pages: 最多使用的页数
+    :return: {批大小: 页/秒}
+    """
+    from PDFProcess import PDFProcessor
+
+    processor = PDFProcessor()
+    images = [image for page_no, image in processor.iter_pages(pdf_path) if page_no < max_pages]
+    # 预热，排除首次推理的初始化开销
+    processor.layout_detection(images[:1])
+
+    report = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        processor.layout_detection(images, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        report[batch_size] = len(images) / elapsed
+        print(f"batch_size={batch_size:<3d} 页数={len(images)} 耗时={elapsed:.2f}s 吞吐量={report[batch_size]:.2f} 页/秒")
+    return report
+
+
+def benchmark_image_batch(image_paths, batch_sizes=(1, 8, 32), total_images=64):
+    """
+    对比不同批大小下检测 + 分类的吞吐量（图像/秒），测试图像不足时循环使用
+    :param image_paths: 测试图像路径列表
+    :param batch_sizes: 需要测试的批大小
+    :param total_images: 每个批大小处理的图像总数
+    :return: {批大小: 图像/秒}
+    """
+    from PIL import Image
+    from ImageProcess import ImageProcessor
+
+    processor = ImageProcessor()
+    base_images = [Image.open(path).convert("RGB") for path in image_paths]
+    images = [base_images[i % len(base_images)] for i in range(total_images)]
+    # 预热
+    processor.detect_batch(images[:1])
+    processor.classify_batch(images[:1])
+
+    report = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        for offset in range(0, len(images), batch_size):
+            batch = images[offset:offset + batch_size]
+            processor.detect_batch(batch)
+            processor.classify_batch(batch)
+        elapsed = time.perf_counter() - start
+        report[batch_size] = len(images) / elapsed
+        print(f"batch_size={batch_size:<3d} 图像数={len(images)} 耗时={elapsed:.2f}s 吞吐量={report[batch_size]:.2f} 图像/秒")
+    return report
+
+
+def benchmark_image_decode(image_paths, repeat=5):
+    """
+    对比旧的解码方式（全分辨率解码，检测和分类各自转换）与 decode_image 单次缩小解码的耗时和内存
+    内存为 tracemalloc 统计的 Python/numpy 分配峰值加上解码后像素缓冲区大小
+    :param image_paths: 测试图像路径列表，建议使用大尺寸 JPEG 照片
+    :param repeat: 每张图像重复次数
+    """
+    import tracemalloc
+    import numpy as np
+    from PIL import Image
+    from torchvision import transforms
+    from ImageProcess import ImageProcessor, decode_image, IMAGENET_MEAN, IMAGENET_STD
+
+    # 只测预处理，不需要加载模型
+    processor = ImageProcessor.__new__(ImageProcessor)
+    preprocess = transforms.Compose([
+        transforms.Resize(224),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+    ])
+
+    def old_path(path):
+        image = Image.open(path)
+        detect_input = np.array(image)
+        preprocess(image.convert('RGB'))
+        return detect_input.nbytes
+
+    def new_path(path):
+        prepared = processor.prepare_image(path)
+        return prepared["array"].nbytes
+
+    for name, func in (("旧：全分辨率解码两次", old_path), ("新：单次缩小解码", new_path)):
+        elapsed_total = 0.0
+        peak_total = 0
+        buffer_total = 0
+        for path in image_paths:
+            for _ in range(repeat):
+                tracemalloc.start()
+                start = time.perf_counter()
+                buffer_total += func(path)
+                elapsed_total += time.perf_counter() - start
+                peak_total = max(peak_total, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        count = len(image_paths) * repeat
+        print(f"{name}: 平均耗时={elapsed_total / count * 1000:.1f}ms "
+              f"内存峰值={peak_total / 1024 / 1024:.1f}MB 平均像素缓冲区={buffer_total / count / 1024 / 1024:.1f}MB")
+
+    for path in image_paths:
+        image, scale = decode_image(path)
+        print(f"{path}: 解码尺寸={image.size} 缩放比例={scale:.2f}")
+
+
+def _box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _detection_agreement(reference, candidate, iou_threshold=0.5):
+    """
+    参考结果中的检测框有多少能在候选结果里找到同类别且 IoU 超过阈值的框
+    :param reference: [(类别, [x1, y1, x2, y2]), ...]
+    :param candidate: 同上
+    :return: 匹配比例，参考结果为空时返回 1.0
+    """
+    if not reference:
+        return 1.0
+    unmatched = list(candidate)
+    matched = 0
+    for label, box in reference:
+        best = max(
+            (item for item in unmatched if item[0] == label),
+            key=lambda item: _box_iou(box, item[1]),
+            default=None
+        )
+        if best is not None and _box_iou(box, best[1]) >= iou_threshold:
+            unmatched.remove(best)
+            matched += 1
+    return matched / len(reference)
+
+
+def benchmark_backends(image_paths, pdf_path=None, onnx_cache_dir="model/onnx", calibration_images=None, max_pages=8):
+    """
+    比较 PyTorch、ONNX Runtime FP32、动态 INT8、静态 INT8 四种后端的延迟和相对 PyTorch 的精度漂移
+    图像：检测框匹配率 + 分类 top-1 一致率；PDF：布局检测框匹配率
+    :param image_paths: 测试图像路径列表
+    :param pdf_path: 测试用 PDF 文件路径，为空时跳过布局模型
+    :param onnx_cache_dir: ONNX 模型缓存目录
+    :param calibration_images: 静态量化的校准图像，默认使用测试图像
+    :param max_pages: PDF 最多使用的页数
+    """
+    from ImageProcess import ImageProcessor
+
+    configs = [("torch", None), ("onnx", None), ("onnx", "dynamic"), ("onnx", "static")]
+    calibration_images = calibration_images or image_paths
+
+    reference = None
+    for backend, quantization in configs:
+        name = f"{backend}-{quantization or 'fp32'}"
+        processor = ImageProcessor(backend=backend, quantization=quantization,
+                                   onnx_cache_dir=onnx_cache_dir, calibration_images=calibration_images)
+        prepared = [processor.prepare_image(path) for path in image_paths]
+        # 预热
+        processor.detect_batch(prepared[:1])
+        processor.classify_batch(prepared[:1])
+
+        start = time.perf_counter()
+        detections = [processor.detect_batch([item])[0] for item in prepared]
+        labels = [processor.classify_batch([item])[0] for item in prepared]
+        latency = (time.perf_counter() - start) / len(prepared) * 1000
+
+        outputs = {
+            "detections": [[(d["label"], d["bbox"]) for d in result] for result in detections],
+            "labels": labels
+        }
+        if reference is None:
+            reference = outputs
+        box_agreement = sum(
+            _detection_agreement(ref, cand) for ref, cand in zip(reference["detections"], outputs["detections"])
+        ) / len(prepared)
+        label_agreement = sum(a == b for a, b in zip(reference["labels"], outputs["labels"])) / len(prepared)
+        print(f"[图像] {name:<14s} 延迟={latency:.1f}ms/张 检测框匹配率={box_agreement:.3f} 分类一致率={label_agreement:.3f}")
+
+    if not pdf_path:
+        return
+
+    from PDFProcess import PDFProcessor
+
+    pages = None
+    reference = None
+    for backend, quantization in configs:
+        name = f"{backend}-{quantization or 'fp32'}"
+        processor = PDFProcessor(backend=backend, quantization=quantization,
+                                 onnx_cache_dir=onnx_cache_dir, calibration_images=calibration_images)
+        if pages is None:
+            pages = [image for page_no, image in processor.iter_pages(pdf_path) if page_no < max_pages]
+        processor.layout_detection(pages[:1])
+
+        start = time.perf_counter()
+        all_detections = processor.layout_detection(pages)
+        latency = (time.perf_counter() - start) / len(pages) * 1000
+
+        outputs = [
+            [(int(class_id), xyxy.tolist()) for class_id, xyxy in zip(info["detections"].class_id, info["detections"].xyxy)]
+            for info in all_detections
+        ]
+        if reference is None:
+            reference = outputs
+        agreement = sum(_detection_agreement(ref, cand) for ref, cand in zip(reference, outputs)) / len(pages)
+        print(f"[布局] {name:<14s} 延迟={latency:.1f}ms/页 检测框匹配率={agreement:.3f}")
+
+
+def benchmark_acoustic_features(audio_paths, clip_seconds=5.0, rtol=1e-3):
+    """
+    对比逐个调用 librosa.feature 与单次 STFT 批量特征的耗时，并检查结果是否在容差范围内一致
+    :param audio_paths: 测试音频路径列表，每个文件切成 clip_seconds 秒的片段
+    :param clip_seconds: 片段时长
+    :param rtol: 相对容差
+    """
+    import librosa
+    import numpy as np
+    from AudioProcess import AudioProcessor
+
+    sr = 16000
+    # 特征提取不需要 Whisper 模型
+    processor = AudioProcessor.__new__(AudioProcessor)
+    clips = []
+    for path in audio_paths:
+        audio, _ = librosa.load(path, sr=sr)
+        step = int(clip_seconds * sr)
+        clips.extend(audio[i:i + step] for i in range(0, len(audio), step) if len(audio[i:i + step]) > 0)
+
+    start = time.perf_counter()
+    reference = [(
+        librosa.feature.mfcc(y=clip, sr=sr, n_mfcc=13),
+        librosa.feature.spectral_centroid(y=clip, sr=sr),
+        librosa.feature.spectral_bandwidth(y=clip, sr=sr),
+        librosa.feature.spectral_flatness(y=clip)
+    ) for clip in clips]
+    librosa_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = processor.analyze_acoustic_features_batch(clips, sr)
+    batched_elapsed = time.perf_counter() - start
+
+    names = ["mfccs", "spectral_centroids", "spectral_bandwidth", "spectral_flatness"]
+    max_errors = {name: 0.0 for name in names}
+    for ref_features, new_features in zip(reference, batched):
+        for name, ref, new in zip(names, ref_features, new_features):
+            scale = np.maximum(np.abs(ref).max(), 1e-8)
+            max_errors[name] = max(max_errors[name], float(np.abs(ref - new).max() / scale))
+
+    print(f"片段数={len(clips)} librosa 逐个计算={librosa_elapsed:.2f}s 单次 STFT 批量={batched_elapsed:.2f}s "
+          f"加速比={librosa_elapsed / batched_elapsed:.1f}x")
+    for name, error in max_errors.items():
+        print(f"{name:<20s} 最大相对误差={error:.2e} {'通过' if error <= rtol else '超出容差'}")
+
+
+def _edit_distance(reference, hypothesis):
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_token in enumerate(reference, start=1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_token in enumerate(hypothesis, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_token != hyp_token))
+        previous = current
+    return previous[-1]
+
+
+def _error_rate(references, hypotheses, tokenize):
+    errors = sum(_edit_distance(tokenize(ref), tokenize(hyp)) for ref, hyp in zip(references, hypotheses))
+    total = sum(len(tokenize(ref)) for ref in references)
+    return errors / total if total else 0.0
+
+
+WHISPER_BENCHMARK_PROFILES = {
+    "fp32-greedy": {"DEVICE": "cpu"},
+    "int8-greedy": {"DEVICE": "cpu", "QUANTIZATION": "dynamic"},
+    "int8-beam4": {"DEVICE": "cpu", "QUANTIZATION": "dynamic", "NUM_BEAMS": 4},
+}
+
+
+def benchmark_whisper_profiles(audio_paths, profiles=None, intra_op_threads=None, inter_op_threads=None):
+    """
+    对比不同 Whisper 推理配置的实时率（RTF）以及相对 FP32 贪心解码的 WER/CER 漂移。
+    音频旁存在同名 .txt 参考文本时同时报告相对参考文本的 WER/CER。
+    :param audio_paths: 测试音频路径列表
+    :param profiles: WHISPER_BENCHMARK_PROFILES 中的配置名，第一个作为漂移的基准
+    :param intra_op_threads: 算子内线程数，线程数是进程级设置，所有配置共用
+    :param inter_op_threads: 算子间线程数
+    :return: {配置名: {'rtf', 'wer_drift', 'cer_drift', 'wer', 'cer'}}
+    """
+    import os
+    import gc
+    from AudioProcess import AudioProcessor
+
+    profiles = profiles or list(WHISPER_BENCHMARK_PROFILES)
+    references = []
+    for path in audio_paths:
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                references.append(f.read().strip())
+        else:
+            references.append(None)
+    has_references = all(ref is not None for ref in references)
+
+    words = str.split
+    chars = lambda text: [c for c in text if not c.isspace()]
+    audios = None
+    baseline = None
+    report = {}
+    for name in profiles:
+        profile = dict(WHISPER_BENCHMARK_PROFILES[name], INTRA_OP_THREADS=intra_op_threads, INTER_OP_THREADS=inter_op_threads)
+        processor = AudioProcessor(profile=profile)
+        if audios is None:
+            audios = [processor.preprocess_audio(path) for path in audio_paths]
+        duration = sum(len(audio) for audio in audios) / 16000
+        # 预热
+        processor.transcribe_batch([audios[0][:16000]])
+
+        start = time.perf_counter()
+        texts = []
+        for audio in audios:
+            if len(audio) > 30 * 16000:
+                texts.append(processor.transcribe_long(audio)["text"])
+            else:
+                texts.append(processor.transcribe_batch([audio])[0])
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or texts
+        report[name] = {
+            "rtf": elapsed / duration if duration else 0.0,
+            "wer_drift": _error_rate(baseline, texts, words),
+            "cer_drift": _error_rate(baseline, texts, chars)
+        }
+        if has_references:
+            report[name]["wer"] = _error_rate(references, texts, words)
+            report[name]["cer"] = _error_rate(references, texts, chars)
+        line = (f"{name:<12s} RTF={report[name]['rtf']:.3f} "
+                f"WER漂移={report[name]['wer_drift']:.2%} CER漂移={report[name]['cer_drift']:.2%}")
+        if has_references:
+            line += f" WER={report[name]['wer']:.2%} CER={report[name]['cer']:.2%}"
+        print(line)
+        del processor
+        gc.collect()
+    return report
+
+
+def benchmark_frame_sampling(video_paths, strategies=None, sample_interval=4, seek_seconds=1.0, scene_threshold=30.0):
+    """
+    对比不同抽帧策略的解码吞吐量（帧/秒）和预处理总耗时，只做抽帧，不做行为识别
+    :param video_paths: 测试视频路径列表，建议使用较长的视频
+    :param strategies: 要测试的策略，默认全部
+    :return: {策略: {'elapsed', 'source_fps', 'decoded_fps', 'grabbed', 'retrieved', 'seeks', 'sampled'}}
+    """
+    import shutil
+    import tempfile
+    import cv2
+    from VideoProcess import VideoProcessor, SAMPLING_STRATEGIES
+
+    processor = VideoProcessor()
+    total_frames = 0
+    for path in video_paths:
+        cap = cv2.VideoCapture(path)
+        total_frames += int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+    report = {}
+    for strategy in strategies or SAMPLING_STRATEGIES:
+        totals = {'grabbed': 0, 'retrieved': 0, 'seeks': 0, 'sampled': 0}
+        output_folder = tempfile.mkdtemp(prefix=f"frames_{strategy}_")
+        start = time.perf_counter()
+        try:
+            for path in video_paths:
+                stats = {}
+                sampled, _ = processor.process_video(
+                    path, output_folder, strategy=strategy, sample_interval=sample_interval,
+                    seek_seconds=seek_seconds, scene_threshold=scene_threshold,
+                    recognize_action=False, stats=stats
+                )
+                totals['sampled'] += sampled
+                for key in ('grabbed', 'retrieved', 'seeks'):
+                    totals[key] += stats[key]
+        finally:
+            elapsed = time.perf_counter() - start
+            shutil.rmtree(output_folder, ignore_errors=True)
+        report[strategy] = dict(
+            totals, elapsed=elapsed,
+            # 源视频帧数 / 耗时：相当于每秒处理了多少帧视频
+            source_fps=total_frames / elapsed if elapsed else 0.0,
+            # 实际解码的帧数 / 耗时
+            decoded_fps=totals['grabbed'] / elapsed if elapsed else 0.0
+        )
+        print(f"{strategy:<9s} 耗时={elapsed:.2f}s 源视频帧/秒={report[strategy]['source_fps']:.1f} "
+              f"解码帧/秒={report[strategy]['decoded_fps']:.1f} 解码={totals['grabbed']} "
+              f"转换={totals['retrieved']} 跳转={totals['seeks']} 提取={totals['sampled']}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="算法模块性能测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    layout_parser = subparsers.add_parser("layout", help="PDF 布局检测：逐页 vs 批量")
+    layout_parser.add_argument("pdf_path")
+    layout_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    layout_parser.add_argument("--max-pages", type=int, default=32)
+
+    image_parser = subparsers.add_parser("image", help="图像检测 + 分类：不同批大小的吞吐量")
+    image_parser.add_argument("image_paths", nargs="+")
+    image_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    image_parser.add_argument("--total-images", type=int, default=64)
+
+    decode_parser = subparsers.add_parser("decode", help="图像解码：全分辨率 vs 单次缩小解码")
+    decode_parser.add_argument("image_paths", nargs="+")
+    decode_parser.add_argument("--repeat", type=int, default=5)
+
+    backend_parser = subparsers.add_parser("backend", help="推理后端：PyTorch vs ONNX Runtime（FP32 / INT8）")
+    backend_parser.add_argument("image_paths", nargs="+")
+    backend_parser.add_argument("--pdf-path")
+    backend_parser.add_argument("--onnx-cache-dir", default="model/onnx")
+    backend_parser.add_argument("--calibration-images", nargs="*")
+
+    features_parser = subparsers.add_parser("features", help="声学特征：librosa 逐个计算 vs 单次 STFT 批量")
+    features_parser.add_argument("audio_paths", nargs="+")
+    features_parser.add_argument("--clip-seconds", type=float, default=5.0)
+
+    whisper_parser = subparsers.add_parser("whisper", help="Whisper 推理配置：FP32 / 动态 INT8 / 束搜索的 RTF 与 WER/CER 漂移")
+    whisper_parser.add_argument("audio_paths", nargs="+")
+    whisper_parser.add_argument("--profiles", nargs="+", choices=list(WHISPER_BENCHMARK_PROFILES))
+    whisper_parser.add_argument("--intra-op-threads", type=int)
+    whisper_parser.add_argument("--inter-op-threads", type=int)
+
+    video_parser = subparsers.add_parser("video", help="视频抽帧策略：固定间隔 / 按时间定位 / 关键帧 / 场景变化")
+    video_parser.add_argument("video_paths", nargs="+")
+    video_parser.add_argument("--strategies", nargs="+", choices=["interval", "seek", "keyframe", "scene"])
+    video_parser.add_argument("--sample-interval", type=int, default=4)
+    video_parser.add_argument("--seek-seconds", type=float, default=1.0)
+    video_parser.add_argument("--scene-threshold", type=float, default=30.0)
+
+    args = parser.parse_args()
+    if args.command == "layout":
+        benchmark_layout_detection(args.pdf_path, args.batch_sizes, args.max_pages)
+    elif args.command == "image":
+        benchmark_image_batch(args.image_paths, args.batch_sizes, args.total_images)
+    elif args.command == "decode":
+        benchmark_image_decode(args.image_paths, args.repeat)
+    elif args.command == "backend":
+        benchmark_backends(args.image_paths, args.pdf_path, args.onnx_cache_dir, args.calibration_images)
+    elif args.command == "features":
+        benchmark_acoustic_features(args.audio_paths, args.clip_seconds)
+    elif args.command == "whisper":
+        benchmark_whisper_profiles(args.audio_paths, args.profiles, args.intra_op_threads, args.inter_op_threads)
+    elif args.command == "video":
+        benchmark_frame_sampling(args.video_paths, args.strategies, args.sample_interval,
+                                 args.seek_seconds, args.scene_threshold)
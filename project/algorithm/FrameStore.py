@@ -0,0 +1,160 @@
+import bisect
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+DATA_FILE = 'frames.u8'
+INDEX_FILE = 'frames.json'
+
+
+class FrameStoreWriter:
+    """
+    把抽取的帧按顺序追加写入同一个 uint8 原始数组文件，结束时写入索引（帧形状、源视频帧号、帧率）。
+    所有帧尺寸相同（预处理后为 224x224x3），第 N 帧位于文件偏移 N * 每帧字节数 处。
+    数据和索引先写入同级的临时目录，完成后整个目录替换到 folder，读者不会看到新旧文件混在一起。
+    """
+
+    def __init__(self, folder, fps=None):
+        self.folder = os.path.normpath(folder)
+        self.fps = fps
+        self.frame_shape = None
+        self.frame_indices = []
+        self._tmp_folder = f'{self.folder}.tmp-{uuid.uuid4().hex}'
+        os.makedirs(self._tmp_folder)
+        self._file = open(os.path.join(self._tmp_folder, DATA_FILE), 'wb')
+
+    def append(self, frame, frame_index):
+        """
+        :param frame: uint8 图像数组
+        :param frame_index: 该帧在源视频中的帧号
+        """
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if self.frame_shape is None:
+            self.frame_shape = frame.shape
+        elif frame.shape != self.frame_shape:
+            raise ValueError(f'帧尺寸不一致: {frame.shape} != {self.frame_shape}')
+        self._file.write(frame.data)
+        self.frame_indices.append(int(frame_index))
+
+    def close(self):
+        self._file.close()
+        index = {
+            'count': len(self.frame_indices),
+            'frame_shape': list(self.frame_shape or ()),
+            'dtype': 'uint8',
+            'fps': self.fps,
+            'frame_indices': self.frame_indices
+        }
+        with open(os.path.join(self._tmp_folder, INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        self._replace_folder()
+
+    def _replace_folder(self):
+        """
+        目录不能原子覆盖：先把旧目录改名移开，再把临时目录改名为目标目录
+        """
+        old_folder = None
+        if os.path.exists(self.folder):
+            old_folder = f'{self.folder}.old-{uuid.uuid4().hex}'
+            try:
+                os.rename(self.folder, old_folder)
+            except OSError:
+                # 旧目录正在被读取（Windows 下无法改名），同一键下的帧内容相同，保留旧目录
+                shutil.rmtree(self._tmp_folder, ignore_errors=True)
+                return
+        try:
+            os.rename(self._tmp_folder, self.folder)
+        except OSError:
+            # 并发处理同一视频时另一个写入者已经完成替换
+            shutil.rmtree(self._tmp_folder, ignore_errors=True)
+        if old_folder is not None:
+            if os.path.exists(self.folder):
+                shutil.rmtree(old_folder, ignore_errors=True)
+            else:
+                os.rename(old_folder, self.folder)
+
+    def abort(self):
+        self._file.close()
+        shutil.rmtree(self._tmp_folder, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+class FrameStore:
+    """
+    以内存映射方式读取 FrameStoreWriter 写入的帧，按下标或区间取帧时返回的是映射数组的视图，不复制数据
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        try:
+            self._open()
+        except (OSError, ValueError):
+            # 读取索引和映射数据之间目录刚好被替换，重新打开一次
+            self._open()
+
+    def _open(self):
+        with open(os.path.join(self.folder, INDEX_FILE), encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.frame_indices = self.index['frame_indices']
+        self._frames = None
+        # 打开时立即映射数据文件，与索引来自同一次替换后的目录
+        self.frames
+
+    @staticmethod
+    def exists(folder):
+        return bool(folder) and os.path.exists(os.path.join(folder, INDEX_FILE))
+
+    def __len__(self):
+        return self.index['count']
+
+    @property
+    def frames(self):
+        """
+        形状为 (帧数, 高, 宽, 通道) 的只读内存映射数组，帧为 OpenCV 的 BGR 顺序
+        """
+        if self._frames is None:
+            shape = (self.index['count'],) + tuple(self.index['frame_shape'])
+            if self.index['count'] == 0:
+                self._frames = np.zeros(shape, dtype=np.uint8)
+            else:
+                self._frames = np.memmap(os.path.join(self.folder, DATA_FILE), dtype=np.uint8, mode='r', shape=shape)
+        return self._frames
+
+    def get(self, n):
+        return self.frames[n]
+
+    def range(self, start, stop):
+        return self.frames[start:stop]
+
+    def timestamp(self, n):
+        fps = self.index.get('fps')
+        return self.frame_indices[n] / fps if fps else None
+
+    def find(self, frame_index):
+        """
+        :return: 源视频帧号不大于 frame_index 的最后一张提取帧的下标
+        """
+        return max(bisect.bisect_right(self.frame_indices, frame_index) - 1, 0)
+
+    def encode(self, n, ext='.jpg', quality=90):
+        """
+        把第 n 帧编码为图片字节
+        """
+        import cv2
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in ('.jpg', '.jpeg') else []
+        ok, buffer = cv2.imencode(ext, self.get(n), params)
+        if not ok:
+            raise ValueError(f'第 {n} 帧编码失败')
+        return buffer.tobytes()
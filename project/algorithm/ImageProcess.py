@@ -1,55 +1,158 @@
 from ultralytics import YOLO
 import supervision as sv
-from PIL import Image
+from PIL import Image, ImageOps
 import numpy as np
 import torch
 from torchvision import models, transforms
-import json
+from torchvision.transforms import functional as TF
+try:
+    from .OnnxBackend import export_yolo, export_classifier
+except ImportError:
+    # 作为脚本直接运行时没有包上下文
+    from OnnxBackend import export_yolo, export_classifier
+
+# YOLOv8 推理时长边缩放到 640，ResNet50 的 Resize(224) 把短边缩放到 224
+DETECT_IMAGE_SIZE = 640
+CLASSIFY_IMAGE_SIZE = 224
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+
+def decode_image(image_path, detect_size=DETECT_IMAGE_SIZE, classify_size=CLASSIFY_IMAGE_SIZE):
+    """
+    一次解码得到两个模型都够用的最小图像
+    JPEG 通过 draft 在 DCT 阶段直接按 1/2、1/4、1/8 缩小解码，其余格式用 reduce 整数倍缩小，
+    并按 EXIF 方向信息旋转
+    :param image_path: 图像路径
+    :return: (RGB PIL 图像, 原图与解码图的缩放比例)
+    """
+    image = Image.open(image_path)
+    width, height = image.size
+    # EXIF 方向为 5~8 时图像需要旋转 90 度，宽高互换
+    if image.getexif().get(0x0112) in (5, 6, 7, 8):
+        width, height = height, width
+    long_side, short_side = max(width, height), min(width, height)
+    # 长边满足检测需要，短边满足分类需要，取两者中较大的要求
+    target_long = max(detect_size, int(np.ceil(classify_size * long_side / short_side)))
+
+    if long_side > target_long:
+        ratio = target_long / long_side
+        # draft 只会缩小到不小于请求尺寸的最接近比例
+        image.draft('RGB', (int(image.size[0] * ratio), int(image.size[1] * ratio)))
+        factor = max(image.size) // target_long
+        if factor > 1:
+            image = image.reduce(factor)
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    return image, long_side / max(image.size)
 
 class ImageProcessor:
-    def __init__(self):
-        self.detect_model = YOLO(r'F:\a\apaper\project\project\algorithm\model\yolov8m.pt')
+    def __init__(self, backend='torch', quantization=None, onnx_cache_dir=None, calibration_images=None):
+        """
+        :param backend: 推理后端，'torch' 或 'onnx'
+        :param quantization: ONNX 后端的 INT8 量化方式，None / 'dynamic' / 'static'
+        :param onnx_cache_dir: 导出的 ONNX 模型缓存目录
+        :param calibration_images: 静态量化使用的校准图像路径列表
+        """
+        detect_model_path = r'F:\a\apaper\project\project\algorithm\model\yolov8m.pt'
         self.classify_model = models.resnet50(pretrained=True)
         self.classify_model.eval()  # 设置为评估模式
-
-    def preprocess_image(self, image):
-        preprocess = transforms.Compose([
+        if backend == 'onnx':
+            self.detect_model = export_yolo(YOLO, detect_model_path, onnx_cache_dir, DETECT_IMAGE_SIZE,
+                                            quantization, calibration_images)
+            self.classify_model = export_classifier(self.classify_model, 'resnet50', onnx_cache_dir,
+                                                    quantization, calibration_images, IMAGENET_MEAN, IMAGENET_STD)
+        else:
+            self.detect_model = YOLO(detect_model_path)
+        self.preprocess = transforms.Compose([
             transforms.Resize(224),
             transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+            transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
         ])
-        image_tensor = preprocess(image)
-        image_tensor = image_tensor.unsqueeze(0)  # 添加一个维度以匹配模型输入要求
-
-        # 反归一化
-        unnormalize = transforms.Normalize(
-            mean=[-0.485 / 0.229, -0.456 / 0.224, -0.406 / 0.225],
-            std=[1 / 0.229, 1 / 0.224, 1 / 0.225]
-        )
-        unnormalized_tensor = unnormalize(image_tensor.squeeze(0))
-        # 将张量转换为 PIL 图像
-        to_pil = transforms.ToPILImage()
-        pil_image = to_pil(unnormalized_tensor)
-        # 保存为 PNG 格式
-        pil_image.save('preprocessed_image.png')
-
-        return image_tensor
-
-    def classify_image(self, image):
-        image_tensor = self.preprocess_image(image)
-        with torch.no_grad():
-            output = self.classify_model(image_tensor)
-        _, predicted = torch.max(output, 1)
         # 加载 ImageNet 标签
         with open(r'F:\a\apaper\project\project\algorithm\label\imagenet_classes.txt') as f:
-            imagenet_labels = [line.strip() for line in f.readlines()]
-        return imagenet_labels[predicted.item()]
+            self.imagenet_labels = [line.strip() for line in f.readlines()]
+
+    @staticmethod
+    def prepare_image(image_path):
+        """
+        解码一次，检测和分类的输入共用同一块像素缓冲区
+        不使用模型，批处理时在推理锁之外调用
+        :param image_path: 图像路径
+        :return: {"array": HWC uint8 数组, "tensor": 分类输入张量, "scale": 检测框换算回原图的比例}
+        """
+        image, scale = decode_image(image_path)
+        array = np.array(image)
+        # 与 array 共享内存，只有缩放到 224 之后才产生新的张量
+        tensor = torch.from_numpy(array).permute(2, 0, 1)
+        tensor = TF.resize(tensor, CLASSIFY_IMAGE_SIZE, antialias=True)
+        tensor = TF.normalize(tensor.float().div_(255), mean=IMAGENET_MEAN, std=IMAGENET_STD)
+        return {"array": array, "tensor": tensor, "scale": scale}
 
-    def object_detection(self, image):
-        image = np.array(image)
+    def analyze_image(self, image_path, artifact_store=None):
+        """
+        单张图像的检测 + 分类
+        :return: (检测结果, 类别标签)
+        """
+        prepared = self.prepare_image(image_path)
+        detection_results = self.detect_batch([prepared])[0]
+        predicted_label = self.classify_batch([prepared])[0]
+        self.save_artifacts(prepared, detection_results, artifact_store)
+        return detection_results, predicted_label
 
-        # 进行推理
-        results = self.detect_model(source=image, conf=0.25, verbose=False)[0]
+    @staticmethod
+    def save_artifacts(prepared, detection_results, artifact_store=None):
+        """
+        保存单张图像的调试产物：解码后的图像和检测结果，未开启时不做任何事
+        :param prepared: prepare_image 的返回值
+        """
+        if artifact_store is None:
+            return
+        artifact_store.save_image('preprocessed_image.png', lambda: Image.fromarray(prepared["array"]))
+        artifact_store.save_json('detection_results.json', detection_results)
+
+    def classify_batch(self, images):
+        """
+        批量分类，尺寸相同的图像合并为一次 ResNet50 前向计算
+        Resize(224) 保持长宽比，不同比例的图像得到的张量尺寸不同，需要按尺寸分组
+        :param images: PIL 图像或 prepare_image 返回值的列表
+        :return: 与输入顺序一致的类别标签列表
+        """
+        tensors = [
+            image["tensor"] if isinstance(image, dict) else self.preprocess(image.convert('RGB'))
+            for image in images
+        ]
+        groups = {}
+        for index, tensor in enumerate(tensors):
+            groups.setdefault(tuple(tensor.shape), []).append(index)
+
+        labels = [None] * len(images)
+        with torch.no_grad():
+            for indices in groups.values():
+                output = self.classify_model(torch.stack([tensors[index] for index in indices]))
+                predicted = output.argmax(dim=1).tolist()
+                for index, class_index in zip(indices, predicted):
+                    labels[index] = self.imagenet_labels[class_index]
+        return labels
+
+    def detect_batch(self, images):
+        """
+        批量目标检测，N 张图像合并为一次 YOLOv8m 推理
+        :param images: PIL 图像或 prepare_image 返回值的列表
+        :return: 与输入顺序一致的检测结果列表，检测框坐标均为原图坐标
+        """
+        sources = [image["array"] if isinstance(image, dict) else np.array(image.convert('RGB')) for image in images]
+        scales = [image["scale"] if isinstance(image, dict) else 1.0 for image in images]
+        if not sources:
+            return []
+        # 传入图像列表时模型会将整批图像作为一个 batch 处理
+        results = self.detect_model(source=sources if len(sources) > 1 else sources[0], conf=0.25, verbose=False)
+        return [self.to_detection_results(result, scale) for result, scale in zip(results, scales)]
+
+    def to_detection_results(self, results, scale=1.0):
+        """
+        将 YOLO 的推理结果转换为 [{"label", "confidence", "bbox"}, ...]
+        :param scale: 检测框坐标乘以该比例换算回原图坐标
+        """
         detections = sv.Detections.from_ultralytics(results)
 
         category_dict = {
@@ -77,23 +180,17 @@ class ImageProcessor:
             result = {
                 "label": label,
                 "confidence": float(confidence),
-                "bbox": xyxy.tolist()
+                "bbox": (xyxy * scale).tolist()
             }
             detection_results.append(result)
 
-        # 保存为 JSON 文件
-        with open('detection_results.json', 'w') as f:
-            json.dump(detection_results, f, indent=4)
-
         return detection_results
 
 
 if __name__ == "__main__":
-    image = Image.open(r'F:\a\apaper\project\project\algorithm\test_media\banana.jpg')
     processor = ImageProcessor()
 
-    # 进行图像分类
-    predicted_label = processor.classify_image(image)
+    # 进行目标检测和图像分类
+    detection_results, predicted_label = processor.analyze_image(r'F:\a\apaper\project\project\algorithm\test_media\banana.jpg')
     print(f"预测的类别是: {predicted_label}")
-
-    processor.object_detection(image)
\ No newline at end of file
+    print(detection_results)
\ No newline at end of file
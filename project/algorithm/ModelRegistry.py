@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class _Entry:
+    def __init__(self, name, model, size_mb, thread_safe):
+        self.name = name
+        self.model = model
+        self.size_mb = size_mb
+        # 推理锁：PaddleOCR 等模型不是线程安全的，同一个实例同一时间只允许一个请求使用
+        self.lock = None if thread_safe else threading.Lock()
+        # 正在使用该模型的请求数，大于 0 时不会被淘汰
+        self.in_use = 0
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """
+    进程级模型注册表：第一次使用时懒加载模型，之后在请求之间保持常驻。
+    已加载模型的总内存超过预算时，按最近最少使用（LRU）顺序淘汰空闲模型。
+    """
+
+    def __init__(self, memory_budget_mb=None):
+        self.memory_budget_mb = memory_budget_mb
+        self._loaders = {}
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        # 每个模型一把加载锁，避免并发请求重复加载同一个模型
+        self._load_locks = {}
+        self._stats = {'loads': 0, 'hits': 0, 'evictions': 0, 'load_seconds': 0.0}
+
+    def register(self, name, loader, size_mb=None, thread_safe=False):
+        """
+        注册模型加载函数
+        :param name: 模型名称
+        :param loader: 无参可调用对象，返回加载好的模型/处理器实例
+        :param size_mb: 预估内存占用（MB），为 None 时加载后根据参数量估算
+        :param thread_safe: 模型是否允许多个请求同时推理
+        """
+        with self._lock:
+            self._loaders[name] = (loader, size_mb, thread_safe)
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        获取模型实例（不加推理锁），未加载时先加载
+        :param name: 模型名称
+        :return: 模型实例
+        """
+        return self._get_entry(name, pin=False).model
+
+    @contextmanager
+    def use(self, name):
+        """
+        使用模型，使用期间该模型不会被淘汰；非线程安全的模型同一时间只有一个请求能拿到
+        :param name: 模型名称
+        """
+        entry = self._get_entry(name, pin=True)
+        try:
+            if entry.lock is None:
+                yield entry.model
+            else:
+                with entry.lock:
+                    yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+            self._evict_over_budget()
+
+    def _get_entry(self, name, pin):
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f'未注册的模型: {name}')
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                self._stats['hits'] += 1
+                if pin:
+                    entry.in_use += 1
+                return entry
+            load_lock = self._load_locks[name]
+
+        with load_lock:
+            # 等待加载锁期间其他请求可能已经完成加载
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    self._entries.move_to_end(name)
+                    self._stats['hits'] += 1
+                    if pin:
+                        entry.in_use += 1
+                    return entry
+                loader, size_mb, thread_safe = self._loaders[name]
+
+            start = time.time()
+            model = loader()
+            elapsed = time.time() - start
+            if size_mb is None:
+                size_mb = estimate_size_mb(model)
+            entry = _Entry(name, model, size_mb, thread_safe)
+            print(f'模型 {name} 加载完成，耗时 {elapsed:.2f} 秒，预估占用 {size_mb:.0f} MB')
+
+            with self._lock:
+                self._entries[name] = entry
+                self._stats['loads'] += 1
+                self._stats['load_seconds'] += elapsed
+                if pin:
+                    entry.in_use += 1
+        self._evict_over_budget()
+        return entry
+
+    def _evict_over_budget(self):
+        if self.memory_budget_mb is None:
+            return
+        with self._lock:
+            total = sum(entry.size_mb for entry in self._entries.values())
+            # OrderedDict 的头部是最久未使用的模型
+            for name in list(self._entries.keys()):
+                if total <= self.memory_budget_mb:
+                    break
+                entry = self._entries[name]
+                if entry.in_use > 0:
+                    continue
+                del self._entries[name]
+                total -= entry.size_mb
+                self._stats['evictions'] += 1
+                _close(entry.model)
+                print(f'模型 {name} 超出内存预算被淘汰，释放约 {entry.size_mb:.0f} MB')
+
+    def evict(self, name):
+        """
+        手动淘汰空闲模型
+        :return: 是否成功淘汰
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.in_use > 0:
+                return False
+            del self._entries[name]
+            self._stats['evictions'] += 1
+            _close(entry.model)
+            return True
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._entries.keys()):
+                self.evict(name)
+
+    def stats(self):
+        """
+        返回加载/命中/淘汰计数以及当前常驻模型信息
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_budget_mb'] = self.memory_budget_mb
+            stats['resident_mb'] = sum(entry.size_mb for entry in self._entries.values())
+            stats['models'] = [
+                {
+                    'name': entry.name,
+                    'size_mb': entry.size_mb,
+                    'in_use': entry.in_use,
+                    'loaded_at': entry.loaded_at
+                }
+                for entry in self._entries.values()
+            ]
+            return stats
+
+
+def estimate_size_mb(obj):
+    """
+    根据对象属性中 torch 模块的参数和缓冲区大小估算内存占用
+    :param obj: 处理器或模型实例
+    :return: 预估占用（MB）
+    """
+    seen = set()
+    total_bytes = 0
+    candidates = [obj] + list(getattr(obj, '__dict__', {}).values())
+    for value in candidates:
+        module = getattr(value, 'model', value) if not hasattr(value, 'parameters') else value
+        if not hasattr(module, 'parameters') or not callable(module.parameters):
+            continue
+        try:
+            tensors = list(module.parameters()) + list(module.buffers())
+        except Exception:
+            continue
+        for tensor in tensors:
+            if id(tensor) in seen:
+                continue
+            seen.add(id(tensor))
+            total_bytes += tensor.numel() * tensor.element_size()
+    return total_bytes / (1024 * 1024)
+
+
+def _close(model):
+    # 持有进程池等外部资源的处理器提供 close 方法，淘汰时一并释放
+    close = getattr(model, 'close', None)
+    if callable(close):
+        close()
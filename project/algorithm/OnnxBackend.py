@@ -0,0 +1,185 @@
+import hashlib
+import os
+import shutil
+
+import numpy as np
+import torch
+from PIL import Image
+
+# 可选的推理后端与量化方式
+BACKENDS = ('torch', 'onnx')
+QUANTIZATIONS = (None, 'dynamic', 'static')
+
+
+def _cache_key(source_path, *extra):
+    """
+    用源模型文件的路径、大小、修改时间和导出参数生成缓存文件名，源模型更新后自动重新导出
+    """
+    stat = os.stat(source_path)
+    raw = '|'.join([os.path.abspath(source_path), str(stat.st_size), str(stat.st_mtime)] + [str(e) for e in extra])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _weights_key(model, *extra):
+    """
+    没有源模型文件的 torch 模型按权重内容生成缓存文件名，换用其他权重后自动重新导出
+    """
+    sha1 = hashlib.sha1()
+    for name, tensor in model.state_dict().items():
+        tensor = tensor.detach().cpu().contiguous()
+        sha1.update(f'{name}|{tuple(tensor.shape)}|{tensor.dtype}'.encode('utf-8'))
+        sha1.update(tensor.numpy().tobytes() if tensor.dtype != torch.bfloat16 else tensor.float().numpy().tobytes())
+    for e in extra:
+        sha1.update(f'|{e}'.encode('utf-8'))
+    return sha1.hexdigest()[:16]
+
+
+def _check_quantization(quantization, calibration_images):
+    """
+    在导出前检查量化参数，避免静态量化在 onnxruntime 内部因为没有校准数据报出难以理解的错误
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f'不支持的量化方式: {quantization}')
+    if quantization == 'static' and not calibration_images:
+        raise ValueError('静态量化需要在 INFERENCE_BACKEND["CALIBRATION_IMAGES"] 中提供至少一张校准图像')
+
+
+def _quantize(onnx_path, quantization, calibration_reader=None):
+    """
+    对导出的 ONNX 模型做 INT8 量化
+    :param onnx_path: FP32 ONNX 模型路径
+    :param quantization: 'dynamic' 只量化权重，'static' 同时用校准数据量化激活
+    :param calibration_reader: 静态量化使用的 onnxruntime CalibrationDataReader
+    :return: 量化后的模型路径
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic, quantize_static
+
+    quantized_path = onnx_path.replace('.onnx', f'.{quantization}-int8.onnx')
+    if os.path.exists(quantized_path):
+        return quantized_path
+    tmp_path = quantized_path + '.tmp'
+    if quantization == 'dynamic':
+        quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QInt8)
+    elif quantization == 'static':
+        quantize_static(onnx_path, tmp_path, calibration_reader,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        raise ValueError(f'不支持的量化方式: {quantization}')
+    os.replace(tmp_path, quantized_path)
+    return quantized_path
+
+
+class ImageCalibrationReader:
+    """
+    静态量化的校准数据：把校准图像按模型输入格式预处理后逐张提供
+    """
+
+    def __init__(self, image_paths, input_name, preprocess):
+        self.input_name = input_name
+        self._inputs = iter([preprocess(Image.open(path).convert('RGB')) for path in image_paths])
+
+    def get_next(self):
+        data = next(self._inputs, None)
+        return None if data is None else {self.input_name: data}
+
+
+def yolo_calibration_preprocess(image_size):
+    def preprocess(image):
+        array = np.asarray(image.resize((image_size, image_size)), dtype=np.float32) / 255.0
+        return array.transpose(2, 0, 1)[None]
+    return preprocess
+
+
+def resnet_calibration_preprocess(mean, std):
+    def preprocess(image):
+        width, height = image.size
+        scale = 224 / min(width, height)
+        image = image.resize((round(width * scale), round(height * scale)))
+        array = (np.asarray(image, dtype=np.float32) / 255.0 - mean) / std
+        return array.transpose(2, 0, 1)[None].astype(np.float32)
+    return preprocess
+
+
+def export_yolo(model_cls, model_path, cache_dir, image_size, quantization=None, calibration_images=None):
+    """
+    将 ultralytics 系列模型（YOLOv8 / doclayout YOLOv10）导出为 ONNX，并按需量化
+    导出的模型仍由原模型类加载，推理结果的格式与 PyTorch 后端完全一致
+    :param model_cls: 模型类，例如 ultralytics.YOLO 或 doclayout_yolo.YOLOv10
+    :param model_path: .pt 模型路径
+    :param cache_dir: 导出结果缓存目录
+    :param image_size: 导出时的输入尺寸
+    :param quantization: None / 'dynamic' / 'static'
+    :param calibration_images: 静态量化使用的校准图像路径列表
+    :return: 用 ONNX Runtime 推理的模型实例
+    """
+    _check_quantization(quantization, calibration_images)
+    os.makedirs(cache_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    onnx_path = os.path.join(cache_dir, f'{name}-{_cache_key(model_path, image_size)}.onnx')
+    if not os.path.exists(onnx_path):
+        # ultralytics 会把 ONNX 文件导出到 .pt 所在目录，导出后移动到缓存目录
+        exported_path = model_cls(model_path).export(format='onnx', imgsz=image_size, dynamic=True)
+        shutil.move(exported_path, onnx_path)
+    if quantization:
+        reader = None
+        if quantization == 'static':
+            reader = ImageCalibrationReader(calibration_images, 'images', yolo_calibration_preprocess(image_size))
+        onnx_path = _quantize(onnx_path, quantization, reader)
+    return model_cls(onnx_path, task='detect')
+
+
+class OnnxClassifier:
+    """
+    用 ONNX Runtime 运行的分类模型，调用方式与 torch 模型相同：输入 NCHW 张量，输出 logits 张量
+    """
+
+    def __init__(self, onnx_path, intra_op_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, tensor):
+        output = self.session.run(None, {self.input_name: tensor.detach().cpu().numpy().astype(np.float32)})[0]
+        return torch.from_numpy(output)
+
+    def eval(self):
+        return self
+
+
+def export_classifier(model, name, cache_dir, quantization=None, calibration_images=None, mean=None, std=None):
+    """
+    将 torchvision 分类模型导出为 ONNX（batch 和空间尺寸均为动态），并按需量化
+    :param model: torch 模型
+    :param name: 缓存文件名前缀，文件名中还包含权重内容的哈希
+    :param cache_dir: 导出结果缓存目录
+    :param quantization: None / 'dynamic' / 'static'
+    :param calibration_images: 静态量化使用的校准图像路径列表
+    :param mean: 归一化均值，静态量化预处理校准图像时使用
+    :param std: 归一化标准差
+    :return: OnnxClassifier 实例
+    """
+    _check_quantization(quantization, calibration_images)
+    os.makedirs(cache_dir, exist_ok=True)
+    onnx_path = os.path.join(cache_dir, f'{name}-{_weights_key(model)}.onnx')
+    if not os.path.exists(onnx_path):
+        tmp_path = onnx_path + '.tmp'
+        dummy = torch.randn(1, 3, 224, 224)
+        torch.onnx.export(
+            model.eval(), dummy, tmp_path,
+            input_names=['input'], output_names=['logits'], opset_version=17,
+            dynamic_axes={'input': {0: 'batch', 2: 'height', 3: 'width'}, 'logits': {0: 'batch'}}
+        )
+        os.replace(tmp_path, onnx_path)
+    if quantization:
+        reader = None
+        if quantization == 'static':
+            reader = ImageCalibrationReader(
+                calibration_images, 'input',
+                resnet_calibration_preprocess(np.array(mean, dtype=np.float32), np.array(std, dtype=np.float32))
+            )
+        onnx_path = _quantize(onnx_path, quantization, reader)
+    return OnnxClassifier(onnx_path)
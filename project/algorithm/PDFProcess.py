@@ -1,18 +1,41 @@
 import fitz  # PyMuPDF
 import numpy as np
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 from doclayout_yolo import YOLOv10
 import supervision as sv
 from paddleocr import PaddleOCR
 import json
+import threading
 from pix2tex.cli import LatexOCR
-import tabula
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from .OnnxBackend import export_yolo
+except ImportError:
+    # 作为脚本直接运行时没有包上下文
+    from OnnxBackend import export_yolo
+
+# 布局模型训练时的输入尺寸
+LAYOUT_IMAGE_SIZE = 1024
+
+# PyMuPDF 不是线程安全的：进程内同一时间只允许一个线程调用 fitz（打开文档、渲染、读文本层、找表格）。
+# 处理任务、预览接口和其他任务的线程都通过这把锁访问 fitz，锁只在单页或单个窗口的调用期间持有
+FITZ_LOCK = threading.RLock()
 
 class PDFProcessor:
-    def __init__(self):
+    def __init__(self, backend='torch', quantization=None, onnx_cache_dir=None, calibration_images=None):
+        """
+        :param backend: 布局模型的推理后端，'torch' 或 'onnx'
+        :param quantization: ONNX 后端的 INT8 量化方式，None / 'dynamic' / 'static'
+        :param onnx_cache_dir: 导出的 ONNX 模型缓存目录
+        :param calibration_images: 静态量化使用的校准页面图像路径列表
+        """
         # 加载预训练模型
         model_path = r"F:\a\apaper\project\project\algorithm\model\doclayout_yolo_docstructbench_imgsz1024.pt"
-        self.layout_model = YOLOv10(model_path)
+        if backend == 'onnx':
+            self.layout_model = export_yolo(YOLOv10, model_path, onnx_cache_dir, LAYOUT_IMAGE_SIZE,
+                                            quantization, calibration_images)
+        else:
+            self.layout_model = YOLOv10(model_path)
         # 定义具体的分类标签
         self.CLASS_LABELS = {
             0: "Title",
@@ -26,6 +49,8 @@ class PDFProcessor:
             8: "Isolated Formula",
             9: "Formula Caption",
         }
+        # 需要进行 OCR 的文本类区域
+        self.TEXT_LAYOUT_TYPES = ["Plain Text", "Title", "Abandoned Text", "Figure Caption", "Table Caption", "Table Footnote", "Formula Caption"]
         # 初始化 PaddleOCR，设置语言为支持中文和英文
         self.ocr = PaddleOCR(use_angle_cls=True, lang='ch')
         # 初始化 LatexOCR
@@ -37,59 +62,102 @@ class PDFProcessor:
         :param pdf_path: PDF文件的路径
         :return: 包含每一页图像数组的列表
         """
-        doc = fitz.open(pdf_path)
-        images = []
-        # 提高图像分辨率，这里将缩放因子设置为2，可根据实际情况调整
-        zoom_x = 2.0
-        zoom_y = 2.0
-        mat = fitz.Matrix(zoom_x, zoom_y)
-        for page in doc:
-            # 使用矩阵进行缩放
-            pix = page.get_pixmap(matrix=mat)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            images.append(np.array(img))
-        return images
-
-    def layout_detection(self, images):
+        return [image for _, image in self.iter_pages(pdf_path)]
+
+    def iter_pages(self, pdf_path, zoom=2.0):
+        """
+        逐页渲染PDF，每次只在内存中保留一页图像
+        :param pdf_path: PDF文件的路径
+        :param zoom: 缩放因子，默认放大2倍以提高清晰度
+        :return: 生成 (页码, 图像数组) 的生成器
+        """
+        for page_no, image, _ in self.iter_pages_with_text_layer(pdf_path, zoom=zoom, use_text_layer=False):
+            yield page_no, image
+
+    def iter_pages_with_text_layer(self, pdf_path, zoom=2.0, use_text_layer=True, doc=None):
+        """
+        逐页渲染PDF，同时读取可用的文本层
+        :param pdf_path: PDF文件的路径
+        :param zoom: 缩放因子
+        :param use_text_layer: 是否读取文本层，为 False 时文本层恒为 None
+        :param doc: 已打开的文档，由调用方负责关闭；为 None 时自行打开
+        :return: 生成 (页码, 图像数组, 文本层) 的生成器，文本层坐标已换算到图像像素坐标
+        """
+        owns_doc = doc is None
+        if owns_doc:
+            with FITZ_LOCK:
+                doc = fitz.open(pdf_path)
+        mat = fitz.Matrix(zoom, zoom)
+        try:
+            for page_no in range(doc.page_count):
+                with FITZ_LOCK:
+                    page = doc[page_no]
+                    # 使用矩阵进行缩放
+                    pix = page.get_pixmap(matrix=mat)
+                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                    text_layer = self.extract_text_layer(page, zoom) if use_text_layer else None
+                # 生成器暂停期间不持有锁
+                yield page_no, np.array(img), text_layer
+        finally:
+            if owns_doc:
+                with FITZ_LOCK:
+                    doc.close()
+
+    def extract_text_layer(self, page, zoom=2.0, min_chars=20, max_invalid_ratio=0.1):
+        """
+        读取页面文本层，判断是否可以代替 OCR
+        扫描件没有文本层，部分 PDF 的文本层字体缺少编码映射，提取出来是乱码，这两种情况都返回 None
+        :param page: PyMuPDF 页面对象
+        :param zoom: 渲染时的缩放因子，用于把 PDF 坐标换算为图像像素坐标
+        :param min_chars: 文本层至少包含的字符数
+        :param max_invalid_ratio: 无法解码字符（U+FFFD）所占比例的上限
+        :return: [(x0, y0, x1, y1, 文本), ...]，按阅读顺序排列；不可用时返回 None
+        """
+        # words 的每一项为 (x0, y0, x1, y1, word, block_no, line_no, word_no)
+        words = page.get_text("words")
+        text = "".join(word[4] for word in words)
+        if len(text) < min_chars:
+            return None
+        if text.count("\ufffd") / len(text) > max_invalid_ratio:
+            return None
+        words.sort(key=lambda word: (word[5], word[6], word[7]))
+        return [(x0 * zoom, y0 * zoom, x1 * zoom, y1 * zoom, word) for x0, y0, x1, y1, word, *_ in words]
+
+    def text_in_box(self, text_layer, box):
+        """
+        取出中心点落在布局框内的文本层单词
+        :param text_layer: extract_text_layer 的返回值
+        :param box: (x1, y1, x2, y2) 图像像素坐标
+        :return: 拼接后的文本，没有单词时返回空字符串
+        """
+        x1, y1, x2, y2 = box
+        words = [
+            word for wx0, wy0, wx1, wy1, word in text_layer
+            if x1 <= (wx0 + wx1) / 2 <= x2 and y1 <= (wy0 + wy1) / 2 <= y2
+        ]
+        return " ".join(words)
+
+    def layout_detection(self, images, page_offset=0, batch_size=1):
         """
         对图像进行布局检测
         :param images: 包含图像数组的列表
-        :return: 包含检测结果和标注后图像的列表
+        :param page_offset: 第一张图像对应的页码，流式处理时用于计算真实页码
+        :param batch_size: 每次送入模型的页数，大于1时多页合并为一次推理
+        :return: 包含检测结果的列表
         """
+        all_results = []
+        for start in range(0, len(images), batch_size):
+            batch = images[start:start + batch_size]
+            # 执行推理，传入图像列表时模型会将整批页面作为一个 batch 处理
+            source = batch[0] if len(batch) == 1 else batch
+            all_results.extend(self.layout_model(source=source, imgsz=LAYOUT_IMAGE_SIZE, conf=0.25, verbose=False))
+
         all_detections = []
-        for i, image in enumerate(images):
-            # 执行推理
-            results = self.layout_model(source=image, conf=0.25, verbose=False)[0]
+        for i, (image, results) in enumerate(zip(images, all_results), start=page_offset):
             detections = sv.Detections.from_ultralytics(results)
 
-            # 创建 BoxAnnotator 实例，设置文本样式
-            box_annotator = sv.BoxAnnotator(
-                color=sv.Color.blue(),
-                text_color=sv.Color.from_hex("#FFFFFF"),
-                text_scale=0.3,
-                text_thickness=1,
-                text_padding=5
-            )
-
-            # 生成标签
-            labels = []
-            for class_id, confidence in zip(detections.class_id, detections.confidence):
-                if class_id in self.CLASS_LABELS:
-                    label = f"{self.CLASS_LABELS[class_id]} {confidence:.2f}"
-                else:
-                    label = f"未知类别 {confidence:.2f}"
-                labels.append(label)
-
-            # 注释图像，同时添加标签
-            annotated_image = box_annotator.annotate(
-                scene=image.copy(),
-                detections=detections,
-                labels=labels
-            )
-
             all_detections.append({
                 "detections": detections,
-                "annotated_image": annotated_image,
                 "page_info": {
                     "page_no": i,
                     "height": image.shape[0],
@@ -98,23 +166,26 @@ class PDFProcessor:
             })
         return all_detections
 
-    def ocr_recognition(self, all_detections, images):
+    def ocr_recognition(self, all_detections, images, num_workers=0, text_layers=None, artifact_store=None):
         """
         对布局检测结果进行 OCR 识别
-        :param all_detections: 包含检测结果和标注后图像的列表
+        先收集所有页面的文本区域，再统一批量送入 PaddleOCR，最后按原阅读顺序组装结果
+        页面有可用文本层时直接从文本层取文字，只有文本层取不到文字的区域才走 OCR
+        :param all_detections: 包含检测结果的列表
         :param images: 包含图像数组的列表
-        :return: 包含识别结果和标注后图像的列表
+        :param num_workers: 裁剪文本行图像的线程数，0 表示在当前线程完成
+        :param text_layers: 与 images 对应的文本层列表，元素为 None 表示该页需要 OCR
+        :param artifact_store: 调试产物存储，传入时保存图片区域
+        :return: 包含识别结果的列表
         """
-        all_results = []
+        # 第一遍：按阅读顺序收集每一页的区域
+        pages_regions = []
+        text_crops = []
         for i, detection_info in enumerate(all_detections):
             detections = detection_info["detections"]
             image = images[i]
-            annotated_image = detection_info["annotated_image"]
-            page_info = detection_info["page_info"]
-
-            # 提取布局内容
-            page_results = []
-            unique_texts = set()
+            text_layer = text_layers[i] if text_layers else None
+            page_regions = []
             # 按检测框的上边界坐标进行排序
             sorted_indices = np.argsort(detections.xyxy[:, 1])
             for index in sorted_indices:
@@ -123,12 +194,52 @@ class PDFProcessor:
                 x1, y1, x2, y2 = map(int, xyxy)
                 layout_image = image[y1:y2, x1:x2]
                 layout_type = self.CLASS_LABELS.get(class_id, "未知类别")
+                region = {"layout_type": layout_type, "box": (x1, y1, x2, y2), "image": layout_image}
+                if layout_type in self.TEXT_LAYOUT_TYPES:
+                    native_text = self.text_in_box(text_layer, (x1, y1, x2, y2)) if text_layer else ""
+                    if native_text:
+                        region["native_text"] = native_text
+                    else:
+                        region["ocr_index"] = len(text_crops)
+                        text_crops.append(layout_image)
+                page_regions.append(region)
+            pages_regions.append(page_regions)
+
+        # 批量识别所有文本区域
+        ocr_results = self.ocr_batch(text_crops, num_workers=num_workers)
 
-                if layout_type in ["Plain Text", "Title", "Abandoned Text", "Figure Caption", "Table Caption", "Table Footnote", "Formula Caption"]:
-                    result = self.ocr.ocr(layout_image, cls=True)
-                    if result and result[0]:
-                        full_text = " ".join([line[1][0] for line in result[0]])
-                        score = max([line[1][1] for line in result[0]])  # 取最高置信度
+        # 第二遍：按原顺序组装每一页的结果
+        all_results = []
+        for i, detection_info in enumerate(all_detections):
+            page_info = detection_info["page_info"]
+
+            # 提取布局内容
+            page_results = []
+            unique_texts = set()
+            text_layer_regions = 0
+            ocr_regions = 0
+            for region in pages_regions[i]:
+                layout_type = region["layout_type"]
+                x1, y1, x2, y2 = region["box"]
+                layout_image = region["image"]
+
+                if layout_type in self.TEXT_LAYOUT_TYPES and "native_text" in region:
+                    text_layer_regions += 1
+                    full_text = region["native_text"]
+                    if full_text not in unique_texts:
+                        unique_texts.add(full_text)
+                        page_results.append({
+                            "category_type": layout_type.lower().replace(" ", "_"),
+                            "poly": [x1, y1, x2, y1, x2, y2, x1, y2],
+                            "text": full_text,
+                            "score": 1.0
+                        })
+                elif layout_type in self.TEXT_LAYOUT_TYPES:
+                    ocr_regions += 1
+                    lines = ocr_results[region["ocr_index"]]
+                    if lines:
+                        full_text = " ".join([line[1][0] for line in lines])
+                        score = max([line[1][1] for line in lines])  # 取最高置信度
                         if full_text not in unique_texts:
                             unique_texts.add(full_text)
                             page_results.append({
@@ -138,8 +249,9 @@ class PDFProcessor:
                                 "score": score
                             })
                 elif layout_type == "Figure":
-                    # 保存图片
-                    Image.fromarray(layout_image).save(f"page_{i + 1}_figure_{x1}_{y1}.png")
+                    if artifact_store is not None:
+                        # 保存图片，复制一份避免整页图像在写入完成前无法释放
+                        artifact_store.save_image(f"page_{page_info['page_no'] + 1}_figure_{x1}_{y1}.png", layout_image.copy())
                 elif layout_type == "Isolated Formula":
                     # 使用 LatexOCR 识别公式
                     latex_text = self.latex_ocr(Image.fromarray(layout_image))
@@ -150,44 +262,165 @@ class PDFProcessor:
                         "score": '-'
                     })
 
+            # 记录该页文字的来源，便于统计文本层快速路径的命中情况
+            page_info["extraction"] = {
+                "text_layer": bool(text_layers and text_layers[i]),
+                "text_layer_regions": text_layer_regions,
+                "ocr_regions": ocr_regions
+            }
             all_results.append({
                 "layout_dets": page_results,
-                "page_info": page_info,
-                "annotated_image": annotated_image
+                "page_info": page_info
             })
         return all_results
 
-    def table_recognition(self, pdf_path, all_results):
+    def ocr_batch(self, crops, num_workers=0):
+        """
+        批量识别多个区域图像，结果与逐个调用 self.ocr.ocr(crop, cls=True)[0] 一致
+        文本检测逐个区域进行，所有区域的文本行汇总后一次性送入方向分类和文字识别，
+        由 PaddleOCR 按 rec_batch_num 分批推理
+        :param crops: 区域图像数组列表
+        :param num_workers: 裁剪文本行图像的线程数
+        :return: 每个区域的识别结果列表，每项为 [[box, (text, score)], ...] 或 None
+        """
+        if not crops:
+            return []
+        try:
+            from tools.infer.predict_system import sorted_boxes
+            from tools.infer.utility import get_rotate_crop_image
+            text_detector = self.ocr.text_detector
+            text_recognizer = self.ocr.text_recognizer
+        except (ImportError, AttributeError):
+            # 当前 PaddleOCR 版本不支持直接访问内部模块时退回逐区域识别
+            return [(self.ocr.ocr(crop, cls=True) or [None])[0] for crop in crops]
+
+        # 文本检测：Paddle 预测器不是线程安全的，只能顺序执行
+        all_boxes = []
+        for crop in crops:
+            dt_boxes, _ = text_detector(crop)
+            all_boxes.append(sorted_boxes(dt_boxes) if dt_boxes is not None and len(dt_boxes) > 0 else [])
+
+        # 裁剪文本行：纯 numpy/OpenCV 运算，可以放到线程池中并行
+        def crop_lines(args):
+            crop, boxes = args
+            return [get_rotate_crop_image(crop, np.array(box, dtype=np.float32)) for box in boxes]
+
+        if num_workers > 0:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                line_images_per_crop = list(executor.map(crop_lines, zip(crops, all_boxes)))
+        else:
+            line_images_per_crop = [crop_lines(args) for args in zip(crops, all_boxes)]
+
+        line_images = [line for lines in line_images_per_crop for line in lines]
+        if not line_images:
+            return [None] * len(crops)
+
+        # 方向分类和文字识别：所有区域的文本行合并批量推理
+        if getattr(self.ocr, "use_angle_cls", False) and getattr(self.ocr, "text_classifier", None) is not None:
+            line_images, _, _ = self.ocr.text_classifier(line_images)
+        rec_results, _ = text_recognizer(line_images)
+
+        drop_score = getattr(self.ocr, "drop_score", 0.5)
+        results = []
+        offset = 0
+        for boxes in all_boxes:
+            lines = []
+            for box, rec_result in zip(boxes, rec_results[offset:offset + len(boxes)]):
+                text, score = rec_result
+                if score >= drop_score:
+                    lines.append([np.array(box).tolist(), (text, score)])
+            offset += len(boxes)
+            results.append(lines or None)
+        return results
+
+    def table_recognition(self, pdf_path, all_results, all_detections):
         """
-        使用 tabula-py 库识别 PDF 中的表格，并将结果添加到 all_results 中
+        只在布局检测标记为 Table 的区域内用 PyMuPDF 识别表格，并将结果添加到对应页的 all_results 中
         :param pdf_path: PDF 文件的路径
-        :param all_results: 包含每一页识别结果和标注后图像的列表
+        :param all_results: 包含每一页识别结果的列表
+        :param all_detections: 与 all_results 对应的布局检测结果
         :return: 包含表格识别结果的 all_results
         """
-        tables = tabula.read_pdf(pdf_path, pages='all')
-        for i, table in enumerate(tables):
-            page_no = i
-            table_text = table.to_csv(sep='\t', na_rep='nan', index=False)
-            if 0 <= page_no < len(all_results):
-                all_results[page_no]["layout_dets"].append({
-                    "category_type": "table",
-                    "poly": [],
-                    "text": table_text,
-                    "score": '-'
-                })
+        tables = self.extract_tables(pdf_path, self.table_boxes(all_detections))
+        for result in all_results:
+            result["layout_dets"].extend(tables.get(result["page_info"]["page_no"], []))
         return all_results
 
-    def show_results(self, all_results):
+    def table_boxes(self, all_detections):
+        """
+        取出布局检测结果中的表格区域
+        :param all_detections: 布局检测结果列表
+        :return: {页码: [(x1, y1, x2, y2), ...]}，坐标为渲染图像的像素坐标
+        """
+        boxes = {}
+        for detection_info in all_detections:
+            detections = detection_info["detections"]
+            page_no = detection_info["page_info"]["page_no"]
+            for xyxy, class_id in zip(detections.xyxy, detections.class_id):
+                if self.CLASS_LABELS.get(class_id) == "Table":
+                    boxes.setdefault(page_no, []).append(tuple(map(int, xyxy)))
+        return boxes
+
+    def extract_tables(self, pdf_path, page_boxes, zoom=2.0, doc=None):
+        """
+        用 PyMuPDF 的表格识别提取指定区域内的表格，没有表格区域的页面不会被扫描
+        :param pdf_path: PDF 文件的路径
+        :param page_boxes: table_boxes 的返回值
+        :param zoom: 渲染时的缩放因子，用于把像素坐标换算回 PDF 坐标
+        :param doc: 已打开的文档，由调用方负责关闭；为 None 时自行打开
+        :return: {页码: [表格结果, ...]}
+        """
+        if not page_boxes:
+            return {}
+        with FITZ_LOCK:
+            return self._extract_tables(pdf_path, page_boxes, zoom, doc)
+
+    def _extract_tables(self, pdf_path, page_boxes, zoom, doc):
+        tables = {}
+        owns_doc = doc is None
+        if owns_doc:
+            doc = fitz.open(pdf_path)
+        try:
+            for page_no, boxes in sorted(page_boxes.items()):
+                page = doc[page_no]
+                for x1, y1, x2, y2 in sorted(boxes, key=lambda box: box[1]):
+                    clip = fitz.Rect(x1 / zoom, y1 / zoom, x2 / zoom, y2 / zoom)
+                    found = page.find_tables(clip=clip).tables
+                    if not found:
+                        # 无边框表格用线条策略找不到，改用文字对齐策略
+                        found = page.find_tables(clip=clip, strategy="text").tables
+                    for table in found:
+                        rows = table.extract()
+                        if not rows:
+                            continue
+                        # 与原先 DataFrame.to_csv(sep='\t', na_rep='nan') 的输出格式保持一致
+                        table_text = "".join(
+                            "\t".join("nan" if cell is None else str(cell) for cell in row) + "\n"
+                            for row in rows
+                        )
+                        tables.setdefault(page_no, []).append({
+                            "category_type": "table",
+                            "poly": [x1, y1, x2, y1, x2, y2, x1, y2],
+                            "text": table_text,
+                            "score": '-'
+                        })
+        finally:
+            if owns_doc:
+                doc.close()
+        return tables
+
+    def show_results(self, all_results, pdf_path=None):
         """
         打印所有识别结果并将其导出为 JSON 格式
-        :param all_results: 包含每一页识别结果和标注后图像的列表
+        :param all_results: 包含每一页识别结果的列表
+        :param pdf_path: 传入时根据识别结果绘制并保存每一页的标注图
         """
         json_data = []
         for result in all_results:
             page_no = result["page_info"]["page_no"]
-            # 保存标注后的图片
-            annotated_image = Image.fromarray(result["annotated_image"])
-            annotated_image.save(f"page_{page_no + 1}_annotated.png")
+            if pdf_path:
+                # 保存标注后的图片
+                render_page_preview(pdf_path, page_no, result["layout_dets"]).save(f"page_{page_no + 1}_annotated.png")
 
             # 准备 JSON 数据
             json_result = {
@@ -201,12 +434,92 @@ class PDFProcessor:
         with open('output.json', 'w', encoding='utf-8') as f:
             f.write(json_output)
 
+    def process_pdf_stream(self, pdf_path, window_size=1, batch_size=1, ocr_workers=0, use_text_layer=True,
+                           artifact_store=None):
+        """
+        流式处理PDF：每次只渲染、检测、识别一个窗口内的页面，处理完立即释放图像，
+        内存峰值与文档页数无关
+        :param pdf_path: PDF 文件的路径
+        :param window_size: 每个窗口包含的页数
+        :param batch_size: 布局检测的批大小，不超过 window_size 时才能生效
+        :param ocr_workers: OCR 裁剪文本行的线程数
+        :param use_text_layer: 是否对有文本层的页面直接读取文字，跳过 OCR
+        :param artifact_store: 调试产物存储，默认不保存
+        :return: 逐页生成 {"layout_dets", "page_info"} 的生成器
+        """
+        window = []
+        text_layers = []
+        # 整个文档只打开一次，渲染和各窗口的表格提取共用，不按页或按窗口重复解析文档
+        with FITZ_LOCK:
+            doc = fitz.open(pdf_path)
+        try:
+            for page_no, image, text_layer in self.iter_pages_with_text_layer(pdf_path, use_text_layer=use_text_layer, doc=doc):
+                window.append(image)
+                text_layers.append(text_layer)
+                if len(window) >= window_size:
+                    yield from self._process_window(doc, window, text_layers, page_no - len(window) + 1, batch_size, ocr_workers, artifact_store)
+                    window = []
+                    text_layers = []
+            if window:
+                yield from self._process_window(doc, window, text_layers, page_no - len(window) + 1, batch_size, ocr_workers, artifact_store)
+        finally:
+            with FITZ_LOCK:
+                doc.close()
+
+    def _process_window(self, doc, images, text_layers, page_offset, batch_size, ocr_workers, artifact_store):
+        detections = self.layout_detection(images, page_offset=page_offset, batch_size=batch_size)
+        # 表格提取与页面渲染在同一个线程中进行，fitz 调用由 FITZ_LOCK 与其他线程串行
+        tables = self.extract_tables(doc.name, self.table_boxes(detections), doc=doc)
+        results = self.ocr_recognition(detections, images, num_workers=ocr_workers, text_layers=text_layers,
+                                       artifact_store=artifact_store)
+        for result in results:
+            page_no = result["page_info"]["page_no"]
+            result["layout_dets"].extend(tables.get(page_no, []))
+            yield {
+                "layout_dets": result["layout_dets"],
+                "page_info": result["page_info"]
+            }
+
     def process_pdf(self, pdf_path):
         images = self.pdf_to_image(pdf_path)
         detections = self.layout_detection(images)
         results = self.ocr_recognition(detections, images)
-        results_with_tables = self.table_recognition(pdf_path, results)
-        self.show_results(results_with_tables)
+        results_with_tables = self.table_recognition(pdf_path, results, detections)
+        self.show_results(results_with_tables, pdf_path)
+
+
+def render_page_preview(pdf_path, page_no, layout_dets, zoom=2.0):
+    """
+    按已保存的布局结果绘制某一页的标注图，布局坐标与 pdf_to_image 渲染的图像坐标一致
+    :param pdf_path: PDF 文件的路径
+    :param page_no: 页码（从0开始）
+    :param layout_dets: 该页的布局结果列表
+    :param zoom: 渲染时的缩放因子
+    :return: PIL 图像
+    """
+    with FITZ_LOCK:
+        doc = fitz.open(pdf_path)
+        try:
+            pix = doc[page_no].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        finally:
+            doc.close()
+
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for det in layout_dets or []:
+        poly = det.get("poly") or []
+        if len(poly) < 8:
+            continue
+        xs, ys = poly[0::2], poly[1::2]
+        x1, y1, x2, y2 = min(xs), min(ys), max(xs), max(ys)
+        draw.rectangle([x1, y1, x2, y2], outline=(0, 0, 255), width=2)
+        label = det.get("category_type", "")
+        text_box = draw.textbbox((x1, y1), label, font=font)
+        text_height = text_box[3] - text_box[1] + 10
+        draw.rectangle([x1, y1 - text_height, x1 + text_box[2] - text_box[0] + 10, y1], fill=(0, 0, 255))
+        draw.text((x1 + 5, y1 - text_height + 5), label, fill=(255, 255, 255), font=font)
+    return image
 
 
 if __name__ == "__main__":
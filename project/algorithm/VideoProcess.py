@@ -1,53 +1,548 @@
+import bisect
 import cv2
 import os
+import threading
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from modelscope.pipelines import pipeline
 from modelscope.utils.constant import Tasks
 import numpy as np
+try:
+    from .FrameStore import FrameStoreWriter
+except ImportError:
+    # 作为脚本直接运行时没有包上下文
+    from FrameStore import FrameStoreWriter
+
+try:
+    # PyAV 可选，用于只解码关键帧
+    import av
+except ImportError:
+    av = None
+
+# 可选的抽帧策略
+SAMPLING_STRATEGIES = ('interval', 'seek', 'keyframe', 'scene')
+
+
+class FrameRing:
+    """
+    解码线程与消费者之间的环形缓冲区：预分配固定数量的帧槽位，解码直接写入空闲槽位，
+    消费者处理完后归还槽位，解码线程在没有空闲槽位时等待，内存占用与视频长度无关
+    """
+
+    def __init__(self, capacity, frame_shape):
+        self.slots = [np.empty(frame_shape, dtype=np.uint8) for _ in range(capacity)]
+        self._free = deque(range(capacity))
+        self._ready = deque()
+        self._closed = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        :return: 空闲槽位号，缓冲区已关闭时返回 None
+        """
+        with self._condition:
+            while not self._free and not self._closed:
+                self._condition.wait()
+            return None if self._closed else self._free.popleft()
+
+    def publish(self, slot, frame_index, is_sample=True):
+        with self._condition:
+            self._ready.append((slot, frame_index, is_sample))
+            self._condition.notify_all()
+
+    def release(self, slot):
+        with self._condition:
+            self._free.append(slot)
+            self._condition.notify_all()
+
+    def close(self, error=None):
+        with self._condition:
+            self._closed = True
+            self._error = self._error or error
+            self._condition.notify_all()
+
+    def __iter__(self):
+        while True:
+            with self._condition:
+                while not self._ready and not self._closed:
+                    self._condition.wait()
+                if not self._ready:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                slot, frame_index, is_sample = self._ready.popleft()
+            try:
+                yield frame_index, self.slots[slot], is_sample
+            finally:
+                self.release(slot)
+
+
+# 分段行为识别进程池中每个工作进程常驻的处理器
+_segment_worker = None
+
+
+def _init_segment_worker(model_path, num_threads):
+    global _segment_worker
+    # 只在 spawn 出的识别进程中执行，线程数是该进程的进程级设置，不影响 Django 进程内的其他模型
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+    _segment_worker = VideoProcessor()
+    _segment_worker.action_recog_model_path = model_path
+    # 进程启动时就加载模型，之后的每个片段直接推理
+    _segment_worker.recognition_pipeline
+
+
+def _recognize_segment(video_path, start_frame, end_frame, fps):
+    return _segment_worker.recognize_segment(video_path, start_frame, end_frame, fps)
 
 
 class VideoProcessor:
-    def __init__(self):
+    def __init__(self, ring_size=8, segment_workers=2, segment_threads=None):
+        """
+        :param ring_size: 解码环形缓冲区的帧槽位数
+        :param segment_workers: 分段行为识别的进程数
+        :param segment_threads: 每个识别进程的 torch 线程数，None 使用默认值
+        """
         self.action_recog_model_path =  r"F:\a\apaper\project\project\algorithm\model\cv_TAdaConv_action-recognition"
+        self.ring_size = ring_size
+        self.segment_workers = segment_workers
+        self.segment_threads = segment_threads
+        self._recognition_pipeline = None
+        self._segment_pool = None
+        self._pool_lock = threading.Lock()
 
-    def preprocess_video(self, video_path, output_folder):
-        # 确保输出文件夹存在
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
+    @property
+    def recognition_pipeline(self):
+        # 行为识别模型只在第一次使用时加载一次
+        if self._recognition_pipeline is None:
+            self._recognition_pipeline = pipeline(Tasks.action_recognition, model=self.action_recog_model_path)
+        return self._recognition_pipeline
+
+    def enhance_frame(self, frame):
+        # 图像增强：这里简单地进行直方图均衡化
+        if len(frame.shape) == 3:
+            # 如果是彩色图像，将其转换为 YUV 颜色空间
+            yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
+            yuv[:, :, 0] = cv2.equalizeHist(yuv[:, :, 0])
+            frame = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR)
+        else:
+            # 如果是灰度图像，直接进行直方图均衡化
+            frame = cv2.equalizeHist(frame)
+        # 调整帧的大小为 224x224
+        return cv2.resize(frame, (224, 224))
 
-        # 打开视频文件
+    def process_video(self, video_path, output_folder, strategy='interval', sample_interval=4, seek_seconds=1.0,
+                      scene_threshold=30.0, recognize_action=True, stats=None, action_mode='whole', segment_seconds=10.0):
+        """
+        只解码一遍视频，解码出的帧经环形缓冲区同时供给帧提取和行为识别
+        :param video_path: 视频路径
+        :param output_folder: 抽帧结果目录，提取的帧写入其中的 frames.u8 / frames.json（见 FrameStore），
+            写完后整个目录一次替换
+        :param strategy: 抽帧策略，见 SAMPLING_STRATEGIES
+            'interval' 每隔 sample_interval 帧提取一帧，跳过的帧只 grab 不 retrieve
+            'seek'     每隔 seek_seconds 秒按时间定位提取一帧；OpenCV 跳转后要从目标之前最近的关键帧解码，
+                       只有该关键帧位于当前位置之后时跳转才能少解码，否则顺序 grab（关键帧位置由 PyAV 读取，
+                       未安装 PyAV 时假设关键帧间隔约为 2 秒）
+            'keyframe' 只解码关键帧（需要 PyAV），未安装 PyAV 时退回 'scene'
+            'scene'    每隔 sample_interval 帧计算与上一张提取帧的差异，超过 scene_threshold 时提取
+        :param sample_interval: 'interval' / 'scene' 策略的帧间隔
+        :param seek_seconds: 'seek' 策略的时间间隔（秒）
+        :param scene_threshold: 'scene' 策略的差异阈值（缩略灰度图的平均绝对差，0~255）
+        :param recognize_action: 是否进行行为识别
+        :param stats: 传入字典时写入解码统计：grabbed（解码的帧数）、retrieved（转换为图像的帧数）、seeks（跳转次数）
+        :param action_mode: 'whole' 整段视频识别一个动作；'segmented' 在关键帧处切成约 segment_seconds 秒的片段，
+            在进程池中并行识别，返回逐段的动作时间线
+        :param segment_seconds: 分段识别的目标片段时长
+        :return: (抽帧数量, 行为识别结果)
+        """
+        if strategy not in SAMPLING_STRATEGIES:
+            raise ValueError(f"不支持的抽帧策略: {strategy}")
+        if strategy == 'keyframe' and av is None:
+            print("未安装 PyAV，关键帧抽帧退回为场景变化抽帧")
+            strategy = 'scene'
         cap = cv2.VideoCapture(video_path)
-        frame_count = 0
-
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            # 每 4 帧提取一次（可根据需要调整）
-            if frame_count % 4 == 0:
-                # 图像增强：这里简单地进行直方图均衡化
-                if len(frame.shape) == 3:
-                    # 如果是彩色图像，将其转换为 YUV 颜色空间
-                    yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
-                    yuv[:, :, 0] = cv2.equalizeHist(yuv[:, :, 0])
-                    frame = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR)
+        if not cap.isOpened():
+            raise ValueError(f"无法打开视频文件: {video_path}")
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        if strategy == 'seek' and frame_count <= 0:
+            # 无法获得总帧数（如部分流媒体容器）时不能按时间定位
+            strategy = 'interval'
+
+        segment_futures = None
+        if recognize_action and action_mode == 'segmented' and frame_count > 0:
+            # 分段识别由进程池中的工作进程各自解码所需的帧，与本进程的抽帧同时进行
+            segment_futures = self._submit_segments(video_path, frame_count, fps, segment_seconds)
+            recognize_action = False
+
+        # 行为识别模型需要的帧号，按 modelscope 的采样规则预先计算，解码时顺带保留这些帧
+        clip_indices = self._action_clip_indices(frame_count, fps) if recognize_action else None
+        action_indices = {index for clip in clip_indices for index in clip} if clip_indices else set()
+        action_frames = {}
+
+        stats = stats if stats is not None else {}
+        stats.update({'grabbed': 0, 'retrieved': 0, 'seeks': 0})
+        options = {
+            'action_indices': action_indices,
+            'sample_interval': max(1, int(sample_interval)),
+            'sample_step': max(1, int(round(seek_seconds * fps))),
+            # 按帧号定位时的关键帧位置，只解封装不解码
+            'keyframes': self.keyframe_indices(video_path, fps) if strategy in ('seek', 'keyframe') else [],
+            # 不知道关键帧位置时假设的关键帧间隔
+            'seek_gap': max(1, int(fps * 2)),
+            'scene_threshold': scene_threshold,
+            'frame_count': frame_count,
+            'fps': fps,
+            'video_path': video_path
+        }
+        ring = FrameRing(self.ring_size, frame_shape)
+        decoder = threading.Thread(
+            target=self._decode_into_ring, args=(cap, ring, strategy, options, stats), name='video-decode', daemon=True
+        )
+        decoder.start()
+        sampled = 0
+        writer = FrameStoreWriter(output_folder, fps=fps)
+        try:
+            for frame_index, frame, is_sample in ring:
+                if frame_index in action_indices:
+                    # 模型输入为 RGB，cvtColor 会复制一份，不占用环形缓冲区的槽位
+                    action_frames[frame_index] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                if is_sample:
+                    # 不再逐帧编码 PNG，预处理后的帧直接追加到帧存储文件中
+                    writer.append(self.enhance_frame(frame), frame_index)
+                    sampled += 1
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            ring.close()
+            decoder.join()
+            cap.release()
+
+        action_result = None
+        if segment_futures is not None:
+            action_result = self._collect_timeline(segment_futures, fps)
+        elif recognize_action:
+            if clip_indices and action_frames:
+                action_result = self._recognize_frames(clip_indices, action_frames)
+            if action_result is None:
+                action_result = self.action_recognition(video_path)
+        return sampled, action_result
+
+    def _decode_into_ring(self, cap, ring, strategy, options, stats):
+        error = None
+        try:
+            if strategy == 'interval':
+                self._decode_interval(cap, ring, options, stats)
+            elif strategy == 'seek':
+                targets = set(range(0, options['frame_count'], options['sample_step']))
+                self._decode_targets(cap, ring, targets | options['action_indices'], targets, options, stats)
+            elif strategy == 'keyframe':
+                self._decode_keyframes(ring, options, stats)
+                # 关键帧由 PyAV 解码，行为识别需要的帧再用 OpenCV 按帧号定位读取
+                self._decode_targets(cap, ring, options['action_indices'], set(), options, stats)
+            elif strategy == 'scene':
+                self._decode_scene(cap, ring, options, stats)
+        except Exception as e:
+            error = e
+        finally:
+            ring.close(error)
+
+    def _read_slot(self, ring, read, stats):
+        """
+        把一帧直接解码到环形缓冲区的空闲槽位中
+        :param read: cap.read 或 cap.retrieve
+        :return: 槽位编号，缓冲区已关闭或读取失败时为 None
+        """
+        slot = ring.acquire()
+        if slot is None:
+            # 消费者出错提前关闭了缓冲区
+            return None
+        ret, frame = read(ring.slots[slot])
+        if not ret:
+            ring.release(slot)
+            return None
+        if frame is not ring.slots[slot]:
+            # 实际帧尺寸与容器信息不一致时，OpenCV 会分配新数组，直接替换该槽位
+            ring.slots[slot] = frame
+        stats['retrieved'] += 1
+        return slot
+
+    def _put(self, ring, frame_index, read, is_sample, stats):
+        """
+        解码一帧并交给消费者
+        :return: 是否继续解码（缓冲区已关闭或读取失败时为 False）
+        """
+        slot = self._read_slot(ring, read, stats)
+        if slot is None:
+            return False
+        ring.publish(slot, frame_index, is_sample)
+        return True
+
+    def _decode_interval(self, cap, ring, options, stats):
+        frame_index = 0
+        # grab 只解码不做颜色转换和拷贝，只有需要的帧才 retrieve
+        while cap.grab():
+            stats['grabbed'] += 1
+            is_sample = frame_index % options['sample_interval'] == 0
+            if is_sample or frame_index in options['action_indices']:
+                if not self._put(ring, frame_index, cap.retrieve, is_sample, stats):
+                    return
+            frame_index += 1
+
+    def _decode_targets(self, cap, ring, targets, sample_targets, options, stats):
+        """
+        按帧号读取指定的帧：跳转能少解码时直接跳转（见 _should_seek），否则向前 grab
+        """
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        for target in sorted(targets):
+            if self._should_seek(position, target, options):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                stats['seeks'] += 1
+                position = target
+            while position < target:
+                if not cap.grab():
+                    return
+                stats['grabbed'] += 1
+                position += 1
+            if not self._put(ring, target, cap.read, target in sample_targets, stats):
+                return
+            stats['grabbed'] += 1
+            position += 1
+
+    def _should_seek(self, position, target, options):
+        if target < position:
+            return True
+        keyframes = options['keyframes']
+        if keyframes:
+            # 跳转后从目标之前最近的关键帧开始解码，该关键帧在当前位置之后时才比顺序 grab 解码得少
+            i = bisect.bisect_right(keyframes, target) - 1
+            return i >= 0 and keyframes[i] > position
+        return target - position > options['seek_gap']
+
+    def _decode_keyframes(self, ring, options, stats):
+        container = av.open(options['video_path'])
+        try:
+            stream = container.streams.video[0]
+            # 解码器直接丢弃非关键帧，不做任何解码工作
+            stream.codec_context.skip_frame = 'NONKEY'
+            for keyframe_number, frame in enumerate(container.decode(stream)):
+                stats['grabbed'] += 1
+                frame_index = int(round(frame.time * options['fps'])) if frame.time is not None else keyframe_number
+                slot = ring.acquire()
+                if slot is None:
+                    return
+                ring.slots[slot] = frame.to_ndarray(format='bgr24')
+                stats['retrieved'] += 1
+                ring.publish(slot, frame_index, True)
+        finally:
+            container.close()
+
+    def _decode_scene(self, cap, ring, options, stats):
+        frame_index = 0
+        last_thumbnail = None
+        while cap.grab():
+            stats['grabbed'] += 1
+            is_action = frame_index in options['action_indices']
+            if frame_index % options['sample_interval'] == 0 or is_action:
+                slot = self._read_slot(ring, cap.retrieve, stats)
+                if slot is None:
+                    return
+                frame = ring.slots[slot]
+                is_sample = False
+                if frame_index % options['sample_interval'] == 0:
+                    # 在缩小的灰度图上计算与上一张提取帧的平均绝对差作为场景变化分数
+                    thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA)
+                    if last_thumbnail is None or cv2.absdiff(thumbnail, last_thumbnail).mean() > options['scene_threshold']:
+                        last_thumbnail = thumbnail
+                        is_sample = True
+                if is_sample or is_action:
+                    ring.publish(slot, frame_index, is_sample)
                 else:
-                    # 如果是灰度图像，直接进行直方图均衡化
-                    frame = cv2.equalizeHist(frame)
-                # 调整帧的大小为 224x224
-                frame = cv2.resize(frame, (224, 224))
+                    ring.release(slot)
+            frame_index += 1
 
-                # 保存帧为 PNG 图片
-                image_path = os.path.join(output_folder, f"frame_{frame_count:04d}.png")
-                cv2.imwrite(image_path, frame)
+    def _action_clip_indices(self, frame_count, fps):
+        """
+        :return: 每个时间视角的帧号列表，当前 modelscope 版本不支持时返回 None
+        """
+        if frame_count <= 0:
+            return None
+        try:
+            from modelscope.preprocessors.video import _interval_based_sampling
+            cfg = self.recognition_pipeline.cfg
+            return [
+                _interval_based_sampling(
+                    frame_count, fps, cfg.DATA.TARGET_FPS, clip_idx, cfg.TEST.NUM_ENSEMBLE_VIEWS,
+                    cfg.DATA.NUM_INPUT_FRAMES, cfg.DATA.SAMPLING_RATE, cfg.DATA.MINUS_INTERVAL
+                ).tolist()
+                for clip_idx in range(cfg.TEST.NUM_ENSEMBLE_VIEWS)
+            ]
+        except (ImportError, AttributeError, KeyError, TypeError) as e:
+            print(f"无法复用解码帧进行行为识别，将单独解码视频: {str(e)}")
+            return None
 
-            frame_count += 1
+    def _recognize_frames(self, clip_indices, action_frames):
+        """
+        用解码时保留的帧构造模型输入，与 modelscope 的 ReadVideoData 使用相同的变换
+        :return: 行为识别结果，失败时返回 None
+        """
+        import torch
+        try:
+            from modelscope.preprocessors.video import kinetics400_tranform
+            recognition_pipeline = self.recognition_pipeline
+            cfg = recognition_pipeline.cfg
+            num_spatial_crops = cfg.TEST.NUM_SPATIAL_CROPS
+            transform = kinetics400_tranform(cfg, num_spatial_crops)
+            available = sorted(action_frames)
+            data_list = []
+            for clip in clip_indices:
+                frames = []
+                for index in clip:
+                    if index not in action_frames:
+                        # 容器记录的帧数偏大时，末尾的帧号解码不到，用最近的已解码帧代替
+                        index = min(available, key=lambda i: abs(i - index))
+                    frames.append(action_frames[index])
+                data = torch.from_numpy(np.stack(frames, axis=0))
+                for crop_idx in range(num_spatial_crops):
+                    transform.transforms[1].set_spatial_index(crop_idx)
+                    data_list.append(transform(data))
+            video_data = torch.stack(data_list, dim=0).to(recognition_pipeline.device)
+            return recognition_pipeline.postprocess(recognition_pipeline.forward({'video_data': video_data}))
+        except (ImportError, AttributeError, KeyError, TypeError) as e:
+            print(f"无法复用解码帧进行行为识别，将单独解码视频: {str(e)}")
+            return None
 
-        cap.release()
+    def keyframe_indices(self, video_path, fps):
+        """
+        只解封装不解码，读取所有关键帧的帧号，未安装 PyAV 时返回空列表
+        """
+        if av is None:
+            return []
+        indices = []
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            start_pts = stream.start_time or 0
+            for packet in container.demux(stream):
+                if packet.is_keyframe and packet.pts is not None:
+                    indices.append(int(round(float((packet.pts - start_pts) * stream.time_base) * fps)))
+        return sorted(set(indices))
+
+    def split_segments(self, video_path, frame_count, fps, segment_seconds=10.0):
+        """
+        按目标时长切分视频，切分点对齐到关键帧，各片段解码时无需从上一个关键帧开始；
+        关键帧稀疏（或没有关键帧信息）时，过长的区间再按固定窗口切分
+        :return: [(起始帧号, 结束帧号), ...]，结束帧号不包含在片段内
+        """
+        target = max(1, int(round(segment_seconds * fps)))
+        keyframes = [index for index in self.keyframe_indices(video_path, fps) if 0 < index < frame_count]
+        aligned = [0]
+        for index in keyframes:
+            if index - aligned[-1] >= target:
+                aligned.append(index)
+        boundaries = []
+        for start, end in zip(aligned, aligned[1:] + [frame_count]):
+            boundaries.append(start)
+            if end - start >= 2 * target:
+                # 例如只有开头一个关键帧时，不能把整段视频作为一个片段
+                boundaries.extend(range(start + target, end - target // 2, target))
+        # 最后一段过短时并入前一段
+        if len(boundaries) > 1 and frame_count - boundaries[-1] < target / 2:
+            boundaries.pop()
+        boundaries.append(frame_count)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def recognize_segment(self, video_path, start_frame, end_frame, fps):
+        """
+        识别单个片段：按 modelscope 的采样规则在片段内取帧，只解码这些帧
+        :return: 动作标签
+        """
+        from modelscope.preprocessors.video import _interval_based_sampling
+        cfg = self.recognition_pipeline.cfg
+        num_views = cfg.TEST.NUM_ENSEMBLE_VIEWS
+        clip_indices = [
+            [start_frame + index for index in _interval_based_sampling(
+                end_frame - start_frame, fps, cfg.DATA.TARGET_FPS, clip_idx, num_views,
+                cfg.DATA.NUM_INPUT_FRAMES, cfg.DATA.SAMPLING_RATE, cfg.DATA.MINUS_INTERVAL
+            ).tolist()]
+            for clip_idx in range(num_views)
+        ]
+        frames = {}
+        cap = cv2.VideoCapture(video_path)
+        try:
+            position = start_frame
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            for target in sorted({index for clip in clip_indices for index in clip}):
+                while position < target and cap.grab():
+                    position += 1
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames[target] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                position += 1
+        finally:
+            cap.release()
+        if not frames:
+            return None
+        result = self._recognize_frames(clip_indices, frames)
+        return result.get('labels') if isinstance(result, dict) else result
+
+    def _get_segment_pool(self):
+        with self._pool_lock:
+            if self._segment_pool is None:
+                # 使用 spawn 启动工作进程，避免 fork 继承父进程中 torch/OpenCV 的线程状态
+                self._segment_pool = ProcessPoolExecutor(
+                    max_workers=self.segment_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_segment_worker,
+                    initargs=(self.action_recog_model_path, self.segment_threads)
+                )
+            return self._segment_pool
+
+    def _submit_segments(self, video_path, frame_count, fps, segment_seconds):
+        pool = self._get_segment_pool()
+        return [
+            (start, end, pool.submit(_recognize_segment, video_path, start, end, fps))
+            for start, end in self.split_segments(video_path, frame_count, fps, segment_seconds)
+        ]
+
+    def _collect_timeline(self, segment_futures, fps):
+        """
+        :return: {'labels': 按时长占比最多的动作, 'segments': [{'start', 'end', 'label'}, ...]}
+        """
+        timeline = []
+        durations = Counter()
+        for start, end, future in segment_futures:
+            try:
+                label = future.result()
+            except Exception as e:
+                print(f"片段 {start}-{end} 行为识别失败: {str(e)}")
+                label = None
+            timeline.append({'start': round(start / fps, 2), 'end': round(end / fps, 2), 'label': label})
+            if label is not None:
+                durations[label] += end - start
+        return {
+            'labels': durations.most_common(1)[0][0] if durations else None,
+            'segments': timeline
+        }
+
+    def close(self):
+        with self._pool_lock:
+            if self._segment_pool is not None:
+                self._segment_pool.shutdown(wait=False, cancel_futures=True)
+                self._segment_pool = None
+
+    def preprocess_video(self, video_path, output_folder):
+        self.process_video(video_path, output_folder, recognize_action=False)
         return output_folder
 
     def action_recognition(self, video_path):
-        recognition_pipeline = pipeline(Tasks.action_recognition, model=self.action_recog_model_path)
-        result = recognition_pipeline(video_path)
+        result = self.recognition_pipeline(video_path)
         return result
 
 
@@ -61,10 +556,8 @@ if __name__ == "__main__":
     # 创建 VideoProcessor 类的实例
     processor = VideoProcessor()
 
-    # 进行视频预处理
-    preprocessed_folder = processor.preprocess_video(local_video_path, output_folder)
-    print(f'finish')
-    # 进行行为识别
-    result = processor.action_recognition(local_video_path)
+    # 解码一遍视频，同时完成抽帧和行为识别
+    sampled, result = processor.process_video(local_video_path, output_folder)
+    print(f'finish, {sampled} frames')
 
-    print(f'recognition output: {result}.')
\ No newline at end of file
+    print(f'recognition output: {result}.')
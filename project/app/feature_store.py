@@ -0,0 +1,110 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# 声学特征矩阵的名称，每个特征的形状为 (特征维数, 帧数)
+AUDIO_FEATURE_NAMES = ('mfccs', 'spectral_centroids', 'spectral_bandwidth', 'spectral_flatness')
+
+
+class FeatureStore:
+    """
+    以 .npy 文件保存音频特征矩阵（文件头自带 shape/dtype），读取时内存映射，只解码请求的时间段。
+    目录按文件内容哈希 + 流水线版本划分，结果缓存命中时多个文件共用同一份特征。
+    """
+
+    def __init__(self, root_dir, dtype='float16'):
+        self.root_dir = root_dir
+        self.dtype = np.dtype(dtype)
+
+    def feature_dir(self, content_hash, pipeline_version):
+        safe_version = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in pipeline_version)
+        return os.path.join(self.root_dir, content_hash[:2], content_hash, safe_version)
+
+    def save(self, feature_dir, features, sr, hop_length):
+        """
+        :param feature_dir: 保存目录
+        :param features: {特征名: numpy 数组}
+        :param sr: 采样率
+        :param hop_length: 帧移，用于把时间换算成帧号
+        :return: 写入结果 JSON 的特征元数据
+        """
+        os.makedirs(feature_dir, exist_ok=True)
+        arrays = {}
+        for name, array in features.items():
+            array = np.ascontiguousarray(np.asarray(array, dtype=np.float32).astype(self.dtype))
+            path = os.path.join(feature_dir, f'{name}.npy')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+            arrays[name] = {'shape': list(array.shape), 'dtype': array.dtype.name}
+        meta = {
+            'dir': feature_dir,
+            'sr': sr,
+            'hop_length': hop_length,
+            'num_frames': max((info['shape'][-1] for info in arrays.values()), default=0),
+            'arrays': arrays
+        }
+        with open(os.path.join(feature_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return meta
+
+    @staticmethod
+    def load(meta, name):
+        """
+        内存映射方式打开特征矩阵，只有被切片访问的部分才会读入内存
+        """
+        return np.load(os.path.join(meta['dir'], f'{name}.npy'), mmap_mode='r')
+
+    @staticmethod
+    def exists(meta):
+        return bool(meta) and all(
+            os.path.exists(os.path.join(meta['dir'], f'{name}.npy')) for name in meta.get('arrays', {})
+        )
+
+    def read(self, meta, names=None, start=None, end=None, max_frames=None):
+        """
+        按时间段读取特征，帧数超过 max_frames 时按块取平均降采样
+        :param meta: save 返回的特征元数据
+        :param names: 要读取的特征名列表，默认全部
+        :param start: 起始时间（秒）
+        :param end: 结束时间（秒）
+        :param max_frames: 返回的最大帧数
+        :return: {'start_frame', 'end_frame', 'step', 'frame_duration', 'features': {特征名: 二维列表}}
+        """
+        frames_per_second = meta['sr'] / meta['hop_length']
+        num_frames = meta['num_frames']
+        start_frame = 0 if start is None else min(max(int(math.floor(start * frames_per_second)), 0), num_frames)
+        end_frame = num_frames if end is None else min(max(int(math.ceil(end * frames_per_second)), start_frame), num_frames)
+        length = end_frame - start_frame
+        step = max(1, math.ceil(length / max_frames)) if max_frames else 1
+
+        features = {}
+        for name in names or meta['arrays'].keys():
+            if name not in meta['arrays']:
+                continue
+            window = np.asarray(self.load(meta, name)[..., start_frame:end_frame], dtype=np.float32)
+            features[name] = downsample(window, step).tolist()
+        return {
+            'start_frame': start_frame,
+            'end_frame': end_frame,
+            'step': step,
+            'frame_duration': step / frames_per_second,
+            'features': features
+        }
+
+
+def downsample(array, step):
+    """
+    沿时间轴每 step 帧取平均，最后不足 step 的部分单独取平均
+    """
+    if step <= 1 or array.shape[-1] == 0:
+        return array
+    full = array.shape[-1] // step * step
+    pooled = array[..., :full].reshape(array.shape[:-1] + (-1, step)).mean(axis=-1)
+    if full < array.shape[-1]:
+        tail = array[..., full:].mean(axis=-1, keepdims=True)
+        pooled = np.concatenate([pooled, tail], axis=-1)
+    return pooled
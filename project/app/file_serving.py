@@ -0,0 +1,148 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+# mimetypes 在不同系统上的结果不一致，常用类型固定下来
+CONTENT_TYPES = {
+    '.txt': 'text/plain; charset=utf-8',
+    '.csv': 'text/csv; charset=utf-8',
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.wav': 'audio/wav',
+    '.mp3': 'audio/mpeg',
+    '.aac': 'audio/aac',
+    '.mp4': 'video/mp4',
+}
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def guess_content_type(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+
+def make_etag(stat):
+    # 由文件大小和修改时间生成，不需要读取文件内容
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    只支持单个区间，多区间请求按不支持处理，返回完整文件
+    :return: (起始字节, 结束字节)（包含结束字节）；不是可处理的区间时返回 None；区间无法满足时返回 False
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    if size == 0:
+        # 空文件没有任何可以满足的区间
+        return False
+    start, end = match.groups()
+    if start == '':
+        # bytes=-N 表示最后 N 个字节
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def is_not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        # 弱比较：忽略 W/ 前缀
+        return '*' in candidates or etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def range_is_current(request, etag, mtime):
+    """
+    If-Range 与当前文件不一致时忽略 Range，返回完整文件
+    """
+    if_range = request.headers.get('If-Range')
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return if_range_date is not None and int(mtime) <= if_range_date
+
+
+def iter_file_range(file_path, start, length, chunk_size=64 * 1024):
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, file_path, content_type=None, sendfile=None, accel_prefix='/protected-media/', accel_root=None):
+    """
+    从磁盘流式返回文件，支持 Range（206）、ETag / Last-Modified 条件请求
+    :param sendfile: None 由 Django 返回文件内容；'x-sendfile'（Apache/lighttpd）或 'x-accel-redirect'（Nginx）
+        只返回响应头，由反向代理读取文件，Range 和条件请求也由代理处理
+    :param accel_prefix: X-Accel-Redirect 模式下 Nginx internal location 的 URL 前缀
+    :param accel_root: 该 location 对应的磁盘目录，文件路径相对于它生成重定向地址
+    """
+    stat = os.stat(file_path)
+    content_type = content_type or guess_content_type(file_path)
+    etag = make_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    if is_not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        return response
+
+    if sendfile == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.path.abspath(file_path)
+    elif sendfile == 'x-accel-redirect':
+        relative_path = os.path.relpath(os.path.abspath(file_path), os.path.abspath(accel_root))
+        if relative_path.startswith('..'):
+            raise ValueError(f'文件不在 X-Accel-Redirect 根目录下: {file_path}')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(relative_path.replace(os.sep, '/'))
+    else:
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if range_header and range_is_current(request, etag, stat.st_mtime):
+            byte_range = parse_range(range_header, stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range is None:
+            # FileResponse 按块读取文件，服务器支持时使用 wsgi.file_wrapper（sendfile 系统调用）
+            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(iter_file_range(file_path, start, length), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(length)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    return response
@@ -0,0 +1,161 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+class BatchJob:
+    def __init__(self, file_ids):
+        self.id = uuid.uuid4().hex
+        self.file_ids = list(file_ids)
+        self.total = len(self.file_ids)
+        self.processed = 0
+        self.failed = []
+        self.status = 'pending'
+        self.created_at = time.time()
+        self.finished_at = None
+        # 进度变化时通知等待中的 SSE 连接
+        self.condition = threading.Condition()
+
+    def is_finished(self):
+        return self.status == 'finished'
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'failed': self.failed
+        }
+
+
+class JobManager:
+    """
+    后台批处理任务管理：提交文件 ID 后立即返回任务 ID，文件在线程池中并发处理。
+    有并发上限的模态（文本/图像/音频/视频）各自使用一个大小等于上限的线程池，
+    排队等待的文件不会占住线程，一种模态积压时不影响其他模态的任务。
+    使用线程池而不是进程池，是为了让所有任务共享进程内常驻的模型注册表。
+    """
+
+    def __init__(self, handler, modalities_of, max_workers=4, modality_limits=None, retention_seconds=3600,
+                 batch_handlers=None, batch_sizes=None):
+        """
+        :param handler: 处理单个文件的函数，参数为文件 ID
+        :param modalities_of: 根据文件 ID 列表返回 {文件 ID: 模态名称} 的函数，不存在的文件不在结果中
+        :param max_workers: 没有并发上限的模态共用的线程池大小
+        :param modality_limits: 每种模态的并发上限，例如 {'text': 1, 'image': 2}
+        :param retention_seconds: 已完成任务在内存中保留的时间
+        :param batch_handlers: 支持批量推理的模态及其处理函数，参数为文件 ID 列表，返回处理失败的文件 ID 列表
+        :param batch_sizes: 每种批量模态一批包含的文件数
+        """
+        self.handler = handler
+        self.modalities_of = modalities_of
+        self.batch_handlers = batch_handlers or {}
+        self.batch_sizes = batch_sizes or {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-job')
+        self.executors = {
+            modality: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f'batch-job-{modality}')
+            for modality, limit in (modality_limits or {}).items()
+        }
+        self.retention_seconds = retention_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_ids):
+        """
+        提交一批文件
+        :param file_ids: 文件 ID 列表
+        :return: BatchJob 实例
+        """
+        job = BatchJob(file_ids)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        if job.total == 0:
+            self._finish(job)
+            return job
+        job.status = 'running'
+        # 一次查询得到所有文件的模态
+        modalities = self.modalities_of(job.file_ids)
+        # 支持批量推理的模态按批提交，其余文件逐个提交
+        batches = {}
+        for file_id in job.file_ids:
+            modality = modalities.get(file_id)
+            if modality is None:
+                print(f'文件 ID 为 {file_id} 的文件不存在')
+                job.failed.append(file_id)
+                self._advance(job, 1)
+            elif modality in self.batch_handlers:
+                batches.setdefault(modality, []).append(file_id)
+            else:
+                self._executor_for(modality).submit(self._run, job, file_id)
+        for modality, file_ids in batches.items():
+            batch_size = self.batch_sizes.get(modality, 8)
+            for start in range(0, len(file_ids), batch_size):
+                self._executor_for(modality).submit(self._run_batch, job, modality, file_ids[start:start + batch_size])
+        return job
+
+    def _executor_for(self, modality):
+        return self.executors.get(modality, self.executor)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job, last_processed, timeout=15):
+        """
+        等待任务进度发生变化
+        :return: 当前已处理文件数
+        """
+        with job.condition:
+            if job.processed == last_processed and not job.is_finished():
+                job.condition.wait(timeout)
+            return job.processed
+
+    def _run(self, job, file_id):
+        try:
+            self.handler(file_id)
+        except Exception as e:
+            print(f'文件 ID 为 {file_id} 的文件处理失败: {str(e)}')
+            job.failed.append(file_id)
+        finally:
+            # 线程池中的线程不会经过请求结束的信号，需要手动回收数据库连接
+            close_old_connections()
+            self._advance(job, 1)
+
+    def _run_batch(self, job, modality, file_ids):
+        try:
+            failed = self.batch_handlers[modality](file_ids)
+            job.failed.extend(failed or [])
+        except Exception as e:
+            print(f'文件 ID 为 {file_ids} 的批次处理失败: {str(e)}')
+            job.failed.extend(file_ids)
+        finally:
+            close_old_connections()
+            self._advance(job, len(file_ids))
+
+    def _advance(self, job, count):
+        with job.condition:
+            job.processed += count
+            if job.processed >= job.total:
+                job.status = 'finished'
+                job.finished_at = time.time()
+            job.condition.notify_all()
+
+    def _finish(self, job):
+        with job.condition:
+            job.status = 'finished'
+            job.finished_at = time.time()
+            job.condition.notify_all()
+
+    def _prune(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
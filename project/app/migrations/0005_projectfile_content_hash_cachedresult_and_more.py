@@ -0,0 +1,46 @@
+# Generated by Django 4.2.19 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0004_fileprocessingresult"),
+        ("app", "0004_videoprocessingresult_textprocessingresult_and_more"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="FileProcessingResult",
+        ),
+        migrations.AddField(
+            model_name="projectfile",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name="CachedResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64)),
+                ("pipeline_version", models.CharField(max_length=64)),
+                ("result", models.JSONField()),
+                ("size_bytes", models.BigIntegerField(default=0)),
+                ("hits", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used_at", models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                "unique_together": {("content_hash", "pipeline_version")},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.19 on 2026-10-18 14:05
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+FEATURE_NAMES = ("mfccs", "spectral_centroids", "spectral_bandwidth", "spectral_flatness")
+
+
+def move_features_to_files(apps, schema_editor):
+    """
+    把已有结果中的 JSON 特征列表转存为 .npy 文件
+    """
+    import numpy as np
+
+    from app.feature_store import FeatureStore
+
+    config = getattr(settings, "AUDIO_FEATURES", {})
+    store = FeatureStore(
+        config.get("ROOT_DIR") or os.path.join(settings.MEDIA_ROOT, "features"),
+        dtype=config.get("DTYPE", "float16"),
+    )
+    AudioProcessingResult = apps.get_model("app", "AudioProcessingResult")
+    for row in AudioProcessingResult.objects.select_related("project_file").iterator():
+        arrays = {
+            name: np.asarray(getattr(row, name), dtype=np.float32)
+            for name in FEATURE_NAMES
+            if getattr(row, name) is not None
+        }
+        if arrays:
+            key = row.project_file.content_hash or f"file-{row.project_file_id}"
+            row.features = store.save(store.feature_dir(key, "migrated"), arrays, sr=16000, hop_length=512)
+        if isinstance(row.result, dict):
+            row.result = {k: v for k, v in row.result.items() if k not in FEATURE_NAMES}
+            if row.features:
+                row.result["features"] = row.features
+        row.save(update_fields=["features", "result"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0005_projectfile_content_hash_cachedresult_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="audioprocessingresult",
+            name="features",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(move_features_to_files, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="audioprocessingresult",
+            name="mfccs",
+        ),
+        migrations.RemoveField(
+            model_name="audioprocessingresult",
+            name="spectral_bandwidth",
+        ),
+        migrations.RemoveField(
+            model_name="audioprocessingresult",
+            name="spectral_centroids",
+        ),
+        migrations.RemoveField(
+            model_name="audioprocessingresult",
+            name="spectral_flatness",
+        ),
+    ]
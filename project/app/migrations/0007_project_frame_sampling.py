@@ -0,0 +1,27 @@
+# Generated by Django 4.2.19 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0006_audioprocessingresult_features"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="frame_sampling",
+            field=models.CharField(
+                choices=[
+                    ("interval", "固定间隔"),
+                    ("seek", "按时间定位"),
+                    ("keyframe", "关键帧"),
+                    ("scene", "场景变化"),
+                ],
+                default="interval",
+                max_length=20,
+            ),
+        ),
+    ]
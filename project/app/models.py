@@ -1,4 +1,6 @@
 # 2222/project/app/models.py
+import uuid
+
 from django.db import models
 
 class Project(models.Model):
@@ -12,6 +14,14 @@ class Project(models.Model):
         ('video', '视频'),
     ]
     type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='text')
+    # 视频项目的抽帧策略
+    FRAME_SAMPLING_CHOICES = [
+        ('interval', '固定间隔'),
+        ('seek', '按时间定位'),
+        ('keyframe', '关键帧'),
+        ('scene', '场景变化'),
+    ]
+    frame_sampling = models.CharField(max_length=20, choices=FRAME_SAMPLING_CHOICES, default='interval')
 
 
 class ProjectFile(models.Model):
@@ -20,6 +30,8 @@ class ProjectFile(models.Model):
     status = models.CharField(max_length=20, default='待处理')
     processed_at = models.DateTimeField(null=True, blank=True)
     local_path = models.CharField(max_length=255, null=True, blank=True)
+    # 文件内容的 SHA-256，上传时边写边算，用于跨项目复用处理结果
+    content_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
 
 class TextProcessingResult(models.Model):
     project_file = models.OneToOneField(ProjectFile, on_delete=models.CASCADE)
@@ -37,12 +49,47 @@ class AudioProcessingResult(models.Model):
     project_file = models.OneToOneField(ProjectFile, on_delete=models.CASCADE)
     result = models.JSONField()
     transcription = models.TextField(null=True, blank=True)
-    mfccs = models.JSONField(null=True, blank=True)
-    spectral_centroids = models.JSONField(null=True, blank=True)
-    spectral_bandwidth = models.JSONField(null=True, blank=True)
-    spectral_flatness = models.JSONField(null=True, blank=True)
+    # 特征矩阵保存在磁盘上的 .npy 文件中，这里只记录目录、采样率、帧移以及各矩阵的 shape/dtype
+    features = models.JSONField(null=True, blank=True)
 
 class VideoProcessingResult(models.Model):
     project_file = models.OneToOneField(ProjectFile, on_delete=models.CASCADE)
     result = models.JSONField()
-    action_result = models.JSONField(null=True, blank=True)
\ No newline at end of file
+    action_result = models.JSONField(null=True, blank=True)
+
+class CachedResult(models.Model):
+    # 以文件内容哈希 + 流水线版本为键缓存处理结果，同一文件出现在不同项目中时不再重复推理
+    content_hash = models.CharField(max_length=64)
+    pipeline_version = models.CharField(max_length=64)
+    result = models.JSONField()
+    size_bytes = models.BigIntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('content_hash', 'pipeline_version')
+
+
+class UploadSession(models.Model):
+    # 断点续传的上传会话：一次可以包含多个文件，全部上传完成后统一创建 ProjectFile
+    STATUS_CHOICES = [
+        ('uploading', '上传中'),
+        ('completed', '已完成'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='upload_sessions')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class UploadedFile(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='files')
+    file_name = models.CharField(max_length=255)
+    local_path = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # 已连续写入的字节数，下一个分块必须从这里开始
+    received = models.BigIntegerField(default=0)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)
+
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import shutil
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import CachedResult, AudioProcessingResult, VideoProcessingResult
+
+
+class ResultCache:
+    """
+    按文件内容哈希 + 流水线版本缓存处理结果。
+    总大小超过上限时按最近使用时间淘汰旧结果，命中率统计保存在进程内存中。
+    结果引用的磁盘目录（音频特征、视频帧存储）同时被各文件的处理结果引用，不计入条目大小，
+    淘汰时只删除已经没有任何结果引用的目录。
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, content_hash, pipeline_version):
+        """
+        :return: 缓存的处理结果，未命中时返回 None
+        """
+        if not content_hash:
+            return None
+        entry = CachedResult.objects.filter(content_hash=content_hash, pipeline_version=pipeline_version).first()
+        with self._lock:
+            self._stats['hits' if entry else 'misses'] += 1
+        if entry is None:
+            return None
+        CachedResult.objects.filter(pk=entry.pk).update(hits=F('hits') + 1, last_used_at=timezone.now())
+        return entry.result
+
+    def put(self, content_hash, pipeline_version, result):
+        if not content_hash:
+            return
+        size_bytes = len(json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        if self.max_bytes is not None and size_bytes > self.max_bytes:
+            return
+        try:
+            with transaction.atomic():
+                CachedResult.objects.update_or_create(
+                    content_hash=content_hash,
+                    pipeline_version=pipeline_version,
+                    defaults={'result': result, 'size_bytes': size_bytes}
+                )
+        except IntegrityError:
+            # 并发处理同一个文件时另一个线程已经写入
+            return
+        with self._lock:
+            self._stats['stores'] += 1
+        self._evict_over_limit()
+
+    def _evict_over_limit(self):
+        if self.max_bytes is None:
+            return
+        total = CachedResult.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+        if total <= self.max_bytes:
+            return
+        evict_ids = []
+        for pk, size_bytes in CachedResult.objects.order_by('last_used_at').values_list('pk', 'size_bytes').iterator():
+            if total <= self.max_bytes:
+                break
+            evict_ids.append(pk)
+            total -= size_bytes
+        evicted = CachedResult.objects.filter(pk__in=evict_ids)
+        evicted_dirs = {path for result in evicted.values_list('result', flat=True) for path in asset_dirs(result)}
+        evicted.delete()
+        for path in evicted_dirs:
+            if not is_asset_dir_referenced(path):
+                shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self._stats['evictions'] += len(evict_ids)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        aggregate = CachedResult.objects.aggregate(total=Sum('size_bytes'), total_hits=Sum('hits'))
+        stats['entries'] = CachedResult.objects.count()
+        stats['size_bytes'] = aggregate['total'] or 0
+        stats['max_bytes'] = self.max_bytes
+        stats['lifetime_hits'] = aggregate['total_hits'] or 0
+        return stats
+
+
+def asset_dirs(result):
+    """
+    结果中引用的磁盘目录：顶层带 'dir' 键的字典，例如 features（音频特征）和 frames（视频帧存储）
+    """
+    if not isinstance(result, dict):
+        return []
+    return [value['dir'] for value in result.values() if isinstance(value, dict) and value.get('dir')]
+
+
+def is_asset_dir_referenced(path):
+    """
+    目录按内容哈希存放，同一内容的文件共用一份；仍被缓存条目或任何文件的处理结果引用时不能删除
+    """
+    return (
+        CachedResult.objects.filter(Q(result__features__dir=path) | Q(result__frames__dir=path)).exists() or
+        AudioProcessingResult.objects.filter(features__dir=path).exists() or
+        VideoProcessingResult.objects.filter(result__frames__dir=path).exists()
+    )
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    流式计算已有文件的 SHA-256
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
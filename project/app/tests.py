@@ -1,21 +1,572 @@
-import tabula
-import pandas as pd
+import json
+import os
+import tempfile
+import threading
 
-pdf_path = r"F:\a\apaper\project\project\algorithm\test_media\LLM Post-Training- A Deep Dive into Reasoning Large Language Models-5.pdf"
+import numpy as np
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
 
-# 指定特定页面
-tables = tabula.read_pdf(pdf_path, pages='1')  # 只提取第1-3页的表格
+from algorithm.FrameStore import FrameStore, FrameStoreWriter
+from algorithm.ModelRegistry import ModelRegistry
+from .feature_store import FeatureStore, downsample
+from .file_serving import parse_range, serve_file
+from .jobs import JobManager
+from .models import Project, ProjectFile, AudioProcessingResult, VideoProcessingResult, CachedResult
+from .result_cache import ResultCache
 
-# 指定表格区域 (top, left, bottom, right)，以页面百分比形式
-tables = tabula.read_pdf(pdf_path, area=(0, 0, 100, 100), pages='1')
 
-# 使用lattice模式（适用于有边框的表格）
-# tables = tabula.read_pdf(pdf_path, pages='all', lattice=True)
+class ListQueryCountTests(TestCase):
+    """
+    列表接口的查询次数只与页数有关，与项目数、文件数无关
+    """
 
-# 使用stream模式（适用于没有边框的表格）
-tables = tabula.read_pdf(pdf_path, pages='all', stream=True)
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            project = Project.objects.create(name=f'project-{i}', type='image')
+            ProjectFile.objects.bulk_create([
+                ProjectFile(project=project, file_name=f'{j}.jpg', local_path=f'/tmp/{i}/{j}.jpg',
+                            status='已处理' if j % 2 else '待处理')
+                for j in range(4)
+            ])
 
-# 提取后，转换为DataFrame列表
-for i, table in enumerate(tables):
-    print(f"表格 {i+1} 的形状: {table.shape}")
-    print(table.head())
+    def get_json(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return response.json()
+
+    def test_get_projects_two_queries_per_page(self):
+        # 一次查项目，一次查这一页所有项目的文件
+        with self.assertNumQueries(2):
+            data = self.get_json(reverse('get_projects'))
+        self.assertEqual(len(data['projects']), 5)
+        self.assertEqual(sum(len(project['files']) for project in data['projects']), 20)
+
+        with self.assertNumQueries(2):
+            data = self.get_json(reverse('get_projects'), limit=2, status='已处理')
+        self.assertEqual(len(data['projects']), 2)
+        self.assertTrue(all(len(project['files']) == 2 for project in data['projects']))
+        self.assertEqual(data['next_cursor'], data['projects'][-1]['id'])
+
+    def test_get_projects_stream(self):
+        # 5 个项目每页 2 个，共 3 页
+        with self.assertNumQueries(6):
+            data = self.get_json(reverse('get_projects'), stream=1, limit=2)
+        self.assertEqual(len(data['projects']), 5)
+
+    def test_get_project_list_one_query_per_page(self):
+        with self.assertNumQueries(1):
+            data = self.get_json(reverse('get_project_list'))
+        self.assertEqual(len(data['projects']), 5)
+        self.assertIsNone(data['next_cursor'])
+
+        with self.assertNumQueries(1):
+            first = self.get_json(reverse('get_project_list'), limit=3)
+        with self.assertNumQueries(1):
+            second = self.get_json(reverse('get_project_list'), limit=3, cursor=first['next_cursor'])
+        self.assertEqual(len(first['projects']) + len(second['projects']), 5)
+        self.assertIsNone(second['next_cursor'])
+
+        with self.assertNumQueries(3):
+            data = self.get_json(reverse('get_project_list'), stream=1, limit=2)
+        self.assertEqual(len(data['projects']), 5)
+
+    def test_get_project_files_one_query_per_page(self):
+        url = reverse('get_project_files', args=['project-0'])
+        # 一次查项目本身，之后每页一次
+        with self.assertNumQueries(2):
+            data = self.get_json(url)
+        self.assertEqual(len(data['files']), 4)
+        self.assertEqual(data['project_type'], 'image')
+
+        with self.assertNumQueries(2):
+            data = self.get_json(url, limit=3)
+        self.assertEqual(len(data['files']), 3)
+        self.assertIsNotNone(data['next_cursor'])
+
+        with self.assertNumQueries(3):
+            data = self.get_json(url, stream=1, limit=2)
+        self.assertEqual(len(data['files']), 4)
+
+
+class UploadNameTests(TestCase):
+    """
+    上传写入会话专属的临时文件，完成前不影响同名文件；重名的文件在登记时被拒绝
+    """
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.final_path = os.path.join(media_root.name, 'uploads', 'a.jpg')
+
+    def initiate(self, *names):
+        return self.client.post(reverse('initiate_upload'), json.dumps({
+            'project_name': 'uploads', 'project_type': 'image',
+            'files': [{'name': name, 'size': 3} for name in names]
+        }), content_type='application/json')
+
+    def upload(self, session):
+        upload_id, file_id = session['upload_id'], session['files'][0]['file_id']
+        response = self.client.put(reverse('upload_chunk', args=[upload_id, file_id]) + '?offset=0',
+                                   b'abc', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 200)
+        return self.client.post(reverse('complete_upload', args=[upload_id]))
+
+    def test_pending_upload_does_not_touch_final_path(self):
+        session = self.initiate('a.jpg').json()
+        self.assertFalse(os.path.exists(self.final_path))
+        response = self.upload(session)
+        self.assertEqual(response.status_code, 200)
+        with open(self.final_path, 'rb') as f:
+            self.assertEqual(f.read(), b'abc')
+        self.assertEqual(os.listdir(os.path.dirname(self.final_path)), ['a.jpg'])
+
+    def test_duplicate_names_rejected(self):
+        self.assertEqual(self.initiate('a.jpg', 'a.jpg').status_code, 409)
+        session = self.initiate('a.jpg').json()
+        # 另一个会话正在上传同名文件
+        response = self.initiate('a.jpg', 'b.jpg')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], ['a.jpg'])
+        self.assertEqual(self.upload(session).status_code, 200)
+        # 同名文件已经存在
+        self.assertEqual(self.initiate('a.jpg').status_code, 409)
+        self.assertEqual(ProjectFile.objects.filter(file_name='a.jpg').count(), 1)
+
+    def test_complete_rejects_name_taken_during_upload(self):
+        session = self.initiate('a.jpg').json()
+        project = Project.objects.get(name='uploads')
+        ProjectFile.objects.create(project=project, file_name='a.jpg', local_path=self.final_path)
+        response = self.upload(session)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflicts'], ['a.jpg'])
+        self.assertEqual(ProjectFile.objects.filter(file_name='a.jpg').count(), 1)
+
+
+class ResultCacheEvictionTests(TestCase):
+    """
+    淘汰缓存条目不能删除仍被文件处理结果引用的特征和帧目录
+    """
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.project = Project.objects.create(name='cache', type='audio')
+
+    def save_features(self, name):
+        return FeatureStore(self.root).save(
+            os.path.join(self.root, 'features', name), {'mfccs': np.ones((13, 100))}, sr=16000, hop_length=512
+        )
+
+    def save_frames(self, name):
+        folder = os.path.join(self.root, 'frames', name)
+        writer = FrameStoreWriter(folder, fps=25)
+        for frame_index in (0, 4):
+            writer.append(np.zeros((8, 8, 3), dtype=np.uint8), frame_index)
+        writer.close()
+        return {'dir': folder, 'count': 2}
+
+    def test_eviction_keeps_referenced_assets(self):
+        features = self.save_features('audio')
+        frames = self.save_frames('video')
+        orphan = self.save_features('orphan')
+        audio_file = ProjectFile.objects.create(project=self.project, file_name='a.wav', local_path='a.wav')
+        video_file = ProjectFile.objects.create(project=self.project, file_name='v.mp4', local_path='v.mp4')
+        AudioProcessingResult.objects.create(project_file=audio_file, result={'features': features}, features=features)
+        VideoProcessingResult.objects.create(project_file=video_file, result={'frames': frames})
+
+        cache = ResultCache(max_bytes=1500)
+        cache.put('a' * 64, 'audio', {'features': features})
+        cache.put('b' * 64, 'video', {'frames': frames})
+        cache.put('c' * 64, 'audio', {'features': orphan})
+        # 第四个条目超出上限，前面三个条目按最近使用时间被淘汰
+        cache.put('d' * 64, 'text', {'text': 'x' * 1400})
+        self.assertEqual(list(CachedResult.objects.values_list('pipeline_version', flat=True)), ['text'])
+        # 没有任何结果引用的目录随条目一起删除
+        self.assertFalse(os.path.exists(orphan['dir']))
+
+        response = self.client.get(reverse('get_audio_features', args=['cache', 'a.wav']), {'max_frames': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(np.asarray(response.json()['features']['mfccs']).shape, (13, 10))
+        response = self.client.get(reverse('video_frames', args=['cache', 'v.mp4']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([frame['frame_index'] for frame in response.json()['frames']], [0, 4])
+        response = self.client.get(reverse('video_frame', args=['cache', 'v.mp4', 1]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Frame-Index'], '4')
+
+    def test_size_excludes_asset_dirs(self):
+        features = self.save_features('audio')
+        ResultCache().put('a' * 64, 'audio', {'features': features})
+        entry = CachedResult.objects.get()
+        self.assertLess(entry.size_bytes, 1024)
+
+
+class PipelineVersionTests(TestCase):
+
+    def test_pdf_version_depends_on_text_layer(self):
+        from .views import get_pipeline_version
+        with override_settings(PDF_USE_TEXT_LAYER=True):
+            text_layer = get_pipeline_version('a.pdf')
+        with override_settings(PDF_USE_TEXT_LAYER=False):
+            ocr = get_pipeline_version('a.pdf')
+        self.assertNotEqual(text_layer, ocr)
+
+
+class FileServingTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.file_path = os.path.join(self.root, 'a.txt')
+        with open(self.file_path, 'wb') as f:
+            f.write(b'0123456789')
+        self.factory = RequestFactory()
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range('bytes=2-4', 10), (2, 4))
+        self.assertEqual(parse_range('bytes=5-', 10), (5, 9))
+        self.assertEqual(parse_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(parse_range('bytes=-20', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=2-100', 10), (2, 9))
+        self.assertIsNone(parse_range('bytes=0-1,3-4', 10))
+        self.assertIsNone(parse_range('bytes=-', 10))
+        self.assertIs(parse_range('bytes=10-', 10), False)
+        self.assertIs(parse_range('bytes=-0', 10), False)
+        self.assertIs(parse_range('bytes=4-2', 10), False)
+        # 空文件上任何区间都无法满足
+        self.assertIs(parse_range('bytes=-5', 0), False)
+        self.assertIs(parse_range('bytes=0-', 0), False)
+
+    def test_serve_range_and_full(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=2-4'), self.file_path)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+
+        response = serve_file(self.factory.get('/'), self.file_path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        response.close()
+
+    def test_serve_unsatisfiable_range(self):
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=20-'), self.file_path)
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+        empty_path = os.path.join(self.root, 'empty.txt')
+        open(empty_path, 'wb').close()
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=-5'), empty_path)
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_serve_conditional(self):
+        etag = serve_file(self.factory.get('/'), self.file_path)['ETag']
+        response = serve_file(self.factory.get('/', HTTP_IF_NONE_MATCH=etag), self.file_path)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # If-Range 与当前文件不一致时返回完整文件
+        response = serve_file(self.factory.get('/', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"'), self.file_path)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_sendfile_headers(self):
+        response = serve_file(self.factory.get('/'), self.file_path, sendfile='x-accel-redirect',
+                              accel_prefix='/protected-media/', accel_root=self.root)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/a.txt')
+        with self.assertRaises(ValueError):
+            serve_file(self.factory.get('/'), self.file_path, sendfile='x-accel-redirect',
+                       accel_root=os.path.join(self.root, 'other'))
+
+
+class FileContentTests(TestCase):
+
+    def test_file_outside_accel_root_is_streamed(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        file_path = os.path.join(tmp.name, 'a.txt')
+        with open(file_path, 'wb') as f:
+            f.write(b'abc')
+        project = Project.objects.create(name='serving', type='text')
+        ProjectFile.objects.create(project=project, file_name='a.txt', local_path=file_path)
+        serving = {'SENDFILE': 'x-accel-redirect', 'ACCEL_REDIRECT_ROOT': os.path.join(tmp.name, 'media')}
+        with override_settings(FILE_SERVING=serving):
+            response = self.client.get(reverse('get_file_content', args=['serving', 'a.txt']))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Accel-Redirect', response)
+        self.assertEqual(b''.join(response.streaming_content), b'abc')
+        response.close()
+
+
+class FakeModel:
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ModelRegistryTests(SimpleTestCase):
+
+    def make_registry(self, budget_mb, **sizes):
+        registry = ModelRegistry(memory_budget_mb=budget_mb)
+        self.models = {}
+
+        def loader(name):
+            def load():
+                self.models[name] = FakeModel(name)
+                return self.models[name]
+            return load
+
+        for name, size_mb in sizes.items():
+            registry.register(name, loader(name), size_mb=size_mb)
+        return registry
+
+    def resident(self, registry):
+        return [model['name'] for model in registry.stats()['models']]
+
+    def test_loads_once_and_reuses(self):
+        registry = self.make_registry(None, a=10)
+        first = registry.get('a')
+        with registry.use('a') as model:
+            self.assertIs(model, first)
+        stats = registry.stats()
+        self.assertEqual((stats['loads'], stats['hits']), (1, 1))
+        with self.assertRaises(KeyError):
+            registry.get('missing')
+
+    def test_evicts_least_recently_used_over_budget(self):
+        registry = self.make_registry(25, a=10, b=10, c=10)
+        registry.get('a')
+        registry.get('b')
+        registry.get('a')
+        registry.get('c')
+        # b 最久未使用，被淘汰并关闭
+        self.assertEqual(self.resident(registry), ['a', 'c'])
+        self.assertTrue(self.models['b'].closed)
+        self.assertFalse(self.models['a'].closed)
+        self.assertEqual(registry.stats()['evictions'], 1)
+        self.assertEqual(registry.stats()['resident_mb'], 20)
+
+    def test_models_in_use_are_not_evicted(self):
+        registry = self.make_registry(15, a=10, b=10)
+        with registry.use('a'):
+            registry.get('b')
+            # a 正在使用，只能先淘汰 b，暂时超出预算
+            self.assertEqual(self.resident(registry), ['a'])
+            self.assertFalse(registry.evict('a'))
+        self.assertTrue(registry.evict('a'))
+        self.assertTrue(self.models['a'].closed)
+        self.assertEqual(self.resident(registry), [])
+
+    def test_use_serializes_non_thread_safe_models(self):
+        registry = self.make_registry(None, a=10)
+        registry.register('safe', lambda: FakeModel('safe'), size_mb=1, thread_safe=True)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with registry.use('a'):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        entered.wait(5)
+        lock = registry._entries['a'].lock
+        self.assertTrue(lock.locked())
+        self.assertFalse(lock.acquire(blocking=False))
+        with registry.use('safe'):
+            self.assertIsNone(registry._entries['safe'].lock)
+        release.set()
+        thread.join(5)
+        self.assertFalse(lock.locked())
+
+
+class JobManagerTests(SimpleTestCase):
+
+    def wait_finished(self, manager, job):
+        processed = job.processed
+        for _ in range(50):
+            if job.is_finished():
+                break
+            processed = manager.wait(job, processed, timeout=0.1)
+        self.assertTrue(job.is_finished())
+
+    def test_per_modality_executors(self):
+        modalities = {1: 'video', 2: 'text', 3: 'text'}
+        threads = {}
+        release = threading.Event()
+
+        def handler(file_id):
+            threads[file_id] = threading.current_thread().name
+            if modalities[file_id] == 'video':
+                release.wait(5)
+
+        manager = JobManager(handler, lambda ids: {i: modalities[i] for i in ids if i in modalities},
+                             modality_limits={'video': 1, 'text': 1})
+        job = manager.submit([1, 2, 3])
+        # 视频文件占住自己的线程池时，文本文件照常处理
+        for _ in range(50):
+            if job.processed == 2:
+                break
+            manager.wait(job, job.processed, timeout=0.1)
+        self.assertEqual(job.processed, 2)
+        self.assertFalse(job.is_finished())
+        release.set()
+        self.wait_finished(manager, job)
+        self.assertTrue(threads[1].startswith('batch-job-video'))
+        self.assertTrue(threads[2].startswith('batch-job-text'))
+
+    def test_batches_and_failures(self):
+        batches = []
+
+        def batch_handler(file_ids):
+            batches.append(list(file_ids))
+            return [file_id for file_id in file_ids if file_id == 3]
+
+        def handler(file_id):
+            raise RuntimeError('处理失败')
+
+        modalities = {1: 'image', 2: 'image', 3: 'image', 4: 'image', 5: 'image', 6: 'audio'}
+        manager = JobManager(handler, lambda ids: {i: modalities[i] for i in ids if i in modalities},
+                             batch_handlers={'image': batch_handler}, batch_sizes={'image': 2})
+        # 7 不存在
+        job = manager.submit([1, 2, 3, 4, 5, 6, 7])
+        self.wait_finished(manager, job)
+        self.assertEqual(sorted(batches), [[1, 2], [3, 4], [5]])
+        self.assertEqual(job.to_dict()['processed'], 7)
+        self.assertEqual(sorted(job.failed), [3, 6, 7])
+        self.assertIs(manager.get(job.id), job)
+
+    def test_empty_job_finishes_immediately(self):
+        manager = JobManager(lambda file_id: None, lambda ids: {})
+        job = manager.submit([])
+        self.assertTrue(job.is_finished())
+        self.assertEqual(job.to_dict()['total'], 0)
+
+
+class FeatureStoreTests(TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = FeatureStore(tmp.name, dtype='float16')
+        # sr / hop_length = 10 帧每秒
+        self.mfccs = np.arange(2 * 100, dtype=np.float32).reshape(2, 100)
+        self.meta = self.store.save(
+            self.store.feature_dir('ab' * 32, 'audio.wav:v2'),
+            {'mfccs': self.mfccs, 'spectral_centroids': np.ones((1, 100))}, sr=1000, hop_length=100
+        )
+
+    def test_save_writes_npy_and_meta(self):
+        self.assertTrue(self.store.exists(self.meta))
+        self.assertEqual(self.meta['num_frames'], 100)
+        self.assertEqual(self.meta['arrays']['mfccs'], {'shape': [2, 100], 'dtype': 'float16'})
+        with open(os.path.join(self.meta['dir'], 'meta.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), self.meta)
+        loaded = FeatureStore.load(self.meta, 'mfccs')
+        self.assertIsInstance(loaded, np.memmap)
+        np.testing.assert_array_equal(loaded, self.mfccs.astype(np.float16))
+        self.assertFalse(FeatureStore.exists(None))
+        self.assertFalse(FeatureStore.exists(dict(self.meta, dir=self.meta['dir'] + '-missing')))
+
+    def test_read_time_range(self):
+        result = self.store.read(self.meta, names=['mfccs', 'unknown'], start=1.0, end=2.0)
+        self.assertEqual((result['start_frame'], result['end_frame'], result['step']), (10, 20, 1))
+        self.assertEqual(list(result['features']), ['mfccs'])
+        np.testing.assert_array_equal(result['features']['mfccs'], self.mfccs[:, 10:20])
+        # 超出范围的时间被截断到特征长度内
+        result = self.store.read(self.meta, start=-5, end=50)
+        self.assertEqual((result['start_frame'], result['end_frame']), (0, 100))
+        self.assertEqual(set(result['features']), {'mfccs', 'spectral_centroids'})
+
+    def test_read_downsamples_to_max_frames(self):
+        result = self.store.read(self.meta, names=['mfccs'], max_frames=30)
+        self.assertEqual(result['step'], 4)
+        self.assertAlmostEqual(result['frame_duration'], 0.4)
+        self.assertEqual(np.asarray(result['features']['mfccs']).shape, (2, 25))
+
+    def test_downsample_averages_tail(self):
+        array = np.arange(7, dtype=np.float32)[None]
+        np.testing.assert_array_equal(downsample(array, 3), [[1, 4, 6]])
+        self.assertIs(downsample(array, 1), array)
+        self.assertEqual(downsample(np.zeros((2, 0)), 3).shape, (2, 0))
+
+    def test_endpoint_rejects_non_finite_range_and_clamps_max_frames(self):
+        project = Project.objects.create(name='features', type='audio')
+        project_file = ProjectFile.objects.create(project=project, file_name='a.wav', local_path='a.wav')
+        AudioProcessingResult.objects.create(project_file=project_file, result={}, features=self.meta)
+        url = reverse('get_audio_features', args=['features', 'a.wav'])
+        self.assertEqual(self.client.get(url, {'start': 'nan'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '0', 'end': 'inf'}).status_code, 400)
+        response = self.client.get(url, {'names': 'mfccs', 'max_frames': 0, 'end': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(np.asarray(response.json()['features']['mfccs']).shape, (2, 1))
+        self.assertIsNone(response.json()['next_start'])
+
+
+class FrameStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.folder = os.path.join(self.root, 'ab', 'abcd', 'video.mp4_v2')
+        os.makedirs(os.path.dirname(self.folder))
+
+    def write(self, frame_indices, value=0, fps=10):
+        with FrameStoreWriter(self.folder, fps=fps) as writer:
+            for i, frame_index in enumerate(frame_indices):
+                writer.append(np.full((4, 6, 3), value + i, dtype=np.uint8), frame_index)
+
+    def test_read_range_find_and_timestamp(self):
+        self.write([0, 4, 8, 12])
+        store = FrameStore(self.folder)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.frames.shape, (4, 4, 6, 3))
+        self.assertEqual(int(store.get(2)[0, 0, 0]), 2)
+        self.assertEqual([int(frame[0, 0, 0]) for frame in store.range(1, 3)], [1, 2])
+        self.assertEqual(store.timestamp(3), 1.2)
+        self.assertEqual([store.find(n) for n in (0, 3, 4, 11, 100)], [0, 0, 1, 2, 3])
+        self.assertTrue(store.encode(0).startswith(b'\xff\xd8'))
+        self.assertTrue(store.encode(0, ext='.png').startswith(b'\x89PNG'))
+
+    def test_rewrite_swaps_whole_directory(self):
+        self.write([0, 4], value=10)
+        old = FrameStore(self.folder)
+        self.write([0, 2, 4], value=50)
+        # 新旧文件不会混在一起，临时目录和旧目录都已清理
+        store = FrameStore(self.folder)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(int(store.get(0)[0, 0, 0]), 50)
+        self.assertEqual(os.listdir(os.path.dirname(self.folder)), [os.path.basename(self.folder)])
+        # 已打开的读者继续读取旧的映射
+        self.assertEqual(len(old), 2)
+
+    def test_failed_write_keeps_previous_store(self):
+        self.write([0, 4], value=10)
+        with self.assertRaises(ValueError):
+            with FrameStoreWriter(self.folder, fps=10) as writer:
+                writer.append(np.zeros((4, 6, 3), dtype=np.uint8), 0)
+                writer.append(np.zeros((2, 2, 3), dtype=np.uint8), 1)
+        self.assertEqual(len(FrameStore(self.folder)), 2)
+        self.assertEqual(os.listdir(os.path.dirname(self.folder)), [os.path.basename(self.folder)])
+
+    def test_empty_store(self):
+        self.write([])
+        store = FrameStore(self.folder)
+        self.assertTrue(FrameStore.exists(self.folder))
+        self.assertEqual(len(store), 0)
+        self.assertFalse(FrameStore.exists(os.path.join(self.root, 'missing')))
@@ -0,0 +1,257 @@
+import hashlib
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Project, UploadSession, UploadedFile, ProjectFile
+
+
+class UploadConflict(Exception):
+    """
+    分块的偏移量与服务器已接收的字节数不一致，客户端需要按 received 重新发送
+    """
+
+    def __init__(self, received):
+        super().__init__(f'偏移量不匹配，服务器已接收 {received} 字节')
+        self.received = received
+
+
+class UploadNameConflict(ValueError):
+    """
+    文件名与项目中已有的文件或其他未完成上传会话中的文件重名
+    """
+
+    def __init__(self, names):
+        super().__init__(f'以下文件已存在或正在上传: {", ".join(names)}')
+        self.names = names
+
+
+def part_path(upload_file):
+    """
+    上传过程中数据写入会话专属的临时文件，完成时才替换到最终路径，
+    放弃的上传不会覆盖同名的已有文件，两个会话也不会写入同一个文件
+    """
+    return f'{upload_file.local_path}.{upload_file.session_id}.part'
+
+
+def conflicting_names(project, names):
+    """
+    :return: 与项目中已有文件、其他未完成会话中的文件重名，或在 names 中重复出现的文件名
+    """
+    taken = set(ProjectFile.objects.filter(project=project, file_name__in=names).values_list('file_name', flat=True))
+    taken.update(UploadedFile.objects.filter(
+        session__project=project, session__status='uploading', file_name__in=names
+    ).values_list('file_name', flat=True))
+    seen = set()
+    for name in names:
+        if name in seen:
+            taken.add(name)
+        seen.add(name)
+    return sorted(taken)
+
+
+class IncrementalHashes:
+    """
+    进程内缓存每个上传文件的增量 SHA-256 状态。
+    hashlib 的中间状态无法持久化，分块落到其他工作进程或服务重启后，从磁盘上已写入的部分重新计算。
+    """
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def take(self, upload_file):
+        """
+        取出与已接收字节数对应的哈希状态
+        """
+        with self._lock:
+            entry = self._hashes.pop(upload_file.id, None)
+        if entry is not None and entry[0] == upload_file.received:
+            return entry[1]
+        sha256 = hashlib.sha256()
+        remaining = upload_file.received
+        if remaining:
+            with open(part_path(upload_file), 'rb') as f:
+                while remaining > 0:
+                    chunk = f.read(min(1024 * 1024, remaining))
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    remaining -= len(chunk)
+        return sha256
+
+    def put(self, upload_file, sha256):
+        with self._lock:
+            self._hashes[upload_file.id] = (upload_file.received, sha256)
+
+    def discard(self, file_ids):
+        with self._lock:
+            for file_id in file_ids:
+                self._hashes.pop(file_id, None)
+
+
+upload_hashes = IncrementalHashes()
+
+
+def create_session(project, files):
+    """
+    :param project: Project 实例
+    :param files: [{'name': 文件名, 'size': 字节数}, ...]，调用方已校验文件类型
+    :return: UploadSession 实例
+    :raises UploadNameConflict: 文件名与已有文件或正在上传的文件重名
+    """
+    project_folder = os.path.join(settings.MEDIA_ROOT, project.name)
+    os.makedirs(project_folder, exist_ok=True)
+    with transaction.atomic():
+        # 锁住项目行，同一项目的会话依次检查重名，两个请求不会同时登记同一个文件名
+        Project.objects.select_for_update().filter(pk=project.pk).first()
+        conflicts = conflicting_names(project, [file['name'] for file in files])
+        if conflicts:
+            raise UploadNameConflict(conflicts)
+        session = UploadSession.objects.create(project=project)
+        upload_files = [
+            UploadedFile(
+                session=session,
+                file_name=file['name'],
+                local_path=os.path.join(project_folder, file['name']),
+                size=file['size']
+            )
+            for file in files
+        ]
+        UploadedFile.objects.bulk_create(upload_files)
+    for upload_file in upload_files:
+        open(part_path(upload_file), 'wb').close()
+    return session
+
+
+def session_progress(session):
+    """
+    :return: 会话及其中每个文件的上传进度
+    """
+    files = [
+        {
+            'file_id': row['id'],
+            'name': row['file_name'],
+            'size': row['size'],
+            'received': row['received']
+        }
+        # MySQL 上 bulk_create 不回填主键，文件 ID 统一从数据库读取
+        for row in session.files.order_by('id').values('id', 'file_name', 'size', 'received')
+    ]
+    total = sum(f['size'] for f in files)
+    received = sum(f['received'] for f in files)
+    return {
+        'upload_id': str(session.id),
+        'project_name': session.project.name,
+        'status': session.status,
+        'total': total,
+        'received': received,
+        'files': files
+    }
+
+
+def append_chunk(session_id, file_id, offset, stream, length, chunk_size=64 * 1024):
+    """
+    把请求体中的一个分块追加写入文件，同时更新增量哈希
+    :param session_id: UploadSession ID
+    :param file_id: UploadedFile ID
+    :param offset: 分块在文件中的起始位置，必须等于已接收的字节数
+    :param stream: 可读对象（HttpRequest）
+    :param length: 分块长度
+    :return: 更新后的 UploadedFile
+    """
+    with transaction.atomic():
+        # 行锁保证同一文件的分块按顺序写入，多个工作进程之间同样有效
+        upload_file = UploadedFile.objects.select_for_update().select_related('session').get(
+            id=file_id, session_id=session_id
+        )
+        if upload_file.session.status != 'uploading':
+            raise ValueError('上传会话已结束')
+        if offset != upload_file.received:
+            raise UploadConflict(upload_file.received)
+        if offset + length > upload_file.size:
+            raise ValueError('分块超出文件大小')
+        sha256 = upload_hashes.take(upload_file)
+        written = 0
+        with open(part_path(upload_file), 'r+b') as f:
+            f.seek(offset)
+            while written < length:
+                chunk = stream.read(min(chunk_size, length - written))
+                if not chunk:
+                    break
+                f.write(chunk)
+                sha256.update(chunk)
+                written += len(chunk)
+        if written != length:
+            # 连接中断时不更新已接收字节数，客户端从 received 处重传整个分块
+            raise ValueError('分块数据不完整')
+        upload_file.received = offset + written
+        upload_file.save(update_fields=['received'])
+        UploadSession.objects.filter(id=upload_file.session_id).update(updated_at=timezone.now())
+    upload_hashes.put(upload_file, sha256)
+    return upload_file
+
+
+def complete_session(session_id):
+    """
+    所有文件上传完成后，在一个事务中批量创建 ProjectFile，并把临时文件替换到最终路径
+    :return: (UploadSession, 新建的 ProjectFile 列表)
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().select_related('project').get(id=session_id)
+        if session.status != 'uploading':
+            raise ValueError('上传会话已结束')
+        upload_files = list(session.files.all())
+        incomplete = [f.file_name for f in upload_files if f.received != f.size]
+        if incomplete:
+            raise ValueError(f'以下文件尚未上传完成: {", ".join(incomplete)}')
+        # 上传期间可能已经通过普通上传接口创建了同名文件
+        existing = sorted(ProjectFile.objects.filter(
+            project_id=session.project_id, file_name__in=[f.file_name for f in upload_files]
+        ).values_list('file_name', flat=True))
+        if existing:
+            raise UploadNameConflict(existing)
+        for upload_file in upload_files:
+            upload_file.content_hash = upload_hashes.take(upload_file).hexdigest()
+            # 中断重传可能在文件末尾留下多余的数据
+            with open(part_path(upload_file), 'r+b') as f:
+                f.truncate(upload_file.size)
+        UploadedFile.objects.bulk_update(upload_files, ['content_hash'])
+        project_files = ProjectFile.objects.bulk_create([
+            ProjectFile(
+                project=session.project,
+                file_name=upload_file.file_name,
+                status='待处理',
+                local_path=upload_file.local_path,
+                content_hash=upload_file.content_hash
+            )
+            for upload_file in upload_files
+        ])
+        session.status = 'completed'
+        session.save(update_fields=['status', 'updated_at'])
+        for upload_file in upload_files:
+            os.replace(part_path(upload_file), upload_file.local_path)
+    upload_hashes.discard([f.id for f in upload_files])
+    return session, project_files
+
+
+def prune_sessions(max_age_hours):
+    """
+    删除长时间没有新分块的未完成会话及其写了一半的临时文件
+    """
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    stale = UploadSession.objects.filter(status='uploading', updated_at__lt=cutoff)
+    stale_files = list(UploadedFile.objects.filter(session__in=stale))
+    for upload_file in stale_files:
+        # 临时文件只属于这个会话，不会误删其他会话或已有文件
+        try:
+            os.remove(part_path(upload_file))
+        except FileNotFoundError:
+            pass
+    upload_hashes.discard([upload_file.id for upload_file in stale_files])
+    stale.delete()
+
@@ -1,17 +1,30 @@
 from django.urls import path, re_path
-from .views import upload_files, create_project, get_projects, get_project_files, get_project_list,delete_project,delete_file, get_file_content, batch_process_files, get_file_processing_result, update_image_detection_results, update_pdf_results
+from .views import upload_files, create_project, get_projects, get_project_files, get_project_list,delete_project,delete_file, get_file_content, batch_process_files, get_file_processing_result, update_image_detection_results, update_pdf_results, get_model_registry_stats, submit_batch_job, get_batch_job_progress, get_pdf_page_preview, get_result_cache_stats, get_audio_features, update_frame_sampling, get_video_frames, get_video_frame, initiate_upload, upload_chunk, get_upload_progress, complete_upload
 
 urlpatterns = [
     path('api/upload_files/<str:project_name>/', upload_files, name='upload_files'),
     path('api/create_project/', create_project, name='create_project'),
+    path('api/uploads/', initiate_upload, name='initiate_upload'),
+    path('api/uploads/<uuid:upload_id>/', get_upload_progress, name='upload_progress'),
+    path('api/uploads/<uuid:upload_id>/files/<int:file_id>/', upload_chunk, name='upload_chunk'),
+    path('api/uploads/<uuid:upload_id>/complete/', complete_upload, name='complete_upload'),
     path('api/get_projects/', get_projects, name='get_projects'),
     path('api/get_project_files/<str:project_name>/', get_project_files, name='get_project_files'),
     path('api/get_project_list/', get_project_list, name='get_project_list'),
     path('api/delete_project/<str:project_name>/', delete_project, name='delete_project'),
+    path('api/update_frame_sampling/<str:project_name>/', update_frame_sampling, name='update_frame_sampling'),
     path('api/delete_file/<int:file_id>/', delete_file, name='delete_file'),
     path('api/get_file_content/<str:project_name>/<str:filename>/', get_file_content, name='get_file_content'),
     path('api/batch_process_files/', batch_process_files, name='batch_process_files'),
+    path('api/batch_jobs/', submit_batch_job, name='submit_batch_job'),
+    path('api/batch_jobs/<str:job_id>/progress/', get_batch_job_progress, name='batch_job_progress'),
     path('api/get_file_processing_result/<str:project_name>/<str:filename>/', get_file_processing_result, name='get_file_processing_result'),
     re_path(r'^api/update_image_detection_results/(?P<project_name>.*)/(?P<filename>.*)/$', update_image_detection_results, name='update_image_detection_results'),
     re_path(r'^api/update_pdf_results/(?P<project_name>.*)/(?P<filename>.*)/$', update_pdf_results, name='update_pdf_results'),
+    re_path(r'^api/pdf_page_preview/(?P<project_name>.*)/(?P<filename>.*)/(?P<page_no>\d+)/$', get_pdf_page_preview, name='pdf_page_preview'),
+    path('api/get_audio_features/<str:project_name>/<str:filename>/', get_audio_features, name='get_audio_features'),
+    path('api/video_frames/<str:project_name>/<str:filename>/', get_video_frames, name='video_frames'),
+    path('api/video_frames/<str:project_name>/<str:filename>/<int:n>/', get_video_frame, name='video_frame'),
+    path('api/model_registry_stats/', get_model_registry_stats, name='model_registry_stats'),
+    path('api/result_cache_stats/', get_result_cache_stats, name='result_cache_stats'),
 ]
\ No newline at end of file
@@ -1,18 +1,58 @@
 import os
 import re
 import json
-import time
+import math
+import shutil
+import hashlib
+import threading
 from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from .models import Project, ProjectFile, TextProcessingResult, ImageProcessingResult, AudioProcessingResult, VideoProcessingResult
-from algorithm.PDFProcess import PDFProcessor
+from .models import Project, ProjectFile, TextProcessingResult, ImageProcessingResult, AudioProcessingResult, VideoProcessingResult, UploadSession, UploadedFile
+from algorithm.PDFProcess import PDFProcessor, render_page_preview
 from algorithm.ImageProcess import ImageProcessor
 from algorithm.AudioProcess import AudioProcessor
-from algorithm.VideoProcess import VideoProcessor
-from PIL import Image
+from algorithm.VideoProcess import VideoProcessor, SAMPLING_STRATEGIES
+from algorithm.ModelRegistry import ModelRegistry
+from algorithm.ArtifactStore import ArtifactStore
+from algorithm.FrameStore import FrameStore
+from .jobs import JobManager
+from .result_cache import ResultCache, hash_file
+from .feature_store import FeatureStore, AUDIO_FEATURE_NAMES
+from .file_serving import serve_file
+from .uploads import UploadConflict, UploadNameConflict, create_session, session_progress, append_chunk, complete_session, prune_sessions
 
 
+# 进程级模型注册表，各处理器在第一次使用时加载并在请求之间保持常驻
+model_registry = ModelRegistry(memory_budget_mb=getattr(settings, 'MODEL_MEMORY_BUDGET_MB', None))
+_model_sizes = getattr(settings, 'MODEL_SIZE_MB', {})
+# 图像和布局模型的推理后端（PyTorch / ONNX Runtime）及量化方式
+_inference_backend = getattr(settings, 'INFERENCE_BACKEND', {})
+_backend_kwargs = {
+    'backend': _inference_backend.get('BACKEND', 'torch'),
+    'quantization': _inference_backend.get('QUANTIZATION'),
+    'onnx_cache_dir': _inference_backend.get('ONNX_CACHE_DIR'),
+    'calibration_images': _inference_backend.get('CALIBRATION_IMAGES')
+}
+# YOLO 预测器和 Whisper generate 在调用过程中会修改实例上的状态，所有处理器都不是线程安全的，
+# 同一实例同一时间只允许一个请求推理（由注册表的推理锁保证）
+model_registry.register('pdf', lambda: PDFProcessor(**_backend_kwargs), size_mb=_model_sizes.get('pdf'))
+model_registry.register('image', lambda: ImageProcessor(**_backend_kwargs), size_mb=_model_sizes.get('image'))
+# Whisper 推理配置（设备、INT8 量化、线程数、解码策略）
+_whisper_profile = getattr(settings, 'WHISPER_PROFILE', None)
+model_registry.register('audio', lambda: AudioProcessor(profile=_whisper_profile), size_mb=_model_sizes.get('audio'))
+# 视频行为识别：整段识别或按关键帧分段、在进程池中并行识别
+_video_action = getattr(settings, 'VIDEO_ACTION', {})
+_video_size_mb = _model_sizes.get('video')
+if _video_size_mb is not None and _video_action.get('MODE', 'whole') == 'segmented':
+    # 每个分段识别进程各自加载一份模型，这部分内存同样计入模型内存预算
+    _video_size_mb *= 1 + _video_action.get('WORKERS', 2)
+model_registry.register('video', lambda: VideoProcessor(
+    ring_size=getattr(settings, 'VIDEO_RING_BUFFER_FRAMES', 8),
+    segment_workers=_video_action.get('WORKERS', 2),
+    segment_threads=_video_action.get('THREADS_PER_WORKER')
+), size_mb=_video_size_mb)
+
 
 ALLOWED_FILE_EXTENSIONS = {
     'text': ['.txt', '.pdf', '.doc', '.docx', '.csv'],
@@ -22,6 +62,19 @@ ALLOWED_FILE_EXTENSIONS = {
 }
 
 
+def save_uploaded_file(file, file_path):
+    """
+    分块写入上传的文件，同时计算内容的 SHA-256
+    :return: 十六进制哈希值
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'wb+') as destination:
+        for chunk in file.chunks():
+            destination.write(chunk)
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
 @csrf_exempt
 def upload_files(request, project_name):
     if request.method == 'POST':
@@ -49,14 +102,13 @@ def upload_files(request, project_name):
 
             for file in valid_files:
                 file_path = os.path.join(project_folder, file.name)
-                with open(file_path, 'wb+') as destination:
-                    for chunk in file.chunks():
-                        destination.write(chunk)
+                content_hash = save_uploaded_file(file, file_path)
                 ProjectFile.objects.create(
                     project=project,
                     file_name=file.name,
                     status='待处理',
-                    local_path=file_path
+                    local_path=file_path,
+                    content_hash=content_hash
                 )
 
             return JsonResponse({'message': '文件上传成功'})
@@ -70,10 +122,13 @@ def create_project(request):
     if request.method == 'POST':
         project_name = request.POST.get('project_name')
         project_type = request.POST.get('project_type')  # 获取项目类型
+        frame_sampling = request.POST.get('frame_sampling') or 'interval'  # 视频项目的抽帧策略
         if not project_name:
             return JsonResponse({'message': '项目名称不能为空'}, status=400)
         if not project_type:
             return JsonResponse({'message': '项目类型不能为空'}, status=400)
+        if frame_sampling not in SAMPLING_STRATEGIES:
+            return JsonResponse({'message': f'不支持的抽帧策略: {frame_sampling}'}, status=400)
 
         # 处理文件上传
         files = request.FILES.getlist('files')
@@ -91,22 +146,23 @@ def create_project(request):
         if invalid_files:
             return JsonResponse({'message': f'以下文件类型不允许上传: {", ".join(invalid_files)}'}, status=400)
 
-        project, created = Project.objects.get_or_create(name=project_name, type=project_type)  # 记录项目类型
+        project, created = Project.objects.get_or_create(
+            name=project_name, type=project_type, defaults={'frame_sampling': frame_sampling}
+        )  # 记录项目类型
         project_folder = os.path.join(settings.MEDIA_ROOT, project_name)
         os.makedirs(project_folder, exist_ok=True)
 
         file_list = []
         for index, file in enumerate(valid_files, start=1):
             file_path = os.path.join(project_folder, file.name)
-            with open(file_path, 'wb+') as destination:
-                for chunk in file.chunks():
-                    destination.write(chunk)
+            content_hash = save_uploaded_file(file, file_path)
             # 创建 ProjectFile 实例
             project_file = ProjectFile.objects.create(
                 project=project,
                 file_name=file.name,
                 status='待处理',
-                local_path=file_path
+                local_path=file_path,
+                content_hash=content_hash
             )
             file_list.append({
                 'id': project_file.id,
@@ -120,67 +176,291 @@ def create_project(request):
 
     return JsonResponse({'message': '无效的请求方法'}, status=400)
 
+def format_datetime(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+PROJECT_FIELDS = ('id', 'name', 'type', 'frame_sampling', 'created_at')
+FILE_FIELDS = ('id', 'project_id', 'file_name', 'status', 'processed_at', 'local_path')
+
+
+def serialize_project(row):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'type': row['type'],  # 返回项目类型
+        'frame_sampling': row['frame_sampling'],
+        'created_at': format_datetime(row['created_at'])
+    }
+
+
+def serialize_file(row):
+    return {
+        'id': row['id'],
+        'name': row['file_name'],
+        'status': row['status'],
+        'processed_at': format_datetime(row['processed_at']),
+        'local_path': row['local_path']
+    }
+
+
+class ListParams:
+    """
+    列表接口的公共查询参数：
+    cursor 上一页最后一条记录的 ID（按 ID 递增的游标分页），limit 每页条数（不传时返回全部），
+    status 按文件状态过滤，type 按项目类型过滤，stream=1 时流式输出 JSON
+    """
+
+    def __init__(self, request):
+        max_limit = getattr(settings, 'LIST_MAX_LIMIT', 1000)
+        cursor = request.GET.get('cursor')
+        limit = request.GET.get('limit') or getattr(settings, 'LIST_DEFAULT_LIMIT', None)
+        self.cursor = int(cursor) if cursor else None
+        self.limit = min(max(int(limit), 1), max_limit) if limit else None
+        self.status = request.GET.get('status') or None
+        self.project_type = request.GET.get('type') or None
+        self.stream = request.GET.get('stream') in ('1', 'true')
+        self.batch_size = self.limit or getattr(settings, 'LIST_STREAM_BATCH_SIZE', 500)
+
+
+def fetch_page(queryset, fields, cursor, limit):
+    """
+    按 ID 做键集分页，只查询需要的字段
+    :return: (记录列表, 下一页游标)，没有更多记录时游标为 None
+    """
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+    queryset = queryset.order_by('id').values(*fields)
+    if limit is None:
+        return list(queryset), None
+    rows = list(queryset[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1]['id']
+    return rows, None
+
+
+def iter_pages(queryset, fields, cursor, batch_size):
+    """
+    从游标开始逐页读取全部记录，用于流式输出，每次只在内存中保留一页
+    """
+    while True:
+        rows, cursor = fetch_page(queryset, fields, cursor, batch_size)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+def attach_files(projects, status=None):
+    """
+    一次查询取出这一页所有项目的文件，避免逐个项目查询
+    """
+    files = ProjectFile.objects.filter(project_id__in=[project['id'] for project in projects])
+    if status:
+        files = files.filter(status=status)
+    files_by_project = {}
+    for row in files.order_by('id').values(*FILE_FIELDS):
+        files_by_project.setdefault(row['project_id'], []).append(serialize_file(row))
+    for project in projects:
+        project['files'] = files_by_project.get(project['id'], [])
+    return projects
+
+
+def stream_json_list(key, pages, serialize, extra=None):
+    """
+    逐条输出 {"<key>": [...], ...}，不在内存中拼接完整的响应
+    """
+    yield '{' + json.dumps(key) + ': ['
+    first = True
+    for page in pages:
+        for item in serialize(page):
+            yield ('' if first else ', ') + json.dumps(item, ensure_ascii=False)
+            first = False
+    yield ']'
+    for name, value in (extra or {}).items():
+        yield ', ' + json.dumps(name) + ': ' + json.dumps(value, ensure_ascii=False)
+    yield '}'
+
+
+def project_queryset(params):
+    projects = Project.objects.all()
+    if params.project_type:
+        projects = projects.filter(type=params.project_type)
+    return projects
+
+
+@csrf_exempt
+def initiate_upload(request):
+    """
+    断点续传第一步：登记要上传的文件，返回上传会话 ID 和每个文件的 file_id
+    请求体 JSON：{"project_name": ..., "project_type": ...（项目不存在时创建）, "files": [{"name": ..., "size": ...}]}
+    """
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            project_name = data.get('project_name')
+            project_type = data.get('project_type')
+            files = [{'name': os.path.basename(f['name']), 'size': int(f['size'])} for f in data.get('files', [])]
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return JsonResponse({'message': '无效的JSON数据'}, status=400)
+        if not project_name:
+            return JsonResponse({'message': '项目名称不能为空'}, status=400)
+        if not files or any(not f['name'] or f['size'] < 0 for f in files):
+            return JsonResponse({'message': '请选择要上传的文件'}, status=400)
+
+        if project_type:
+            project, created = Project.objects.get_or_create(name=project_name, type=project_type)
+        else:
+            project = Project.objects.filter(name=project_name).first()
+            if project is None:
+                return JsonResponse({'message': '项目不存在'}, status=404)
+        allowed_extensions = ALLOWED_FILE_EXTENSIONS.get(project.type, [])
+        invalid_files = [f['name'] for f in files if os.path.splitext(f['name'])[1].lower() not in allowed_extensions]
+        if invalid_files:
+            return JsonResponse({'message': f'以下文件类型不允许上传: {", ".join(invalid_files)}'}, status=400)
+
+        prune_sessions(getattr(settings, 'UPLOAD_SESSION_MAX_AGE_HOURS', 24))
+        try:
+            session = create_session(project, files)
+        except UploadNameConflict as e:
+            return JsonResponse({'message': str(e), 'conflicts': e.names}, status=409)
+        return JsonResponse(session_progress(session))
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def upload_chunk(request, upload_id, file_id):
+    """
+    PUT 一个分块，?offset= 或 Upload-Offset 请求头给出分块在文件中的起始位置，请求体为原始字节
+    偏移量与服务器已接收的字节数不一致时返回 409 和 received，客户端从该位置继续上传
+    """
+    if request.method == 'PUT':
+        try:
+            offset = int(request.GET.get('offset', request.headers.get('Upload-Offset', '')))
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return JsonResponse({'message': '缺少分块偏移量或长度'}, status=400)
+        max_chunk_bytes = getattr(settings, 'UPLOAD_MAX_CHUNK_MB', 64) * 1024 * 1024
+        if length <= 0 or length > max_chunk_bytes:
+            return JsonResponse({'message': f'分块大小必须在 1 字节到 {max_chunk_bytes} 字节之间'}, status=400)
+        try:
+            # 直接从请求流读取写入文件，不经过 request.body，分块不会整块读入内存
+            upload_file = append_chunk(upload_id, file_id, offset, request, length)
+            return JsonResponse({'file_id': upload_file.id, 'size': upload_file.size, 'received': upload_file.received})
+        except UploadConflict as e:
+            return JsonResponse({'message': str(e), 'received': e.received}, status=409)
+        except UploadedFile.DoesNotExist:
+            return JsonResponse({'message': '上传文件不存在'}, status=404)
+        except ValueError as e:
+            return JsonResponse({'message': str(e)}, status=400)
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def get_upload_progress(request, upload_id):
+    if request.method == 'GET':
+        session = UploadSession.objects.select_related('project').filter(id=upload_id).first()
+        if session is None:
+            return JsonResponse({'message': '上传会话不存在'}, status=404)
+        return JsonResponse(session_progress(session))
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def complete_upload(request, upload_id):
+    if request.method == 'POST':
+        try:
+            session, project_files = complete_session(upload_id)
+        except UploadSession.DoesNotExist:
+            return JsonResponse({'message': '上传会话不存在'}, status=404)
+        except UploadNameConflict as e:
+            return JsonResponse({'message': str(e), 'conflicts': e.names}, status=409)
+        except ValueError as e:
+            return JsonResponse({'message': str(e)}, status=409)
+        # MySQL 上 bulk_create 不回填主键，用一次查询取回新建文件的 ID
+        file_rows = ProjectFile.objects.filter(
+            project_id=session.project_id, local_path__in=[f.local_path for f in project_files]
+        ).order_by('id').values(*FILE_FIELDS)
+        return JsonResponse({'message': '文件上传成功', 'files': [serialize_file(row) for row in file_rows]})
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
 @csrf_exempt
 # 传递 projects 信息
 def get_projects(request):
     if request.method == 'GET':
-        projects = Project.objects.all()
-        project_list = []
-        for project in projects:
-            project_files = ProjectFile.objects.filter(project=project)
-            file_list = []
-            for file in project_files:
-                file_list.append({
-                    'id': file.id,
-                    'name': file.file_name,
-                    'status': file.status,
-                    'processed_at': file.processed_at.strftime('%Y-%m-%d %H:%M:%S') if file.processed_at else '',
-                    'local_path': file.local_path
-                })
-            project_data = {
-                'id': project.id,
-                'name': project.name,
-                'type': project.type,  # 返回项目类型
-                'created_at': project.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'files': file_list
-            }
-            project_list.append(project_data)
-        return JsonResponse({'projects': project_list})
+        try:
+            params = ListParams(request)
+        except ValueError:
+            return JsonResponse({'message': '无效的分页参数'}, status=400)
+        projects = project_queryset(params)
+        serialize = lambda rows: attach_files([serialize_project(row) for row in rows], params.status)
+        if params.stream:
+            pages = iter_pages(projects, PROJECT_FIELDS, params.cursor, params.batch_size)
+            return StreamingHttpResponse(stream_json_list('projects', pages, serialize), content_type='application/json')
+        rows, next_cursor = fetch_page(projects, PROJECT_FIELDS, params.cursor, params.limit)
+        return JsonResponse({'projects': serialize(rows), 'next_cursor': next_cursor})
     return JsonResponse({'message': '无效的请求方法'}, status=400)
 
 @csrf_exempt
 # 显示项目列表具体信息
 def get_project_list(request):
-    projects = Project.objects.all()
-    project_list = []
-    for project in projects:
-        project_data = {
-            'id': project.id,
-            'name': project.name,
-            'type': project.type,  # 返回项目类型
-            'created_at': project.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        project_list.append(project_data)
-    return JsonResponse({'projects': project_list})
+    try:
+        params = ListParams(request)
+    except ValueError:
+        return JsonResponse({'message': '无效的分页参数'}, status=400)
+    projects = project_queryset(params)
+    serialize = lambda rows: [serialize_project(row) for row in rows]
+    if params.stream:
+        pages = iter_pages(projects, PROJECT_FIELDS, params.cursor, params.batch_size)
+        return StreamingHttpResponse(stream_json_list('projects', pages, serialize), content_type='application/json')
+    rows, next_cursor = fetch_page(projects, PROJECT_FIELDS, params.cursor, params.limit)
+    return JsonResponse({'projects': serialize(rows), 'next_cursor': next_cursor})
 
 @csrf_exempt
 def get_project_files(request, project_name):
     if request.method == 'GET':
+        try:
+            params = ListParams(request)
+        except ValueError:
+            return JsonResponse({'message': '无效的分页参数'}, status=400)
+        project = Project.objects.filter(name=project_name).values('id', 'type').first()
+        if project is None:
+            return JsonResponse({'message': '项目不存在'}, status=404)
+        files = ProjectFile.objects.filter(project_id=project['id'])
+        if params.status:
+            files = files.filter(status=params.status)
+        serialize = lambda rows: [serialize_file(row) for row in rows]
+        if params.stream:
+            pages = iter_pages(files, FILE_FIELDS, params.cursor, params.batch_size)
+            return StreamingHttpResponse(
+                stream_json_list('files', pages, serialize, extra={'project_type': project['type']}),
+                content_type='application/json'
+            )
+        rows, next_cursor = fetch_page(files, FILE_FIELDS, params.cursor, params.limit)
+        # 返回项目类型
+        return JsonResponse({'files': serialize(rows), 'project_type': project['type'], 'next_cursor': next_cursor})
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def update_frame_sampling(request, project_name):
+    if request.method == 'POST':
         try:
             project = Project.objects.get(name=project_name)
-            project_files = ProjectFile.objects.filter(project=project)
-            file_list = []
-            for file in project_files:
-                file_list.append({
-                    'id': file.id,
-                    'name': file.file_name,
-                    'status': file.status,
-                    'processed_at': file.processed_at.strftime('%Y-%m-%d %H:%M:%S') if file.processed_at else '',
-                    'local_path': file.local_path
-                })
-            return JsonResponse({'files': file_list, 'project_type': project.type})  # 返回项目类型
+            frame_sampling = request.POST.get('frame_sampling')
+            if frame_sampling is None and request.body:
+                frame_sampling = json.loads(request.body).get('frame_sampling')
+            if frame_sampling not in SAMPLING_STRATEGIES:
+                return JsonResponse({'message': f'不支持的抽帧策略: {frame_sampling}'}, status=400)
+            project.frame_sampling = frame_sampling
+            project.save(update_fields=['frame_sampling'])
+            return JsonResponse({'message': '抽帧策略更新成功', 'frame_sampling': frame_sampling})
         except Project.DoesNotExist:
             return JsonResponse({'message': '项目不存在'}, status=404)
+        except json.JSONDecodeError:
+            return JsonResponse({'message': '无效的JSON数据'}, status=400)
     return JsonResponse({'message': '无效的请求方法'}, status=400)
 
 
@@ -221,25 +501,22 @@ def get_file_content(request, project_name, filename):
         project = Project.objects.get(name=project_name)
         project_file = ProjectFile.objects.get(project=project, file_name=filename)
         file_path = project_file.local_path
-        file_extension = os.path.splitext(filename)[1].lower()
-
-        # 获取文件内容
-        with open(file_path, 'rb') as file:
-            content = file.read()
-
-        response = HttpResponse(content)
-        if file_extension in ['.txt', '.csv']:
-            response['Content-Type'] = 'text/plain'
-        elif file_extension in ['.pdf']:
-            response['Content-Type'] = 'application/pdf'
-        elif file_extension in ['.jpg', '.jpeg', '.png']:
-            response['Content-Type'] = f'image/{file_extension[1:]}'
-        elif file_extension in ['.wav', '.mp3']:
-            response['Content-Type'] = f'audio/{file_extension[1:]}'
-        elif file_extension in ['.aac', '.mp4']:
-            response['Content-Type'] = f'video/{file_extension[1:]}'
+        if not file_path or not os.path.exists(file_path):
+            return JsonResponse({'message': '文件不存在'}, status=404)
 
-        return response
+        # 流式返回文件内容，支持 Range 拖动进度条和 ETag / Last-Modified 缓存校验，也可以交给反向代理发送
+        config = getattr(settings, 'FILE_SERVING', {})
+        try:
+            return serve_file(
+                request, file_path,
+                sendfile=config.get('SENDFILE'),
+                accel_prefix=config.get('ACCEL_REDIRECT_PREFIX', '/protected-media/'),
+                accel_root=config.get('ACCEL_REDIRECT_ROOT') or settings.MEDIA_ROOT
+            )
+        except ValueError as e:
+            # 文件不在反向代理能访问的目录下，改由 Django 流式返回
+            print(str(e))
+            return serve_file(request, file_path)
     except Project.DoesNotExist:
         return JsonResponse({'message': '项目不存在'}, status=404)
     except ProjectFile.DoesNotExist:
@@ -252,52 +529,117 @@ def clean_data(data):
     result = re.sub(pattern, '', data)
     return result
 
+def get_file_work_dir(project_file):
+    """
+    每个文件的中间结果目录：MEDIA_ROOT/<项目名>/<文件ID>/
+    """
+    work_dir = os.path.join(settings.MEDIA_ROOT, project_file.project.name, str(project_file.id))
+    os.makedirs(work_dir, exist_ok=True)
+    return work_dir
+
+def build_image_result(detection_results, predicted_label):
+    return {
+        "detection_results": detection_results,
+        "predicted_label": clean_data(predicted_label)
+    }
+
+def get_artifact_store(project_file):
+    """
+    调试产物默认关闭，开启后异步写入 MEDIA_ROOT/<项目名>/<文件ID>/artifacts/
+    """
+    config = getattr(settings, 'ARTIFACTS', {})
+    if not config.get('ENABLED', False):
+        return None
+    max_mb = config.get('MAX_MB')
+    max_age_days = config.get('MAX_AGE_DAYS')
+    return ArtifactStore(
+        os.path.join(get_file_work_dir(project_file), 'artifacts'),
+        max_files=config.get('MAX_FILES'),
+        max_bytes=max_mb * 1024 * 1024 if max_mb else None,
+        max_age_seconds=max_age_days * 86400 if max_age_days else None
+    )
+
 @csrf_exempt
-def process_file(file_path):
+def process_file(file_path, work_dir=None, artifact_store=None, feature_dir=None, frame_sampling='interval', frames_dir=None):
     file_extension = os.path.splitext(file_path)[1].lower()
     result = {}
     if file_extension in ['.pdf']:
-        processor = PDFProcessor()
-        images = processor.pdf_to_image(file_path)
-        detections = processor.layout_detection(images)
-        results = processor.ocr_recognition(detections, images)
-        results = processor.table_recognition(file_path, results)
+        window_size = getattr(settings, 'PDF_STREAM_WINDOW', 1)
+        batch_size = getattr(settings, 'PDF_LAYOUT_BATCH_SIZE', 1)
+        ocr_workers = getattr(settings, 'PDF_OCR_WORKERS', 0)
+        use_text_layer = getattr(settings, 'PDF_USE_TEXT_LAYER', True)
         json_data = []
-        for res in results:
-            json_result = {
-                "layout_dets": res["layout_dets"],
-                "page_info": res["page_info"]
-            }
-            json_data.append(json_result)
+        # 逐页处理，每页结果处理完立即追加写入 pages.jsonl，中途失败也能保留已完成的页面
+        pages_file = open(os.path.join(work_dir, 'pages.jsonl'), 'w', encoding='utf-8') if work_dir else None
+        try:
+            with model_registry.use('pdf') as processor:
+                for page_result in processor.process_pdf_stream(
+                        file_path, window_size=window_size, batch_size=batch_size,
+                        ocr_workers=ocr_workers, use_text_layer=use_text_layer, artifact_store=artifact_store):
+                    if pages_file:
+                        pages_file.write(json.dumps(page_result, ensure_ascii=False) + '\n')
+                        pages_file.flush()
+                    json_data.append(page_result)
+        finally:
+            if pages_file:
+                pages_file.close()
         result = json_data
     elif file_extension in ['.jpg', '.jpeg', '.png']:
-        processor = ImageProcessor()
-        image = Image.open(file_path)
-        detection_results = processor.object_detection(image)
-        predicted_label = processor.classify_image(image)
-        result = {
-            "detection_results": detection_results,
-            "predicted_label": clean_data(predicted_label)
-        }
+        with model_registry.use('image') as processor:
+            detection_results, predicted_label = processor.analyze_image(file_path, artifact_store)
+        result = build_image_result(detection_results, predicted_label)
     elif file_extension in ['.wav', '.mp3']:
-        processor = AudioProcessor()
-        pre_audio = processor.preprocess_audio(file_path)
-        transcription = processor.transcribe_speech(pre_audio)
-        mfccs, spectral_centroids, spectral_bandwidth, spectral_flatness = processor.analyze_acoustic_features(pre_audio, sr=16000)
+        with model_registry.use('audio') as processor:
+            pre_audio = processor.preprocess_audio(file_path, cache_dir=work_dir)
+            long_form = getattr(settings, 'WHISPER_LONG_FORM', {})
+            transcription_segments = None
+            rtf = None
+            # 超过 30 秒的音频 Whisper 会直接截断，改为分段批量识别
+            if len(pre_audio) > 30 * 16000:
+                long_result = processor.transcribe_long(
+                    pre_audio, sr=16000,
+                    mode=long_form.get('MODE', 'vad'),
+                    window_seconds=long_form.get('WINDOW_SECONDS', 30),
+                    overlap_seconds=long_form.get('OVERLAP_SECONDS', 2),
+                    batch_size=long_form.get('BATCH_SIZE', 8)
+                )
+                transcription = long_result['text']
+                transcription_segments = long_result['segments']
+                rtf = long_result['rtf']
+            else:
+                transcription = processor.transcribe_speech(pre_audio)
+            acoustic_features = processor.analyze_acoustic_features(pre_audio, sr=16000)
         result = {
             "transcription": transcription,
-            "mfccs": mfccs.tolist(),  # 将 numpy 数组转换为列表以便 JSON 序列化
-            "spectral_centroids": spectral_centroids.tolist(),
-            "spectral_bandwidth": spectral_bandwidth.tolist(),
-            "spectral_flatness": spectral_flatness.tolist()
+            "transcription_segments": transcription_segments,
+            "rtf": rtf
         }
+        features = dict(zip(AUDIO_FEATURE_NAMES, acoustic_features))
+        if feature_dir:
+            # 特征矩阵保存为 .npy 文件，结果 JSON 中只保留形状/类型等元数据
+            result["features"] = feature_store.save(feature_dir, features, sr=16000, hop_length=512)
+        else:
+            result.update({name: array.tolist() for name, array in features.items()})
     elif file_extension in ['.aac', '.mp4']:
-        processor = VideoProcessor()
-        output_folder = r"F:\a\apaper\project\project\algorithm\result\output_frames"
-        processor.preprocess_video(file_path, output_folder)
-        action_result = processor.action_recognition(file_path)
+        # 抽帧结果按内容哈希 + 流水线版本存放，未指定时保存在文件自己的目录下
+        output_folder = frames_dir or os.path.join(work_dir or os.path.splitext(file_path)[0], 'frames')
+        with model_registry.use('video') as processor:
+            # 只解码一遍视频，抽帧和行为识别共用解码出的帧
+            video_sampling = getattr(settings, 'VIDEO_SAMPLING', {})
+            sampled_frames, action_result = processor.process_video(
+                file_path, output_folder,
+                strategy=frame_sampling,
+                sample_interval=getattr(settings, 'VIDEO_SAMPLE_INTERVAL', 4),
+                seek_seconds=video_sampling.get('SEEK_SECONDS', 1.0),
+                scene_threshold=video_sampling.get('SCENE_THRESHOLD', 30.0),
+                action_mode=_video_action.get('MODE', 'whole'),
+                segment_seconds=_video_action.get('SEGMENT_SECONDS', 10)
+            )
         result = {
-            "action_result": action_result
+            "action_result": action_result,
+            "sampled_frames": sampled_frames,
+            # 抽取的帧保存在帧存储中，通过 get_video_frame 按下标读取
+            "frames": {"dir": output_folder, "count": sampled_frames}
         }
     else:
         print(f"不支持的文件类型: {file_extension}")
@@ -305,80 +647,255 @@ def process_file(file_path):
     return result
 
 
+def save_processing_result(file, result):
+    """
+    将处理结果写入对应模态的结果表，并把文件状态更新为已处理
+    :param file: ProjectFile 实例
+    :param result: process_file 返回的结果
+    """
+    file_extension = os.path.splitext(file.local_path)[1].lower()
+    if file_extension in ['.pdf']:
+        # 重新处理后所有页面的预览图都需要重新生成
+        invalidate_pdf_previews(file)
+        # 修改为保存完整的多页PDF结果
+        TextProcessingResult.objects.update_or_create(
+            project_file=file,
+            defaults={
+                'result': result,
+                # 对于多页PDF，我们将整个结果数组存储在layout_dets和page_info中
+                'layout_dets': [page.get('layout_dets') for page in result],
+                'page_info': [page.get('page_info') for page in result]
+            }
+        )
+    elif file_extension in ['.jpg', '.jpeg', '.png']:
+        ImageProcessingResult.objects.update_or_create(
+            project_file=file,
+            defaults={
+                'result': result,
+                'predicted_label': result.get('predicted_label'),
+                'detection_results': result.get('detection_results')
+            }
+        )
+    elif file_extension in ['.wav', '.mp3']:
+        AudioProcessingResult.objects.update_or_create(
+            project_file=file,
+            defaults={
+                'result': result,
+                'transcription': result.get('transcription'),
+                'features': result.get('features')
+            }
+        )
+    elif file_extension in ['.aac', '.mp4']:
+        VideoProcessingResult.objects.update_or_create(
+            project_file=file,
+            defaults={
+                'result': result,
+                'action_result': result.get('action_result')
+            }
+        )
+
+    # 更新文件状态为已处理
+    file.status = '已处理'
+    file.save()
+
+
+def process_project_file(file_id):
+    file = ProjectFile.objects.select_related('project').get(id=file_id)
+    if not file.content_hash:
+        # 旧文件上传时没有计算哈希，第一次处理时补上
+        file.content_hash = hash_file(file.local_path)
+        file.save(update_fields=['content_hash'])
+    pipeline_version = get_pipeline_version(file.local_path, file.project.frame_sampling)
+    result = result_cache.get(file.content_hash, pipeline_version)
+    if isinstance(result, dict) and (
+            ('features' in result and not feature_store.exists(result['features'])) or
+            ('frames' in result and not FrameStore.exists(result['frames'].get('dir')))):
+        # 特征或帧存储文件已被删除，缓存的元数据失效，需要重新计算
+        result = None
+    if result is None:
+        result = process_file(
+            file.local_path, work_dir=get_file_work_dir(file), artifact_store=get_artifact_store(file),
+            feature_dir=feature_store.feature_dir(file.content_hash, pipeline_version),
+            frame_sampling=file.project.frame_sampling,
+            frames_dir=get_frames_dir(file.content_hash, pipeline_version)
+        )
+        result_cache.put(file.content_hash, pipeline_version, result)
+    else:
+        print(f'文件 {file.file_name} 命中结果缓存，跳过推理')
+    save_processing_result(file, result)
+
+
+def process_image_batch(file_ids):
+    """
+    批量处理图像文件：未命中缓存的图像合并为一次检测和一次分类推理
+    :param file_ids: 文件 ID 列表
+    :return: 处理失败的文件 ID 列表
+    """
+    files = list(ProjectFile.objects.select_related('project').filter(id__in=file_ids))
+    failed = sorted(set(file_ids) - {file.id for file in files})
+    pending = []
+    for file in files:
+        if not file.content_hash:
+            file.content_hash = hash_file(file.local_path)
+            file.save(update_fields=['content_hash'])
+        result = result_cache.get(file.content_hash, get_pipeline_version(file.local_path))
+        if result is not None:
+            save_processing_result(file, result)
+        else:
+            pending.append(file)
+    if not pending:
+        # 全部命中缓存时不需要加载模型
+        return failed
+
+    # 解码和写调试产物不需要模型，放在推理锁之外，只有推理本身串行
+    images = []
+    loaded_files = []
+    for file in pending:
+        try:
+            images.append(ImageProcessor.prepare_image(file.local_path))
+            loaded_files.append(file)
+        except (OSError, ValueError) as e:
+            print(f'图像 {file.file_name} 读取失败: {str(e)}')
+            failed.append(file.id)
+    if not images:
+        return failed
+    with model_registry.use('image') as processor:
+        detection_results = processor.detect_batch(images)
+        predicted_labels = processor.classify_batch(images)
+    for file, prepared, detections in zip(loaded_files, images, detection_results):
+        ImageProcessor.save_artifacts(prepared, detections, get_artifact_store(file))
+    for file, detections, label in zip(loaded_files, detection_results, predicted_labels):
+        result = build_image_result(detections, label)
+        result_cache.put(file.content_hash, get_pipeline_version(file.local_path), result)
+        save_processing_result(file, result)
+    return failed
+
+
+def get_pipeline_version(file_path, frame_sampling=None):
+    """
+    结果缓存键中的流水线版本，模型或处理参数变化时需要在 settings.PIPELINE_VERSIONS 中更新
+    :param frame_sampling: 视频项目的抽帧策略，不同策略提取的帧不同，分开缓存
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    modality = next((m for m, extensions in ALLOWED_FILE_EXTENSIONS.items() if file_extension in extensions), 'other')
+    versions = getattr(settings, 'PIPELINE_VERSIONS', {})
+    version = f"{modality}{file_extension}:{versions.get(modality, 'v1')}"
+    if modality in ['text', 'image']:
+        # 不同后端/量化方式的结果存在微小差异，分开缓存
+        version += f":{_backend_kwargs['backend']}-{_backend_kwargs['quantization'] or 'fp32'}"
+        if modality == 'text':
+            # 读取文本层与整页 OCR 得到的文字不同
+            version += '-textlayer' if getattr(settings, 'PDF_USE_TEXT_LAYER', True) else '-ocr'
+    elif modality == 'audio' and _whisper_profile:
+        # 量化和解码策略会改变转录结果
+        version += f":{_whisper_profile.get('QUANTIZATION') or 'fp32'}-beam{_whisper_profile.get('NUM_BEAMS', 1)}"
+    elif modality == 'video':
+        # 分段识别输出动作时间线，与整段识别的结果格式不同
+        version += f":{frame_sampling or 'interval'}-{_video_action.get('MODE', 'whole')}"
+    return version
+
+
+def get_file_modalities(file_ids):
+    """
+    :return: {文件 ID: 模态名称}，不存在的文件不在结果中
+    """
+    modalities = {}
+    for file_id, local_path in ProjectFile.objects.filter(id__in=file_ids).values_list('id', 'local_path'):
+        file_extension = os.path.splitext(local_path)[1].lower()
+        modalities[file_id] = next(
+            (modality for modality, extensions in ALLOWED_FILE_EXTENSIONS.items() if file_extension in extensions),
+            'other'
+        )
+    return modalities
+
+
+# 音频特征矩阵按内容哈希存放在 MEDIA_ROOT/features/ 下，与结果缓存一样可以跨项目复用
+_audio_features = getattr(settings, 'AUDIO_FEATURES', {})
+feature_store = FeatureStore(
+    _audio_features.get('ROOT_DIR') or os.path.join(settings.MEDIA_ROOT, 'features'),
+    dtype=_audio_features.get('DTYPE', 'float16')
+)
+
+# 视频帧存储同样按内容哈希存放
+_frames_root = getattr(settings, 'VIDEO_FRAMES_ROOT', None) or os.path.join(settings.MEDIA_ROOT, 'frames')
+
+
+def get_frames_dir(content_hash, pipeline_version):
+    """
+    视频帧存储目录：MEDIA_ROOT/frames/<哈希前两位>/<哈希>/<流水线版本>/
+    与音频特征一样按内容而不是按文件存放，结果缓存命中时其他项目中的同一视频共用这份帧，
+    删除某个文件或项目不会影响其他文件
+    """
+    safe_version = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in pipeline_version)
+    return os.path.join(_frames_root, content_hash[:2], content_hash, safe_version)
+
+
+_result_cache_max_mb = getattr(settings, 'RESULT_CACHE_MAX_MB', None)
+result_cache = ResultCache(max_bytes=_result_cache_max_mb * 1024 * 1024 if _result_cache_max_mb else None)
+
+
+# 后台批处理任务，推理在线程池中进行，SSE 接口只负责汇报进度
+job_manager = JobManager(
+    handler=process_project_file,
+    modalities_of=get_file_modalities,
+    max_workers=getattr(settings, 'BATCH_MAX_WORKERS', 4),
+    modality_limits=getattr(settings, 'BATCH_CONCURRENCY', None),
+    batch_handlers={'image': process_image_batch},
+    batch_sizes=getattr(settings, 'BATCH_SIZES', None)
+)
+
+
+def parse_file_ids(request):
+    file_ids_str = request.GET.get('file_ids') or request.POST.get('file_ids')
+    if file_ids_str:
+        return [int(id) for id in file_ids_str.split(',') if id.isdigit()]
+    return [int(id) for id in request.POST.getlist('file_ids') if id.isdigit()]
+
+
+def job_event_stream(job):
+    last_processed = -1
+    while True:
+        processed = job_manager.wait(job, last_processed)
+        if processed != last_processed:
+            last_processed = processed
+            yield f"data: {json.dumps({'type': 'progress', 'processed': processed, 'total': job.total, 'failed': job.failed})}\n\n"
+        else:
+            # 心跳，防止代理在长时间无输出时断开连接
+            yield ": keep-alive\n\n"
+        if job.is_finished():
+            break
+    yield f"data: {json.dumps({'type': 'finished', 'job_id': job.id})}\n\n"
+
+
+@csrf_exempt
+def submit_batch_job(request):
+    if request.method in ['GET', 'POST']:
+        file_ids = parse_file_ids(request)
+        if not file_ids:
+            return JsonResponse({'message': '请选择要处理的文件'}, status=400)
+        job = job_manager.submit(file_ids)
+        return JsonResponse(job.to_dict())
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def get_batch_job_progress(request, job_id):
+    if request.method == 'GET':
+        job = job_manager.get(job_id)
+        if job is None:
+            return JsonResponse({'message': '任务不存在'}, status=404)
+        if request.GET.get('format') == 'json':
+            return JsonResponse(job.to_dict())
+        return StreamingHttpResponse(job_event_stream(job), content_type='text/event-stream')
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
 @csrf_exempt
 def batch_process_files(request):
+    # 兼容旧接口：提交任务后直接返回该任务的进度流，客户端断开不影响后台处理
     if request.method == 'GET':
-        file_ids_str = request.GET.get('file_ids')
-        if file_ids_str:
-            file_ids = [int(id) for id in file_ids_str.split(',') if id.isdigit()]
-        else:
-            file_ids = []
-        total_files = len(file_ids)
-        processed_files = 0
-
-        def event_stream():
-            nonlocal processed_files
-            for file_id in file_ids:
-                try:
-                    file = ProjectFile.objects.get(id=file_id)
-                    file_path = file.local_path
-                    result = process_file(file_path)
-
-                    file_extension = os.path.splitext(file_path)[1].lower()
-                    if file_extension in ['.pdf']:
-                        # 修改为保存完整的多页PDF结果
-                        TextProcessingResult.objects.update_or_create(
-                            project_file=file,
-                            defaults={
-                                'result': result,
-                                # 对于多页PDF，我们将整个结果数组存储在layout_dets和page_info中
-                                'layout_dets': [page.get('layout_dets') for page in result],
-                                'page_info': [page.get('page_info') for page in result]
-                            }
-                        )
-                    elif file_extension in ['.jpg', '.jpeg', '.png']:
-                        ImageProcessingResult.objects.update_or_create(
-                            project_file=file,
-                            defaults={
-                                'result': result,
-                                'predicted_label': result.get('predicted_label'),
-                                'detection_results': result.get('detection_results')
-                            }
-                        )
-                    elif file_extension in ['.wav', '.mp3']:
-                        AudioProcessingResult.objects.update_or_create(
-                            project_file=file,
-                            defaults={
-                                'result': result,
-                                'transcription': result.get('transcription'),
-                                'mfccs': result.get('mfccs'),
-                                'spectral_centroids': result.get('spectral_centroids'),
-                                'spectral_bandwidth': result.get('spectral_bandwidth'),
-                                'spectral_flatness': result.get('spectral_flatness')
-                            }
-                        )
-                    elif file_extension in ['.aac', '.mp4']:
-                        VideoProcessingResult.objects.update_or_create(
-                            project_file=file,
-                            defaults={
-                                'result': result,
-                                'action_result': result.get('action_result')
-                            }
-                        )
-
-                    # 更新文件状态为已处理
-                    file.status = '已处理'
-                    file.save()
-
-                    processed_files += 1
-                    yield f"data: {json.dumps({'type': 'progress', 'processed': processed_files})}\n\n"
-                    time.sleep(1)  # 模拟处理时间
-                except ProjectFile.DoesNotExist:
-                    print(f'文件 ID 为 {file_id} 的文件不存在')
-
-            yield f"data: {json.dumps({'type': 'finished'})}\n\n"
-
-        return StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+        job = job_manager.submit(parse_file_ids(request))
+        return StreamingHttpResponse(job_event_stream(job), content_type='text/event-stream')
     return JsonResponse({'message': '无效的请求方法'}, status=400)
 
 
@@ -409,11 +926,16 @@ def get_file_processing_result(request, project_name, filename):
             processing_result = AudioProcessingResult.objects.get(project_file=project_file)
             result = {
                 "transcription": processing_result.transcription,
-                "mfccs": processing_result.mfccs,
-                "spectral_centroids": processing_result.spectral_centroids,
-                "spectral_bandwidth": processing_result.spectral_bandwidth,
-                "spectral_flatness": processing_result.spectral_flatness
+                "transcription_segments": (processing_result.result or {}).get('transcription_segments')
             }
+            if feature_store.exists(processing_result.features):
+                # 只返回降采样后的特征概览，完整数据通过 get_audio_features 按时间段分页获取
+                preview = feature_store.read(
+                    processing_result.features,
+                    max_frames=_audio_features.get('PREVIEW_FRAMES', 200)
+                )
+                result.update(preview['features'])
+                result["feature_frame_duration"] = preview['frame_duration']
         elif file_extension in ['.aac', '.mp4']:
             processing_result = VideoProcessingResult.objects.get(project_file=project_file)
             result = {
@@ -493,6 +1015,8 @@ def update_pdf_results(request, project_name, filename):
             # 检查是否有layout_dets字段
             if 'layout_dets' in updated_results:
                 layout_dets = updated_results.get('layout_dets')
+                # 只让布局发生变化的页面的预览图缓存失效
+                invalidate_pdf_previews(project_file, processing_result.layout_dets, layout_dets)
                 processing_result.layout_dets = layout_dets
                 
                 # 更新整个result字段，保持page_info不变
@@ -526,4 +1050,188 @@ def update_pdf_results(request, project_name, filename):
     
 
 
-    
\ No newline at end of file
+    
+
+
+def get_preview_path(project_file, page_no):
+    return os.path.join(get_file_work_dir(project_file), 'previews', f'page_{page_no}.png')
+
+
+def invalidate_pdf_previews(project_file, old_layout_dets=None, new_layout_dets=None):
+    """
+    删除预览图缓存；传入新旧布局时只删除内容发生变化的页面
+    """
+    preview_folder = os.path.join(get_file_work_dir(project_file), 'previews')
+    if not os.path.isdir(preview_folder):
+        return
+    if old_layout_dets is None or new_layout_dets is None:
+        shutil.rmtree(preview_folder, ignore_errors=True)
+        return
+    for page_no in range(max(len(old_layout_dets), len(new_layout_dets))):
+        old_page = old_layout_dets[page_no] if page_no < len(old_layout_dets) else None
+        new_page = new_layout_dets[page_no] if page_no < len(new_layout_dets) else None
+        if old_page != new_page:
+            preview_path = os.path.join(preview_folder, f'page_{page_no}.png')
+            if os.path.exists(preview_path):
+                os.remove(preview_path)
+
+
+@csrf_exempt
+def get_pdf_page_preview(request, project_name, filename, page_no):
+    if request.method == 'GET':
+        try:
+            project = Project.objects.get(name=project_name)
+            project_file = ProjectFile.objects.select_related('project').get(project=project, file_name=filename)
+            page_no = int(page_no)
+            preview_path = get_preview_path(project_file, page_no)
+            if not os.path.exists(preview_path):
+                processing_result = TextProcessingResult.objects.get(project_file=project_file)
+                layout_dets = processing_result.layout_dets or []
+                if page_no >= len(layout_dets):
+                    return JsonResponse({'message': '页码超出范围'}, status=404)
+                image = render_page_preview(project_file.local_path, page_no, layout_dets[page_no])
+                os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+                # 先写临时文件再改名，避免并发请求读到写了一半的图片
+                tmp_path = f'{preview_path}.{threading.get_ident()}.tmp'
+                image.save(tmp_path, format='PNG')
+                os.replace(tmp_path, preview_path)
+            with open(preview_path, 'rb') as f:
+                return HttpResponse(f.read(), content_type='image/png')
+        except Project.DoesNotExist:
+            return JsonResponse({'message': '项目不存在'}, status=404)
+        except ProjectFile.DoesNotExist:
+            return JsonResponse({'message': '文件不存在'}, status=404)
+        except TextProcessingResult.DoesNotExist:
+            return JsonResponse({'message': 'PDF处理结果不存在'}, status=404)
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def get_audio_features(request, project_name, filename):
+    """
+    按时间段分页读取音频特征：?names=mfccs,spectral_centroids&start=0&end=60&max_frames=1000
+    未指定 end 时每页 AUDIO_FEATURES['PAGE_SECONDS'] 秒，响应中的 next_start 为下一页的起始时间
+    """
+    if request.method == 'GET':
+        try:
+            project = Project.objects.get(name=project_name)
+            project_file = ProjectFile.objects.get(project=project, file_name=filename)
+            processing_result = AudioProcessingResult.objects.get(project_file=project_file)
+            meta = processing_result.features
+            if not feature_store.exists(meta):
+                return JsonResponse({'message': '音频特征不存在'}, status=404)
+            names = [name for name in request.GET.get('names', '').split(',') if name]
+            start = float(request.GET.get('start', 0))
+            end = request.GET.get('end')
+            end = float(end) if end else start + _audio_features.get('PAGE_SECONDS', 60)
+            if not (math.isfinite(start) and math.isfinite(end)):
+                raise ValueError('时间范围必须是有限值')
+            # max_frames 不大于 0 时同样按至少 1 帧处理，不能借此关闭降采样上限
+            max_frames = max(1, min(
+                int(request.GET.get('max_frames', _audio_features.get('MAX_FRAMES', 2000))),
+                _audio_features.get('MAX_FRAMES', 2000)
+            ))
+            result = feature_store.read(meta, names=names, start=start, end=end, max_frames=max_frames)
+            duration = meta['num_frames'] * meta['hop_length'] / meta['sr']
+            result.update({
+                'start': start,
+                'end': min(end, duration),
+                'duration': duration,
+                'next_start': end if end < duration else None
+            })
+            return JsonResponse(result)
+        except ValueError:
+            return JsonResponse({'message': '无效的时间范围或帧数'}, status=400)
+        except Project.DoesNotExist:
+            return JsonResponse({'message': '项目不存在'}, status=404)
+        except ProjectFile.DoesNotExist:
+            return JsonResponse({'message': '文件不存在'}, status=404)
+        except AudioProcessingResult.DoesNotExist:
+            return JsonResponse({'message': '音频处理结果不存在'}, status=404)
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+def get_video_frame_store(project_name, filename):
+    project = Project.objects.get(name=project_name)
+    project_file = ProjectFile.objects.get(project=project, file_name=filename)
+    processing_result = VideoProcessingResult.objects.get(project_file=project_file)
+    frames = (processing_result.result or {}).get('frames') or {}
+    if not FrameStore.exists(frames.get('dir')):
+        return None
+    return FrameStore(frames['dir'])
+
+
+@csrf_exempt
+def get_video_frames(request, project_name, filename):
+    """
+    帧存储的索引：?start=0&stop=100 返回该区间内每张提取帧对应的源视频帧号和时间
+    """
+    if request.method == 'GET':
+        try:
+            store = get_video_frame_store(project_name, filename)
+            if store is None:
+                return JsonResponse({'message': '视频帧不存在'}, status=404)
+            start = int(request.GET.get('start', 0))
+            stop = int(request.GET.get('stop', len(store)))
+            return JsonResponse({
+                'count': len(store),
+                'fps': store.index.get('fps'),
+                'frame_shape': store.index.get('frame_shape'),
+                'start': start,
+                'frames': [
+                    {'n': n, 'frame_index': store.frame_indices[n], 'time': store.timestamp(n)}
+                    for n in range(max(start, 0), min(stop, len(store)))
+                ]
+            })
+        except ValueError:
+            return JsonResponse({'message': '无效的区间'}, status=400)
+        except Project.DoesNotExist:
+            return JsonResponse({'message': '项目不存在'}, status=404)
+        except ProjectFile.DoesNotExist:
+            return JsonResponse({'message': '文件不存在'}, status=404)
+        except VideoProcessingResult.DoesNotExist:
+            return JsonResponse({'message': '视频处理结果不存在'}, status=404)
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def get_video_frame(request, project_name, filename, n):
+    """
+    读取第 n 张提取帧，默认返回 JPEG，?format=png 返回 PNG；?by=frame_index 时 n 表示源视频帧号
+    """
+    if request.method == 'GET':
+        try:
+            store = get_video_frame_store(project_name, filename)
+            if store is None:
+                return JsonResponse({'message': '视频帧不存在'}, status=404)
+            n = int(n)
+            if request.GET.get('by') == 'frame_index':
+                n = store.find(n)
+            if not 0 <= n < len(store):
+                return JsonResponse({'message': '帧下标超出范围'}, status=404)
+            image_format = 'png' if request.GET.get('format') == 'png' else 'jpeg'
+            content = store.encode(n, ext='.png' if image_format == 'png' else '.jpg')
+            response = HttpResponse(content, content_type=f'image/{image_format}')
+            response['X-Frame-Index'] = str(store.frame_indices[n])
+            return response
+        except Project.DoesNotExist:
+            return JsonResponse({'message': '项目不存在'}, status=404)
+        except ProjectFile.DoesNotExist:
+            return JsonResponse({'message': '文件不存在'}, status=404)
+        except VideoProcessingResult.DoesNotExist:
+            return JsonResponse({'message': '视频处理结果不存在'}, status=404)
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def get_model_registry_stats(request):
+    if request.method == 'GET':
+        return JsonResponse(model_registry.stats())
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
+
+
+@csrf_exempt
+def get_result_cache_stats(request):
+    if request.method == 'GET':
+        return JsonResponse(result_cache.stats())
+    return JsonResponse({'message': '无效的请求方法'}, status=400)
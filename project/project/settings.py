@@ -132,4 +132,159 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# 模型注册表配置：常驻模型的内存预算（MB），超出后按 LRU 淘汰空闲模型
+MODEL_MEMORY_BUDGET_MB = 8192
+# 各处理器的预估内存占用（MB），为 None 时按 torch 参数量估算
+# PDF 处理器包含 PaddleOCR（非 torch），无法自动估算，需手动给出
+# 'video' 为单份行为识别模型的大小，VIDEO_ACTION['MODE'] 为 'segmented' 时按 1 + WORKERS 份计入预算
+MODEL_SIZE_MB = {
+    'pdf': 1500,
+    'image': None,
+    'audio': None,
+    'video': 600,
+}
+
+
+# 没有并发上限的模态共用的后台线程池大小，以及每种模态同时处理的文件数上限
+# （每种有上限的模态各自使用一个该大小的线程池）
+# 每种模态只有一个常驻处理器，且都不是线程安全的，推理由注册表的推理锁串行执行，
+# 上限大于 1 时多出的线程只会等锁，因此都设为 1
+BATCH_MAX_WORKERS = 4
+BATCH_CONCURRENCY = {
+    'text': 1,
+    'image': 1,
+    'audio': 1,
+    'video': 1,
+}
+# 支持批量推理的模态一批包含的文件数
+BATCH_SIZES = {
+    'image': 8,
+}
+
+# PDF 流式处理时每个窗口的页数，窗口越大内存占用越高
+PDF_STREAM_WINDOW = 4
+# 布局检测每次送入模型的页数，需不大于 PDF_STREAM_WINDOW
+PDF_LAYOUT_BATCH_SIZE = 4
+# OCR 时裁剪文本行图像的线程数，0 表示不使用线程池
+PDF_OCR_WORKERS = 2
+# 对带文本层的数字版 PDF 直接读取文字，只对扫描页和文本层缺失的区域做 OCR
+PDF_USE_TEXT_LAYER = True
+
+# 处理结果缓存：按文件内容哈希 + 流水线版本复用结果，总大小上限（MB）
+RESULT_CACHE_MAX_MB = 2048
+# 各类文件处理流水线的版本号，模型或处理参数变化后需要修改，使旧缓存失效
+PIPELINE_VERSIONS = {
+    'text': 'v1',
+    'image': 'v1',
+    'audio': 'v2',
+    'video': 'v2',
+}
+
+# 调试产物（预处理图像、检测结果 JSON、PDF 图片区域），默认关闭
+# 开启后异步写入 MEDIA_ROOT/<项目名>/<文件ID>/artifacts/，超出数量/大小/保留天数时删除最旧的产物
+ARTIFACTS = {
+    'ENABLED': False,
+    'MAX_FILES': 200,
+    'MAX_MB': 200,
+    'MAX_AGE_DAYS': 7,
+}
+
+# 图像检测/分类模型和 PDF 布局模型的推理后端
+# BACKEND: 'torch'（PyTorch eager）或 'onnx'（首次加载时导出为 ONNX 并缓存，用 ONNX Runtime 推理）
+# QUANTIZATION: ONNX 后端的 INT8 量化，None / 'dynamic' / 'static'，static 需要提供校准图像
+INFERENCE_BACKEND = {
+    'BACKEND': 'torch',
+    'QUANTIZATION': None,
+    'ONNX_CACHE_DIR': os.path.join(BASE_DIR, 'algorithm', 'model', 'onnx'),
+    'CALIBRATION_IMAGES': [],
+}
+
+# 超过 30 秒的音频分段转录
+# MODE: 'vad' 按能量检测的语音段切分，'window' 按固定窗口重叠切分
+WHISPER_LONG_FORM = {
+    'MODE': 'vad',
+    'WINDOW_SECONDS': 30,
+    'OVERLAP_SECONDS': 2,
+    'BATCH_SIZE': 8,
+}
+
+# 音频特征矩阵（MFCC、频谱中心等）以 .npy 文件保存，读取时内存映射
+# DTYPE: 存储精度，'float16' 或 'float32'
+# PREVIEW_FRAMES: get_file_processing_result 返回的降采样概览帧数
+# PAGE_SECONDS / MAX_FRAMES: get_audio_features 未指定结束时间时每页的时长，以及单次返回的最大帧数
+AUDIO_FEATURES = {
+    'ROOT_DIR': os.path.join(MEDIA_ROOT, 'features'),
+    'DTYPE': 'float16',
+    'PREVIEW_FRAMES': 200,
+    'PAGE_SECONDS': 60,
+    'MAX_FRAMES': 2000,
+}
+
+# Whisper 推理配置，CPU 节点上建议开启动态 INT8 量化并固定线程数
+# DEVICE: 'auto' / 'cpu' / 'cuda'
+# QUANTIZATION: None 或 'dynamic'（Linear 层动态 INT8 量化，仅 CPU）
+# INTRA_OP_THREADS / INTER_OP_THREADS: torch 线程数，None 使用默认值。
+#       这是进程级设置，不是 Whisper 专用：Whisper 在 Django / 批处理进程内加载，
+#       设置后该进程中 YOLO、ResNet、PDF 等所有 torch 模型都使用这个线程数
+# NUM_BEAMS: 1 为贪心解码，大于 1 为束搜索
+WHISPER_PROFILE = {
+    'DEVICE': 'auto',
+    'QUANTIZATION': None,
+    'INTRA_OP_THREADS': None,
+    'INTER_OP_THREADS': None,
+    'NUM_BEAMS': 1,
+    'MAX_NEW_TOKENS': None,
+    'LANGUAGE': 'zh',
+    'TASK': 'transcribe',
+}
+
+# 视频处理：每隔多少帧提取一帧，以及解码线程与消费者之间环形缓冲区的帧数
+VIDEO_SAMPLE_INTERVAL = 4
+# 各抽帧策略的参数，策略本身按项目在 Project.frame_sampling 中选择
+# SEEK_SECONDS: 'seek' 策略每隔多少秒提取一帧
+# SCENE_THRESHOLD: 'scene' 策略的场景变化阈值（缩略灰度图的平均绝对差，0~255）
+VIDEO_SAMPLING = {
+    'SEEK_SECONDS': 1.0,
+    'SCENE_THRESHOLD': 30.0,
+}
+VIDEO_RING_BUFFER_FRAMES = 8
+# 视频帧存储的根目录，按内容哈希 + 流水线版本分目录存放
+VIDEO_FRAMES_ROOT = os.path.join(MEDIA_ROOT, 'frames')
+
+# 视频行为识别
+# MODE: 'whole' 整段视频识别一个动作；'segmented' 在关键帧处切成约 SEGMENT_SECONDS 秒的片段，
+#       在 WORKERS 个常驻模型的进程中并行识别，结果为逐段的动作时间线
+# THREADS_PER_WORKER: 每个识别进程的 torch 线程数，None 使用默认值；只在独立的识别进程中设置，不影响 Django 进程
+VIDEO_ACTION = {
+    'MODE': 'whole',
+    'SEGMENT_SECONDS': 10,
+    'WORKERS': 2,
+    'THREADS_PER_WORKER': None,
+}
+
+# 项目/文件列表接口的分页
+# LIST_DEFAULT_LIMIT: 未传 limit 时的每页条数，None 表示返回全部（兼容现有前端）
+# LIST_MAX_LIMIT: limit 的上限
+# LIST_STREAM_BATCH_SIZE: stream=1 时每次从数据库读取的条数
+LIST_DEFAULT_LIMIT = None
+LIST_MAX_LIMIT = 1000
+LIST_STREAM_BATCH_SIZE = 500
+
+# get_file_content 的文件发送方式
+# SENDFILE: None 由 Django 流式返回；'x-sendfile'（Apache mod_xsendfile / lighttpd）或
+#           'x-accel-redirect'（Nginx）只返回响应头，由反向代理发送文件
+# ACCEL_REDIRECT_PREFIX / ACCEL_REDIRECT_ROOT: Nginx internal location 的 URL 前缀及其对应的磁盘目录，例如
+#   location /protected-media/ { internal; alias /path/to/media/; }
+FILE_SERVING = {
+    'SENDFILE': None,
+    'ACCEL_REDIRECT_PREFIX': '/protected-media/',
+    'ACCEL_REDIRECT_ROOT': MEDIA_ROOT,
+}
+
+# 断点续传上传
+# UPLOAD_MAX_CHUNK_MB: 单个分块的最大大小
+# UPLOAD_SESSION_MAX_AGE_HOURS: 超过该时间没有新分块的未完成会话会被清理，已写入的部分文件一并删除
+UPLOAD_MAX_CHUNK_MB = 64
+UPLOAD_SESSION_MAX_AGE_HOURS = 24